@@ -1,13 +1,16 @@
 import sys
 import os
 import re
+import threading
 from pathlib import Path
 from typing import List, Tuple
+import numpy as np
 
 if __file__ == "/__init__.py":
     # running in the blender text editor
     sys.path.append(os.path.join(Path.home(), "src", "homemaker-addon"))
 
+import ifcopenshell
 from topologic_core import Vertex, Face, CellComplex
 
 # Improved error handling and module imports
@@ -19,7 +22,10 @@ try:
         get_structural_analysis_model_by_name,
         delete_ifc_product,
         purge_unused,
+        merge_fragment,
     )
+    from molior.timings import Progress, Cancelled
+    from topologist.helpers import clean_mesh
 except ImportError:
     from .molior import Molior
     from .molior.ifc import (
@@ -28,7 +34,10 @@ except ImportError:
         get_structural_analysis_model_by_name,
         delete_ifc_product,
         purge_unused,
+        merge_fragment,
     )
+    from .molior.timings import Progress, Cancelled
+    from .topologist.helpers import clean_mesh
 
 from bonsai.bim.ifc import IfcStore
 import bonsai.tool as tool
@@ -53,6 +62,17 @@ ROOM_TYPES = [
     "void",
 ]
 ROOM_PATTERN = re.compile("|".join(ROOM_TYPES), flags=re.IGNORECASE)
+# Events passed through to the viewport while a background build is running
+NAVIGATION_EVENTS = {
+    "MOUSEMOVE",
+    "INBETWEEN_MOUSEMOVE",
+    "MIDDLEMOUSE",
+    "WHEELUPMOUSE",
+    "WHEELDOWNMOUSE",
+    "TRACKPADPAN",
+    "TRACKPADZOOM",
+    "MOUSEROTATE",
+}
 
 bl_info = {
     "name": "Homemaker Topologise",
@@ -188,8 +208,8 @@ class ObjectTopologise(bpy.types.Operator):
 
     def _execute(self, context):
         """Execute IFC operations - called by IfcStore.execute_ifc_operator"""
-        delete_ifc_product(IfcStore.file, self.ifc_building)
-        delete_ifc_product(IfcStore.file, self.structural_model)
+        delete_ifc_product(IfcStore.file, self.ifc_building, bulk=True)
+        delete_ifc_product(IfcStore.file, self.structural_model, bulk=True)
         purge_unused(IfcStore.file)
 
 
@@ -200,7 +220,114 @@ class ObjectHomemaker(bpy.types.Operator):
     bl_label = "Homemaker"
     bl_options = {"REGISTER", "UNDO"}
 
+    # Build profile, switch these off for a quicker architectural preview
+    structural: bpy.props.BoolProperty(
+        name="Structural Model",
+        description="Create the structural analysis model",
+        default=True,
+    )
+    structural_connections: bpy.props.BoolProperty(
+        name="Structural Connections",
+        description="Connect the members of the structural analysis model",
+        default=True,
+    )
+    boundaries: bpy.props.BoolProperty(
+        name="Space Boundaries",
+        description="Create 2nd level space boundaries",
+        default=True,
+    )
+    void_spaces: bpy.props.BoolProperty(
+        name="Void Spaces",
+        description="Create spaces for cells that have no other space",
+        default=True,
+    )
+    stash: bpy.props.BoolProperty(
+        name="Stash Topology",
+        description="Stash the cell complex and usages, needed to regenerate",
+        default=True,
+    )
+
     def execute(self, context):
+        result = self._prepare(context)
+        if result:
+            return result
+
+        self.fragment = None
+        IfcStore.execute_ifc_operator(self, context)
+        self._finish(context)
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        """Build in a worker thread, with progress in the status bar, Esc cancels"""
+        result = self._prepare(context)
+        if result:
+            return result
+
+        # The worker thread never touches IfcStore.file. Buildings are
+        # generated or regenerated in a copy, which is merged by modal() as
+        # an undoable operator when finished
+        self.skeleton_max_id = IfcStore.file.get_max_id()
+        self.fragment = ifcopenshell.file.from_string(IfcStore.file.to_string())
+        self.progress = Progress()
+        self.error = None
+        self.thread = threading.Thread(target=self._work, daemon=True)
+        self.thread.start()
+
+        window_manager = context.window_manager
+        window_manager.progress_begin(0, 100)
+        self.timer = window_manager.event_timer_add(0.2, window=context.window)
+        window_manager.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == "ESC":
+            self.progress.cancel()
+        if event.type != "TIMER":
+            # Nothing that could edit the IFC file is allowed until finished,
+            # the build is merged into the file as it was when started
+            if event.type in NAVIGATION_EVENTS:
+                return {"PASS_THROUGH"}
+            return {"RUNNING_MODAL"}
+
+        if self.thread.is_alive():
+            context.window_manager.progress_update(int(self.progress.fraction() * 100))
+            context.workspace.status_text_set(
+                "Homemaker: {} {}/{}, Esc to cancel".format(
+                    self.progress.current or "Topologise",
+                    self.progress.done,
+                    self.progress.total,
+                )
+            )
+            return {"RUNNING_MODAL"}
+
+        context.window_manager.event_timer_remove(self.timer)
+        context.window_manager.progress_end()
+        context.workspace.status_text_set(None)
+
+        if self.error is None and self.progress.cancelled.is_set():
+            self.error = Cancelled(None)
+        if self.error is None and IfcStore.file.get_max_id() != self.skeleton_max_id:
+            self.error = RuntimeError("IFC file changed during the build")
+        if self.error:
+            if isinstance(self.error, Cancelled):
+                self.report({"INFO"}, "Homemaker cancelled")
+            else:
+                self.report({"ERROR"}, "Homemaker failed: " + repr(self.error))
+            return {"CANCELLED"}
+
+        IfcStore.execute_ifc_operator(self, context)
+        self._finish(context)
+        return {"FINISHED"}
+
+    def _work(self):
+        """Run the build in the worker thread, errors are reported by modal()"""
+        try:
+            self._build(self.fragment, timings=self.progress)
+        except Exception as error:
+            self.error = error
+
+    def _prepare(self, context):
+        """Collect the input data, returns a result if there is nothing to do"""
         # Initialize IFC if needed
         if tool.Ifc.get() is None:
             IfcStore.file = init()
@@ -227,57 +354,57 @@ class ObjectHomemaker(bpy.types.Operator):
             self.report({"WARNING"}, "Could not get cell complex from IFC element")
             return {"CANCELLED"}
 
-        # Delete and replace the building containing this element
-        self.ifc_building = get_parent_building(ifc_element)
-        self.structural_model = get_structural_analysis_model_by_name(
-            IfcStore.file, self.ifc_building, self.ifc_building.Name
-        )
-        self.building_name = self.ifc_building.Name
+        # Update the building containing this element
+        ifc_building = get_parent_building(ifc_element)
+        self.building_name = ifc_building.Name
+        self.building_id = ifc_building.id()
 
         self.action = "regenerate_ifc"
-        IfcStore.execute_ifc_operator(self, context)
-        tool.IfcGit.load_project()
-
-        # Hide specific collections after processing
-        self._hide_specific_collections()
-
-        return {"FINISHED"}
+        return None
 
     def _handle_blender_objects(self, context):
         """Process regular Blender objects"""
         # Apply transforms
         bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
 
-        selected_objects = context.selected_objects
-        blender_objects, widgets = process_blender_objects(selected_objects)
+        self.selected_objects = context.selected_objects
+        blender_objects, widgets = process_blender_objects(self.selected_objects)
 
         if not blender_objects:
             self.report({"WARNING"}, "No valid objects selected")
             return {"CANCELLED"}
 
-        # Prepare objects for IFC conversion
+        # Prepare objects for IFC conversion, Blender data is only read here
+        self.inputs = []
         for blender_object in blender_objects:
             triangulate_nonplanar(blender_object)
+            self.inputs.append(
+                [
+                    blender_object.name,
+                    topologic_faces_from_blender_object(blender_object),
+                ]
+            )
 
-        self.blender_objects = blender_objects
         self.widgets = widgets
 
         self.action = "generate_ifc"
-        IfcStore.execute_ifc_operator(self, context)
+        return None
+
+    def _finish(self, context):
+        """Reload the project and tidy up after a successful build"""
         tool.IfcGit.load_project()
 
-        # Remove original objects
-        for blender_object in selected_objects:
-            try:
-                bpy.data.objects.remove(blender_object)
-            except ReferenceError:
-                continue
+        if self.action == "generate_ifc":
+            # Remove original objects
+            for blender_object in self.selected_objects:
+                try:
+                    bpy.data.objects.remove(blender_object)
+                except ReferenceError:
+                    continue
 
         # Hide specific collections after processing
         self._hide_specific_collections()
 
-        return {"FINISHED"}
-
     def _hide_specific_collections(self):
         """Hide structural and cell complex collections"""
         # Hide Structural objects
@@ -292,53 +419,102 @@ class ObjectHomemaker(bpy.types.Operator):
 
     def _execute(self, context):
         """Execute IFC operations - called by IfcStore.execute_ifc_operator"""
-        if self.action == "regenerate_ifc":
-            # Remove the old building
-            delete_ifc_product(IfcStore.file, self.ifc_building)
-            delete_ifc_product(IfcStore.file, self.structural_model)
-            purge_unused(IfcStore.file)
+        if self.fragment is not None:
+            # Built by the worker thread, products removed from the copy by
+            # regenerating are removed here too
+            merge_fragment(IfcStore.file, self.fragment, self.skeleton_max_id)
+        else:
+            self._build(IfcStore.file)
 
-            # Create new building from cell complex
+    def _build(self, file, timings=None):
+        """Generate or regenerate buildings in an IFC file, doesn't touch Blender data"""
+        if self.action == "regenerate_ifc":
+            # Update the old building, only products with changed inputs are replaced
             molior_object = Molior.from_cellcomplex(
-                file=IfcStore.file,
+                file=file,
                 cellcomplex=self.cellcomplex,
                 name=self.building_name,
                 share_dir=self.share_dir,
+                building=file.by_id(self.building_id),
+                incremental=True,
+                stash_cellcomplex=True,
+                timings=timings,
+                **self._profile(),
             )
             molior_object.execute()
+            purge_unused(file)
 
         elif self.action == "generate_ifc":
             # Create new buildings from blender objects
-            for blender_object in self.blender_objects:
+            for name, faces in self.inputs:
                 molior_object = Molior.from_faces_and_widgets(
-                    file=IfcStore.file,
-                    faces=topologic_faces_from_blender_object(blender_object),
+                    file=file,
+                    faces=faces,
                     widgets=self.widgets,
-                    name=blender_object.name,
+                    name=name,
                     share_dir=self.share_dir,
+                    timings=timings,
+                    tag_fingerprints=True,
+                    stash_cellcomplex=True,
+                    **self._profile(),
                 )
                 molior_object.execute()
 
+    def _profile(self):
+        """Build profile options for Molior"""
+        return {
+            "structural": self.structural,
+            "structural_connections": self.structural_connections,
+            "boundaries": self.boundaries,
+            "void_spaces": self.void_spaces,
+            "stash": self.stash,
+        }
+
 
 def topologic_faces_from_blender_object(blender_object) -> List[Face]:
     """Convert a Blender object to Topologic faces"""
-    vertices = [Vertex.ByCoordinates(*v.co) for v in blender_object.data.vertices]
-    faces_ptr = []
-
-    for polygon in blender_object.data.polygons:
-        if polygon.area < EPSILON:
-            continue
-
-        # Get style name from material slot
-        stylename = DEFAULT_STYLE
-        if len(blender_object.material_slots) > 0:
-            material = blender_object.material_slots[polygon.material_index].material
-            if material and material.name != "Material":
-                stylename = material.name
+    mesh = blender_object.data
+    coordinates = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coordinates)
+    vertices = [
+        Vertex.ByCoordinates(*coor) for coor in coordinates.reshape(-1, 3).tolist()
+    ]
+
+    # Bulk read polygon corners, areas and material slots
+    polygon_count = len(mesh.polygons)
+    loop_start = np.empty(polygon_count, dtype=np.int32)
+    areas = np.empty(polygon_count, dtype=np.float32)
+    material_index = np.empty(polygon_count, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    mesh.polygons.foreach_get("area", areas)
+    mesh.polygons.foreach_get("material_index", material_index)
+    vertex_index = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", vertex_index)
+
+    # Style name for each material slot
+    stylenames = [DEFAULT_STYLE]
+    if len(blender_object.material_slots) > 0:
+        stylenames = [
+            (
+                slot.material.name
+                if slot.material and slot.material.name != "Material"
+                else DEFAULT_STYLE
+            )
+            for slot in blender_object.material_slots
+        ]
+    material_index = np.clip(material_index, 0, len(stylenames) - 1)
 
+    # Skip tiny polygons, loops are contiguous so split them at each loop_start
+    keep = areas >= EPSILON
+    polygons = np.split(vertex_index, loop_start[1:])
+    faces_ptr = []
+    for corners, index in zip(
+        [corners for corners, ok in zip(polygons, keep) if ok],
+        material_index[keep].tolist(),
+    ):
         # Create topologic face
-        face_ptr = Face.ByVertices([vertices[v] for v in polygon.vertices])
-        face_ptr.Set("stylename", stylename)
+        face_ptr = Face.ByVertices([vertices[v] for v in corners.tolist()])
+        face_ptr.Set("stylename", stylenames[index])
         faces_ptr.append(face_ptr)
 
     return faces_ptr
@@ -358,33 +534,42 @@ def meshes_from_cellcomplex(cc) -> List[bpy.types.Mesh]:
         new_mesh.from_pydata([centroid.Coordinates()], [], [])
         meshes.append(new_mesh)
 
-    # Create mesh for all faces in the cell complex
+    # Collect face corners, these are welded into shared vertices
     faces_ptr = []
     cc.Faces(cc, faces_ptr)
-    vertices = []
+    coordinates = []
     faces = []
     materials = []
-    vertex_id = 0
 
     for face_ptr in faces_ptr:
         vertices_ptr = []
         face_ptr.VerticesPerimeter(vertices_ptr)
-        face = []
-        for vertex in vertices_ptr:
-            vertices.append([vertex.X(), vertex.Y(), vertex.Z()])
-            face.append(vertex_id)
-            vertex_id += 1
-        faces.append(face)
+        first = len(coordinates)
+        coordinates.extend(vertex.Coordinates() for vertex in vertices_ptr)
+        faces.append(range(first, len(coordinates)))
         materials.append(face_ptr.Get("stylename") or DEFAULT_STYLE)
 
+    vertices, faces, kept = clean_mesh(coordinates, faces, tolerance=EPSILON)
+    loop_total = np.array([len(face) for face in faces], dtype=np.int32)
+    loop_start = np.zeros(len(faces), dtype=np.int32)
+    np.cumsum(loop_total[:-1], out=loop_start[1:])
+
     new_mesh = bpy.data.meshes.new("faces")
-    new_mesh.from_pydata(vertices, [], faces)
+    new_mesh.vertices.add(len(vertices))
+    new_mesh.vertices.foreach_set("co", vertices.astype(np.float32).ravel())
+    new_mesh.loops.add(int(loop_total.sum()))
+    new_mesh.loops.foreach_set(
+        "vertex_index", np.array([v for face in faces for v in face], dtype=np.int32)
+    )
+    new_mesh.polygons.add(len(faces))
+    new_mesh.polygons.foreach_set("loop_start", loop_start)
 
     # Set up materials
-    _setup_materials(new_mesh, materials)
+    _setup_materials(new_mesh, [materials[index] for index in kept])
 
     # Finalize mesh
-    new_mesh.update()
+    new_mesh.update(calc_edges=True)
+    new_mesh.validate()
     new_mesh_name = cc.Get("name") or "CellComplex"
     new_mesh.name = new_mesh_name
     meshes.append(new_mesh)
@@ -393,29 +578,19 @@ def meshes_from_cellcomplex(cc) -> List[bpy.types.Mesh]:
 
 
 def _setup_materials(mesh, material_names):
-    """Set up materials for a mesh"""
+    """Set up materials for a mesh, one material name per polygon"""
+    names, material_index = np.unique(material_names, return_inverse=True)
+
     # Create materials if they don't exist
-    for material_name in material_names:
+    for material_name in names.tolist():
         if material_name not in bpy.data.materials:
             bpy.data.materials.new(material_name)
-        if material_name not in mesh.materials:
-            material = bpy.data.materials[material_name]
-            mesh.materials.append(material)
-
-    # Map material names to indices
-    material_index_map = {mesh.materials[i].name: i for i in range(len(mesh.materials))}
+        mesh.materials.append(bpy.data.materials[material_name])
 
     # Assign materials to faces
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
-
-    for i, face in enumerate(bm.faces):
-        face.material_index = material_index_map.get(material_names[i], 0)
-
-    # Remove doubles and update mesh
-    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=EPSILON)
-    bm.to_mesh(mesh)
-    bm.free()
+    mesh.polygons.foreach_set(
+        "material_index", material_index.reshape(-1).astype(np.int32)
+    )
 
 
 def process_blender_objects(selected_objects) -> Tuple[List, List]:
@@ -448,16 +623,9 @@ def process_blender_objects(selected_objects) -> Tuple[List, List]:
 
 def _calculate_centroid(obj) -> List[float]:
     """Calculate the centroid of a mesh object"""
-    total = len(obj.data.vertices)
-    centre = [0.0, 0.0, 0.0]
-
-    for v in obj.data.vertices:
-        coor = v.co[:]
-        centre[0] += coor[0]
-        centre[1] += coor[1]
-        centre[2] += coor[2]
-
-    return [centre[0] / total, centre[1] / total, centre[2] / total]
+    coordinates = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+    obj.data.vertices.foreach_get("co", coordinates)
+    return coordinates.reshape(-1, 3).astype(float).mean(axis=0).tolist()
 
 
 def triangulate_nonplanar(blender_object):
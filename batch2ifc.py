@@ -0,0 +1,326 @@
+#!/usr/bin/python3
+
+"""batch2ifc - convert many BREP, DXF or OBJ files into IFC buildings
+
+Inputs are files, folders containing .brep, .dxf or .obj files, or
+manifests: text files listing one input per line, optionally followed by
+a tab and the output path.  Conversions run in a pool of worker
+processes, each worker loads the styles and their IFC libraries once.
+
+Outputs that were made from identical input data are skipped, a
+.sha256 file next to each output records what it was made from.
+
+--preview builds only the architecture, without the structural model,
+space boundaries, stashed topology or void spaces; these can also be
+switched off one at a time.
+
+Usage:
+    batch2ifc.py [--jobs 8] [--timeout 600] [--output-dir out]
+                 [--cache-dir cache] [--preview] inputs...
+
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing
+import multiprocessing.connection
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from topologic_core import Topology
+from topologist.helpers import faces_from_dxf, faces_from_obj
+from molior import Molior, PREVIEW
+from molior.style import Style
+
+EXTENSIONS = [".brep", ".dxf", ".obj"]
+
+
+def faces_from_brep(path):
+    """Topologic Faces from a BREP file"""
+    with open(path, "r") as brep_file:
+        topology = Topology.ByString(brep_file.read())
+    faces_ptr = []
+    topology.Faces(None, faces_ptr)
+    return faces_ptr
+
+
+def input_hash(path, profile=None):
+    """sha256 of an input file, and of the build profile if not the default"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as input_file:
+        for block in iter(lambda: input_file.read(1 << 20), b""):
+            digest.update(block)
+    if profile:
+        digest.update(json.dumps(profile, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def up_to_date(job):
+    """Is the output already made from this input"""
+    try:
+        with open(job["output"] + ".sha256") as hash_file:
+            return hash_file.read().strip() == job["hash"] and os.path.exists(
+                job["output"]
+            )
+    except OSError:
+        return False
+
+
+def convert(job, style, cache_dir=None):
+    """Convert a single file, returns a summary"""
+    start = time.perf_counter()
+    result = {"id": job.get("id"), "input": job["input"], "output": job["output"]}
+    try:
+        readers = {
+            ".brep": faces_from_brep,
+            ".dxf": faces_from_dxf,
+            ".obj": faces_from_obj,
+        }
+        faces_ptr = readers[os.path.splitext(job["input"])[1].lower()](job["input"])
+        if not faces_ptr:
+            raise ValueError("no usable faces")
+        molior_object = Molior.from_faces_and_widgets(
+            faces=faces_ptr,
+            name=os.path.splitext(os.path.basename(job["input"]))[0],
+            style=style,
+            cache_dir=cache_dir,
+            **job.get("profile", {}),
+        )
+        if molior_object is None:
+            raise ValueError("no usable faces")
+        molior_object.execute()
+
+        os.makedirs(os.path.dirname(os.path.abspath(job["output"])), exist_ok=True)
+        partial = job["output"] + ".part"
+        molior_object.file.write(partial)
+        os.replace(partial, job["output"])
+        with open(job["output"] + ".sha256", "w") as hash_file:
+            hash_file.write(job["hash"] + "\n")
+        result["status"] = "done"
+        result["faces"] = len(faces_ptr)
+        result["entities"] = len(list(molior_object.file))
+    except Exception as error:
+        result["status"] = "failed"
+        result["error"] = repr(error)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def worker(share_dir, tasks, results, cache_dir=None):
+    """Keep converting jobs until given None, results are sent down a Pipe"""
+    style = Style({"share_dir": share_dir})
+    while True:
+        job = tasks.get()
+        if job is None:
+            return
+        results.send(convert(job, style, cache_dir))
+
+
+def collect_jobs(inputs, output_dir=None, profile=None):
+    """Input and output paths for files, folders and manifests
+
+    profile is a dictionary of Molior build options, e.g. molior.PREVIEW.
+    Raises ValueError if two inputs would be written to the same output.
+    """
+    pairs = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in EXTENSIONS:
+                        pairs.append([os.path.join(root, name), None])
+        elif os.path.splitext(path)[1].lower() in EXTENSIONS:
+            pairs.append([path, None])
+        else:
+            folder = os.path.dirname(os.path.abspath(path))
+            with open(path) as manifest:
+                for line in manifest:
+                    fields = line.rstrip("\n").split("\t")
+                    if not fields[0] or fields[0].startswith("#"):
+                        continue
+                    fields = [os.path.join(folder, field) for field in fields]
+                    pairs.append([fields[0], fields[1] if len(fields) > 1 else None])
+
+    jobs = []
+    outputs = {}
+    for path, output in pairs:
+        if output is None:
+            output = os.path.splitext(path)[0] + ".ifc"
+            if output_dir:
+                output = os.path.join(output_dir, os.path.basename(output))
+        key = os.path.normcase(os.path.abspath(output))
+        if key in outputs:
+            raise ValueError(
+                "{} and {} would both be written to {}".format(
+                    outputs[key], path, output
+                )
+            )
+        outputs[key] = path
+        jobs.append(
+            {
+                "input": path,
+                "output": output,
+                "hash": input_hash(path, profile),
+                "profile": profile or {},
+            }
+        )
+    return jobs
+
+
+def run(jobs, share_dir, processes=None, timeout=None, cache_dir=None):
+    """Convert jobs in parallel, jobs taking longer than timeout seconds are abandoned"""
+    context = multiprocessing.get_context("spawn")
+    processes = min(processes or os.cpu_count() or 1, len(jobs)) or 1
+    # results are matched to workers by sequence, the same input may appear twice
+    pending = [dict(job, id=sequence) for sequence, job in enumerate(jobs)]
+    pending.reverse()
+    workers = []
+    summaries = []
+
+    def start_worker():
+        # nothing is shared between workers, so a killed worker can't leave a
+        # lock held or a half written result for the others
+        tasks = context.Queue()
+        results, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=worker, args=(share_dir, tasks, sender, cache_dir), daemon=True
+        )
+        process.start()
+        sender.close()
+        return {
+            "process": process,
+            "tasks": tasks,
+            "results": results,
+            "job": None,
+            "start": None,
+        }
+
+    for _ in range(processes):
+        workers.append(start_worker())
+
+    while pending or [item for item in workers if item["job"]]:
+        for item in workers:
+            if item["job"] is None and pending:
+                item["job"] = pending.pop()
+                item["start"] = time.perf_counter()
+                item["tasks"].put(item["job"])
+        busy = [item for item in workers if item["job"]]
+        ready = multiprocessing.connection.wait(
+            [item["results"] for item in busy], timeout=0.5
+        )
+        for item in busy:
+            if item["results"] not in ready:
+                continue
+            try:
+                result = item["results"].recv()
+            except EOFError:
+                # the worker died, see below
+                continue
+            if item["job"]["id"] == result["id"]:
+                item["job"] = None
+                summaries.append(result)
+                print(
+                    result["status"],
+                    result["input"],
+                    "{:.1f}s".format(result["seconds"]),
+                )
+        for index, item in enumerate(workers):
+            elapsed = time.perf_counter() - (item["start"] or 0)
+            died = item["job"] and not item["process"].is_alive()
+            if item["job"] and (died or (timeout and elapsed > timeout)):
+                item["process"].kill()
+                summaries.append(
+                    {
+                        "id": item["job"]["id"],
+                        "input": item["job"]["input"],
+                        "output": item["job"]["output"],
+                        "status": "crashed" if died else "timeout",
+                        "seconds": elapsed,
+                    }
+                )
+                print(summaries[-1]["status"], item["job"]["input"])
+                item["results"].close()
+                workers[index] = start_worker()
+
+    for item in workers:
+        item["tasks"].put(None)
+    for item in workers:
+        item["process"].join(timeout=5)
+        item["results"].close()
+    return summaries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="batch2ifc", description="Convert BREP, DXF or OBJ files to IFC"
+    )
+    parser.add_argument("inputs", nargs="+", help="files, folders or manifests")
+    parser.add_argument("--output-dir", help="write IFC files here")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: cpus)")
+    parser.add_argument("--timeout", type=float, help="seconds allowed per file")
+    parser.add_argument(
+        "--share-dir",
+        default=os.path.join(os.path.abspath(os.path.dirname(__file__)), "share"),
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="ignore up to date outputs"
+    )
+    parser.add_argument("--report", help="write a JSON summary to this file")
+    parser.add_argument("--cache-dir", help="reuse CellComplexes cached here")
+    parser.add_argument(
+        "--preview", action="store_true", help="build only the architecture"
+    )
+    for option, text in [
+        ["structural", "the structural analysis model"],
+        ["structural_connections", "structural connections"],
+        ["boundaries", "space boundaries"],
+        ["stash", "a stash of the topology and usages"],
+        ["void_spaces", "spaces for void cells"],
+    ]:
+        parser.add_argument(
+            "--no-" + option.replace("_", "-"),
+            dest=option,
+            action="store_false",
+            help="don't build " + text,
+        )
+    args = parser.parse_args(argv)
+
+    profile = {}
+    for option in PREVIEW:
+        if args.preview or not getattr(args, option):
+            profile[option] = PREVIEW[option]
+    try:
+        jobs = collect_jobs(args.inputs, args.output_dir, profile)
+    except ValueError as error:
+        parser.error(str(error))
+    todo = [job for job in jobs if args.force or not up_to_date(job)]
+    start = time.perf_counter()
+    summaries = [
+        {"input": job["input"], "output": job["output"], "status": "skipped"}
+        for job in jobs
+        if job not in todo
+    ]
+    if todo:
+        summaries += run(todo, args.share_dir, args.jobs, args.timeout, args.cache_dir)
+
+    counts = {}
+    for summary in summaries:
+        counts[summary["status"]] = counts.get(summary["status"], 0) + 1
+    report = {
+        "seconds": time.perf_counter() - start,
+        "counts": counts,
+        "jobs": summaries,
+    }
+    print(" ".join("{}={}".format(*item) for item in sorted(counts.items())))
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+    return 0 if set(counts) <= {"done", "skipped"} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
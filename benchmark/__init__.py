@@ -0,0 +1,145 @@
+"""Benchmarks for building synthetic models of increasing size
+
+Each case generates a synthetic building (see .synthetic), then records
+wall-clock time for Molior.from_faces_and_widgets(), execute(),
+file.write() and Molior.get_cellcomplex_from_ifc(), together with the
+peak resident memory, the number of IFC entities and a per-stage
+breakdown from molior.timings.  Everything is measured with the default
+build options, so get_cellcomplex_from_ifc rebuilds the CellComplex from
+the stashed tessellation; get_cellcomplex_from_stash is the same call
+once an exact copy has also been stashed, see stash_cellcomplex.
+
+Usage:
+    python -m benchmark --sizes 1x2x1,2x4x2 --output results.json
+    python -m benchmark --compare baseline.json --output results.json
+
+"""
+
+import os
+import sys
+import time
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from molior import Molior
+from molior.timings import Timings
+from .synthetic import building, spec_name
+
+# measurements where bigger is worse
+METRICS = [
+    "from_faces_and_widgets",
+    "execute",
+    "write",
+    "get_cellcomplex_from_ifc",
+    "get_cellcomplex_from_stash",
+]
+
+
+def peak_rss():
+    """Peak resident memory of this process in bytes, None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak
+    return peak * 1024
+
+
+def run_case(spec, share_dir="share"):
+    """Build one synthetic building and measure it"""
+    faces, widgets = building(**spec)
+    result = {"spec": spec, "faces": len(faces), "seconds": {}}
+
+    start = time.perf_counter()
+    molior_object = Molior.from_faces_and_widgets(
+        faces=faces,
+        widgets=widgets,
+        name=spec_name(spec),
+        share_dir=share_dir,
+        timings=Timings(),
+    )
+    result["seconds"]["from_faces_and_widgets"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    molior_object.execute()
+    result["seconds"]["execute"] = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "benchmark.ifc")
+        start = time.perf_counter()
+        molior_object.file.write(path)
+        result["seconds"]["write"] = time.perf_counter() - start
+        result["bytes"] = os.path.getsize(path)
+
+    start = time.perf_counter()
+    cellcomplex = Molior.get_cellcomplex_from_ifc(molior_object.building)
+    result["seconds"]["get_cellcomplex_from_ifc"] = time.perf_counter() - start
+    cells = []
+    if cellcomplex:
+        cellcomplex.Cells(None, cells)
+    result["cells"] = len(cells)
+
+    result["entities"] = len(list(molior_object.file))
+    result["stages"] = molior_object.timings.report()["stages"]
+
+    molior_object.stash_serialised()
+    start = time.perf_counter()
+    Molior.get_cellcomplex_from_ifc(molior_object.building)
+    result["seconds"]["get_cellcomplex_from_stash"] = time.perf_counter() - start
+
+    result["peak_rss"] = peak_rss()
+    return result
+
+
+def run(specs, share_dir="share", isolate=True):
+    """Measure a list of building specifications, keyed by name
+
+    With isolate each case runs in a fresh process, so peak memory isn't
+    carried over from one case to the next.
+    """
+    results = {}
+    for spec in specs:
+        if isolate:
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                results[spec_name(spec)] = executor.submit(
+                    run_case, spec, share_dir
+                ).result()
+        else:
+            results[spec_name(spec)] = run_case(spec, share_dir)
+    return results
+
+
+def compare(results, baseline, threshold=0.2, slack=0.05):
+    """Measurements that are worse than a baseline by more than a fraction
+
+    Timings that differ by less than 'slack' seconds are ignored as noise.
+    Returns a list of [name, metric, baseline value, new value]
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]
+        for metric in METRICS:
+            before = old["seconds"].get(metric)
+            after = result["seconds"].get(metric)
+            if before is None or after is None or after - before < slack:
+                continue
+            if after > before * (1.0 + threshold):
+                regressions.append([name, metric, before, after])
+        for metric in ["peak_rss", "entities"]:
+            before = old.get(metric)
+            after = result.get(metric)
+            if before and after and after > before * (1.0 + threshold):
+                regressions.append([name, metric, before, after])
+    return regressions
@@ -0,0 +1,82 @@
+"""Command-line interface, see the benchmark package documentation"""
+
+import sys
+import json
+import argparse
+
+from . import run, compare
+
+
+def parse_size(text, args):
+    """'2x3x1' is two storeys of three rooms, one bay deep"""
+    storeys, rooms, bays = [int(value) for value in text.split("x")]
+    return {
+        "storeys": storeys,
+        "rooms": rooms,
+        "bays": bays,
+        "roof": args.roof,
+        "voids": args.voids,
+        "outside": args.outside,
+        "styles": args.styles.split(","),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="benchmark", description="Time Molior on synthetic buildings"
+    )
+    parser.add_argument(
+        "--sizes",
+        default="1x2x1,2x3x2,3x4x2",
+        help="comma separated storeys x rooms x bays (default: %(default)s)",
+    )
+    parser.add_argument("--roof", choices=["flat", "pitched"], default="flat")
+    parser.add_argument("--voids", type=int, default=0)
+    parser.add_argument("--outside", type=int, default=0)
+    parser.add_argument("--styles", default="default")
+    parser.add_argument("--share-dir", default="share")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="flag regressions against this JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="fractional slowdown that counts as a regression (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="don't start a fresh process for each case",
+    )
+    args = parser.parse_args(argv)
+
+    specs = [parse_size(text, args) for text in args.sizes.split(",")]
+    results = run(specs, share_dir=args.share_dir, isolate=not args.in_process)
+
+    for name, result in results.items():
+        seconds = result["seconds"]
+        print(
+            name,
+            " ".join(
+                "{}={:.3f}s".format(metric, value) for metric, value in seconds.items()
+            ),
+            "entities={}".format(result["entities"]),
+            "peak_rss={}".format(result["peak_rss"]),
+        )
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(results, json.load(baseline), args.threshold)
+        for name, metric, before, after in regressions:
+            print("REGRESSION", name, metric, before, "->", after)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
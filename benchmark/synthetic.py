@@ -0,0 +1,149 @@
+"""Synthetic buildings for benchmarking
+
+A building is a grid of rectangular rooms: 'storeys' high, 'rooms' along
+the x-axis and 'bays' deep along the y-axis, optionally with a pitched roof
+over the whole footprint.
+
+"""
+
+import math
+
+from topologic_core import Vertex, Face
+
+DEFAULTS = {
+    "storeys": 1,
+    "rooms": 2,
+    "bays": 1,
+    "width": 4.0,
+    "depth": 5.0,
+    "height": 3.0,
+    "roof": "flat",
+    "pitch": 35.0,
+    "voids": 0,
+    "outside": 0,
+    "styles": ["default"],
+    "sides": None,
+    "usages": ["living", "bedroom", "kitchen"],
+}
+
+
+def spec_name(spec):
+    """A short name for a building specification, e.g. '2x3x1-pitched'"""
+    spec = {**DEFAULTS, **spec}
+    name = "{storeys}x{rooms}x{bays}-{roof}".format(**spec)
+    if spec["voids"]:
+        name += "-v" + str(spec["voids"])
+    if spec["outside"]:
+        name += "-o" + str(spec["outside"])
+    if spec["styles"] != DEFAULTS["styles"]:
+        name += "-" + "+".join(spec["styles"])
+    if spec["sides"]:
+        name += "-s" + spec["sides"]
+    return name
+
+
+def box(x0, y0, z0, x1, y1, z1):
+    """Vertex coordinates for the six faces of a box"""
+    corners = [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+    faces = [
+        [[x, y, z0] for x, y in corners],
+        [[x, y, z1] for x, y in corners],
+    ]
+    for index in range(4):
+        a = corners[index]
+        b = corners[(index + 1) % 4]
+        faces.append(
+            [[a[0], a[1], z0], [b[0], b[1], z0], [b[0], b[1], z1], [a[0], a[1], z1]]
+        )
+    return faces
+
+
+def gable_roof(x1, y1, z0, rise):
+    """Vertex coordinates for the pitched faces and gables of a roof with a ridge along the x-axis"""
+    ridge = z0 + rise
+    middle = y1 / 2
+    return [
+        [[0.0, 0.0, z0], [x1, 0.0, z0], [x1, middle, ridge], [0.0, middle, ridge]],
+        [[x1, y1, z0], [0.0, y1, z0], [0.0, middle, ridge], [x1, middle, ridge]],
+        [[0.0, y1, z0], [0.0, 0.0, z0], [0.0, middle, ridge]],
+        [[x1, 0.0, z0], [x1, y1, z0], [x1, middle, ridge]],
+    ]
+
+
+def building(**spec):
+    """Topologic Faces and usage widgets for a synthetic building
+
+    storeys, rooms, bays: size of the grid of rooms
+    width, depth, height: size of each room
+    roof: 'flat' or 'pitched'
+    pitch: roof pitch in degrees
+    voids: number of upper floor rooms that are double-height voids
+    outside: number of ground floor rooms that are outside spaces
+    styles: stylenames, cycled along the x-axis
+    sides: stylename for walls facing north and south, e.g. 'blank'
+    usages: room usages, cycled through the rooms
+    """
+    spec = {**DEFAULTS, **spec}
+    faces = []
+    widgets = []
+    count = 0
+    for storey in range(spec["storeys"]):
+        z0 = storey * spec["height"]
+        for room in range(spec["rooms"]):
+            x0 = room * spec["width"]
+            stylename = spec["styles"][room % len(spec["styles"])]
+            for bay in range(spec["bays"]):
+                y0 = bay * spec["depth"]
+                for side, coordinates in enumerate(
+                    box(
+                        x0,
+                        y0,
+                        z0,
+                        x0 + spec["width"],
+                        y0 + spec["depth"],
+                        z0 + spec["height"],
+                    )
+                ):
+                    if spec["sides"] and side in [2, 4]:
+                        faces.append([coordinates, spec["sides"]])
+                    else:
+                        faces.append([coordinates, stylename])
+
+                usage = spec["usages"][count % len(spec["usages"])]
+                index = room * spec["bays"] + bay
+                if storey == 0 and index < spec["outside"]:
+                    usage = "outside"
+                elif storey > 0 and index < spec["voids"]:
+                    usage = "void"
+                widgets.append(
+                    [
+                        usage,
+                        [
+                            x0 + spec["width"] / 2,
+                            y0 + spec["depth"] / 2,
+                            z0 + 0.5,
+                        ],
+                    ]
+                )
+                count += 1
+
+    if spec["roof"] == "pitched":
+        length = spec["rooms"] * spec["width"]
+        span = spec["bays"] * spec["depth"]
+        rise = math.tan(math.radians(spec["pitch"])) * span / 2
+        for coordinates in gable_roof(
+            length, span, spec["storeys"] * spec["height"], rise
+        ):
+            faces.append([coordinates, spec["styles"][0]])
+
+    faces_ptr = []
+    for coordinates, stylename in faces:
+        face = Face.ByVertices([Vertex.ByCoordinates(*v) for v in coordinates])
+        face.Set("stylename", stylename)
+        faces_ptr.append(face)
+    widgets_ptr = []
+    for usage, coordinates in widgets:
+        vertex = Vertex.ByCoordinates(*coordinates)
+        vertex.Set("usage", usage)
+        widgets_ptr.append(vertex)
+    return faces_ptr, widgets_ptr
@@ -6,7 +6,9 @@ This example script illustrates how to implement the homemaker-addon
 functionality without any blender dependencies.
 
 Usage:
-    brep2ifc.py mygeometry.brep mybuilding.ifc
+    brep2ifc.py mygeometry.brep mybuilding.ifc [cache_folder]
+
+With a cache folder, the CellComplex is reused when the BREP is unchanged.
 
 """
 import sys
@@ -15,7 +17,7 @@ import datetime
 
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
-from topologic import Topology, Vertex, TopologyUtility
+from topologic_core import Topology, Vertex, TopologyUtility
 from molior import Molior
 
 print("Start", datetime.datetime.now())
@@ -29,11 +31,15 @@ origin = Vertex.ByCoordinates(0.0, 0.0, 0.0)
 topology_scaled = TopologyUtility.Scale(topology, origin, 1.0, 1.0, 1.0)
 
 faces_ptr = []
-topology_scaled.Faces(faces_ptr)
+topology_scaled.Faces(None, faces_ptr)
 
 print(str(len(faces_ptr)), "faces", datetime.datetime.now())
 
-molior_object = Molior.from_faces_and_widgets(faces=faces_ptr, name="brep2ifc building")
+molior_object = Molior.from_faces_and_widgets(
+    faces=faces_ptr,
+    name="brep2ifc building",
+    cache_dir=sys.argv[3] if len(sys.argv) > 3 else None,
+)
 molior_object.execute()
 
 print("IFC model created", datetime.datetime.now())
@@ -14,26 +14,14 @@ import os
 
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
-from topologic import Vertex, Face, FaceUtility
 from molior import Molior
-import ezdxf
+from topologist.helpers import faces_from_dxf
 from pyinstrument import Profiler
 
 profiler = Profiler()
 
-# convert DXF meshes into a list of Topologic Faces
-faces_ptr = []
-doc = ezdxf.readfile(sys.argv[1])
-model = doc.modelspace()
-for entity in model:
-    if entity.get_mode() == "AcDbPolyFaceMesh":
-        vertices, faces = entity.indexed_faces()
-        pointlist = [Vertex.ByCoordinates(*vertex.dxf.location) for vertex in vertices]
-
-        for face in faces:
-            face_stl = Face.ByVertices([pointlist[index] for index in face.indices])
-            if FaceUtility.Area(face_stl) > 0.00001:
-                faces_ptr.append(face_stl)
+# convert DXF meshes into a list of Topologic Faces, welded and cleaned
+faces_ptr = faces_from_dxf(sys.argv[1])
 
 profiler.start()
 
@@ -15,7 +15,16 @@ IfcOpenShell.
 
 """
 
+import os
 import re
+import gzip
+import json
+import zlib
+import base64
+import hashlib
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import ifcopenshell.util
 from topologic_core import CellComplex, CellUtility, Vertex, Face, Topology
 from .extrusion import Extrusion
@@ -28,6 +37,7 @@ from .repeat import Repeat
 from .grillage import Grillage
 
 from .style import Style
+from .timings import Timings, stage, step
 from .geometry import subtract_3d, x_product_3d, matrix_align
 from .ifc import (
     init,
@@ -37,12 +47,21 @@ from .ifc import (
     create_default_contexts,
     create_storeys,
     add_cell_topology_epsets,
+    add_pset,
     assign_space_byindex,
     assign_storey_byindex,
     get_context_by_name,
     get_parent_building,
     create_tessellation_from_mesh,
     create_tessellations_from_mesh_split,
+    create_cartesian_point,
+    create_direction,
+    create_axis2_placement_3d,
+    get_surface_style,
+    delete_ifc_products_bulk,
+    begin_bulk_relationships,
+    flush_bulk_relationships,
+    merge_fragment,
 )
 
 try:
@@ -56,29 +75,71 @@ except ImportError:
 
 api = ifcopenshell.api
 
+# a build profile for early design exploration, only the architecture
+PREVIEW = {
+    "structural": False,
+    "boundaries": False,
+    "stash": False,
+    "void_spaces": False,
+    "structural_connections": False,
+}
+
 
 class Molior:
     """A Builder, has resources to build"""
 
     @classmethod
     def from_faces_and_widgets(
-        cls, file=None, faces=[], widgets=[], name="My Building", share_dir="share"
+        cls,
+        file=None,
+        faces=[],
+        widgets=[],
+        name="My Building",
+        share_dir="share",
+        cache_dir=None,
+        **args,
     ):
         """Create a Molior object from lists of Topologic Faces and widgets."""
         """Faces can have a 'style' Dictionary attribute."""
         """Widgets are Topologic Vertices with a 'usage' Dictionary attribute."""
+        """With a cache_dir, a CellComplex is reused for identical input."""
+        timings = args.get("timings")
+        cache_path = None
+        if cache_dir:
+            cache_path = os.path.join(
+                cache_dir, cls.fingerprint_faces(faces, widgets, 0.0001) + ".json.gz"
+            )
+            with stage(timings, "read_cellcomplex"):
+                cellcomplex = cls.read_cellcomplex(cache_path)
+            if cellcomplex:
+                return cls.from_cellcomplex(
+                    file=file,
+                    cellcomplex=cellcomplex,
+                    name=name,
+                    share_dir=share_dir,
+                    **args,
+                )
+
         # Generate a Topologic CellComplex
-        cellcomplex = CellComplex.ByFaces(faces, 0.0001)
+        with stage(timings, "ByFaces"):
+            cellcomplex = CellComplex.ByFaces(faces, 0.0001)
 
         result = []
         cellcomplex.Faces(None, result)
         if result:
-            # Copy styles from Faces to the CellComplex
-            cellcomplex.ApplyDictionary(faces)
-            # Assign Cell usages from widgets
-            cellcomplex.AllocateCells(widgets)
+            with stage(timings, "ApplyDictionary"):
+                # Copy styles from Faces to the CellComplex
+                cellcomplex.ApplyDictionary(faces)
+                # Assign Cell usages from widgets
+                cellcomplex.AllocateCells(widgets)
+            if cache_path:
+                cls.write_cellcomplex(cache_path, cellcomplex)
             return cls.from_cellcomplex(
-                file=file, cellcomplex=cellcomplex, name=name, share_dir=share_dir
+                file=file,
+                cellcomplex=cellcomplex,
+                name=name,
+                share_dir=share_dir,
+                **args,
             )
 
         topology = Topology.ByFaces(faces, 0.0001)
@@ -89,28 +150,67 @@ class Molior:
             # Copy styles from Faces to the Topology
             topology.ApplyDictionary(faces)
             return cls.from_topology(
-                file=file, topology=topology, name=name, share_dir=share_dir
+                file=file, topology=topology, name=name, share_dir=share_dir, **args
             )
 
+    @classmethod
+    def fingerprint_faces(cls, faces, widgets, tolerance):
+        """A hash of Faces and widgets with their dictionaries"""
+        data = ["cellcomplex-1", tolerance]
+        for topology in faces + widgets:
+            vertices_ptr = []
+            topology.Vertices(None, vertices_ptr)
+            data.append(
+                [
+                    [[round(x, 6) for x in v.Coordinates()] for v in vertices_ptr],
+                    topology.DumpDictionary(),
+                ]
+            )
+        return cls.fingerprint(data)
+
+    @staticmethod
+    def read_cellcomplex(path):
+        """A CellComplex cached by write_cellcomplex(), or None"""
+        try:
+            with gzip.open(path, "rt") as cache_file:
+                return CellComplex.BySerialised(json.load(cache_file))
+        except (OSError, ValueError, KeyError, RuntimeError):
+            return None
+
+    @staticmethod
+    def write_cellcomplex(path, cellcomplex):
+        """Cache a CellComplex with all Cell and Face dictionaries"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        partial = path + "." + str(os.getpid())
+        with gzip.open(partial, "wt") as cache_file:
+            json.dump(cellcomplex.Serialise(), cache_file)
+        os.replace(partial, path)
+
     @classmethod
     def from_cellcomplex(
-        cls, file=None, cellcomplex=None, name="My Building", share_dir="share"
+        cls, file=None, cellcomplex=None, name="My Building", share_dir="share", **args
     ):
         """Create a Molior object from a tagged CellComplex"""
         """Faces in the CellComplex can have a 'style' Dictionary attribute."""
         """Cells in the CellComplex can have a 'usage' Dictionary attribute."""
+        timings = args.get("timings")
         # Give every Cell and Face an index number
-        cellcomplex.IndexTopology()
+        with stage(timings, "IndexTopology"):
+            cellcomplex.IndexTopology()
         # Generate a circulation Graph
-        circulation = cellcomplex.Adjacency()
-        circulation.Circulation(cellcomplex)
-        circulation.Separation(circulation.ShortestPathTable(), cellcomplex)
+        with stage(timings, "Circulation"):
+            circulation = cellcomplex.Adjacency()
+            circulation.Circulation(cellcomplex)
+        with stage(timings, "ShortestPathTable"):
+            circulation.Separation(circulation.ShortestPathTable(), cellcomplex)
 
         # Traces are 2D paths that define walls, extrusions and rooms
         # Hulls are 3D shells that define pitched roofs and soffits
         # Collect unique elevations and assign storey numbers
-        traces, normals, elevations = cellcomplex.GetTraces()
-        hulls = cellcomplex.GetHulls()
+        with stage(timings, "GetTraces"):
+            traces, normals, elevations = cellcomplex.GetTraces()
+        with stage(timings, "GetHulls"):
+            hulls = cellcomplex.GetHulls()
 
         return cls(
             file=file,
@@ -122,18 +222,23 @@ class Molior:
             normals=normals,
             cellcomplex=cellcomplex,
             share_dir=share_dir,
+            **args,
         )
 
     @classmethod
     def from_topology(
-        cls, file=None, topology=None, name="My Building", share_dir="share"
+        cls, file=None, topology=None, name="My Building", share_dir="share", **args
     ):
         """Create a Molior object from a tagged Topology"""
         """Faces in the CellComplex can have a 'style' Dictionary attribute."""
+        timings = args.get("timings")
         # Give every Cell and Face an index number
-        topology.IndexTopology()
-        traces, normals, elevations = topology.GetTraces()
-        hulls = topology.GetHulls()
+        with stage(timings, "IndexTopology"):
+            topology.IndexTopology()
+        with stage(timings, "GetTraces"):
+            traces, normals, elevations = topology.GetTraces()
+        with stage(timings, "GetHulls"):
+            hulls = topology.GetHulls()
 
         return cls(
             file=file,
@@ -143,57 +248,90 @@ class Molior:
             hulls=hulls,
             normals=normals,
             share_dir=share_dir,
+            **args,
         )
 
+    @staticmethod
+    def get_stashed_sketch(building):
+        """Tessellated faces and usage locations stored by stash_topology()"""
+        facesets = []
+        usages = []
+        if building.Representation:
+            for representation in building.Representation.Representations:
+                context = representation.ContextOfItems
+                if (
+                    context.is_a("IfcGeometricRepresentationSubContext")
+                    and context.ContextIdentifier == "Reference"
+                    and context.ContextType == "Model"
+                    and context.TargetView == "SKETCH_VIEW"
+                ):
+                    for item in representation.Items:
+                        if item.is_a("IfcPolygonalFaceSet"):
+                            facesets.append(
+                                [
+                                    item.StyledByItem[0].Name,
+                                    [
+                                        [round(x, 6) for x in v]
+                                        for v in item.Coordinates.CoordList
+                                    ],
+                                    [list(face.CoordIndex) for face in item.Faces],
+                                ]
+                            )
+
+        for rel in building.ContainsElements:
+            for element in rel.RelatedElements:
+                if element.is_a("IfcAnnotation") and element.ObjectType == "USAGE":
+                    matrix = ifcopenshell.util.placement.get_local_placement(
+                        element.ObjectPlacement
+                    )
+                    usages.append(
+                        [element.Name, [round(x, 6) for x in matrix[0:3, 3].tolist()]]
+                    )
+        return facesets, usages
+
     @classmethod
     def get_cellcomplex_from_ifc(cls, entity):
         """Retrieve a CellComplex definition stored by the stash_topology() method"""
         """Supply an IfcBuilding or any element or space within that building"""
         """A Topologic CellComplex or None will be returned"""
-        building = get_parent_building(entity)
+        building = entity
+        if not entity.is_a("IfcBuilding"):
+            building = get_parent_building(entity)
         if not building:
             return None
 
+        facesets, usages = cls.get_stashed_sketch(building)
+        stash = ifcopenshell.util.element.get_pset(building, "EPset_CellComplex")
+        if stash and stash.get("Hash") == cls.fingerprint([facesets, usages]):
+            try:
+                cellcomplex = CellComplex.BySerialised(
+                    json.loads(zlib.decompress(base64.b64decode(stash["Serialised"])))
+                )
+            except (ValueError, KeyError, TypeError, zlib.error, RuntimeError):
+                cellcomplex = None
+            if cellcomplex:
+                cellcomplex.Set("name", building.Name)
+                return cellcomplex
+
         faces_ptr = []
-        widgets = []
-        for representation in building.Representation.Representations:
-            context = representation.ContextOfItems
-            if (
-                context.is_a("IfcGeometricRepresentationSubContext")
-                and context.ContextIdentifier == "Reference"
-                and context.ContextType == "Model"
-                and context.TargetView == "SKETCH_VIEW"
-            ):
-                for item in representation.Items:
-                    if item.is_a("IfcPolygonalFaceSet"):
-                        stylename = item.StyledByItem[0].Name
-                        coordinates = item.Coordinates.CoordList
-                        vertices = [Vertex.ByCoordinates(*v) for v in coordinates]
-                        for face in item.Faces:
-                            indices = face.CoordIndex
-                            face_ptr = Face.ByVertices(
-                                [vertices[v - 1] for v in indices]
-                            )
-                            face_ptr.Set(
-                                "stylename",
-                                stylename,
-                            )
-                            faces_ptr.append(face_ptr)
+        for stylename, coordinates, faces in facesets:
+            vertices = [Vertex.ByCoordinates(*v) for v in coordinates]
+            for indices in faces:
+                face_ptr = Face.ByVertices([vertices[v - 1] for v in indices])
+                face_ptr.Set(
+                    "stylename",
+                    stylename,
+                )
+                faces_ptr.append(face_ptr)
 
-        for rel in building.ContainsElements:
-            for element in rel.RelatedElements:
-                if element.is_a("IfcAnnotation") and element.ObjectType == "USAGE":
-                    matrix = ifcopenshell.util.placement.get_local_placement(
-                        element.ObjectPlacement
-                    )
-                    vertex = Vertex.ByCoordinates(
-                        matrix[0][3], matrix[1][3], matrix[2][3]
-                    )
-                    vertex.Set(
-                        "usage",
-                        element.Name,
-                    )
-                    widgets.append(vertex)
+        widgets = []
+        for usage, coordinates in usages:
+            vertex = Vertex.ByCoordinates(*coordinates)
+            vertex.Set(
+                "usage",
+                usage,
+            )
+            widgets.append(vertex)
 
         if not faces_ptr:
             return None
@@ -216,9 +354,38 @@ class Molior:
         self.circulation = None
         self.cellcomplex = None
         self.share_dir = "share"
+        # reuse products from a previous build where the inputs are unchanged
+        self.incremental = False
+        # tag products with input fingerprints so a later build can be
+        # incremental, incremental builds are always tagged
+        self.tag_fingerprints = False
+        # create aggregation, containment and typing relationships in one go
+        self.bulk_relationships = True
+        # a Timings object to collect a report of where the time goes
+        self.timings = None
+        # stash an exact copy of the CellComplex with the topology, so it
+        # doesn't need rebuilding when regenerating, this makes files bigger
+        self.stash_cellcomplex = False
+        # an existing Style, so YAML data and libraries are only loaded once
+        self.style = None
+        # build with this many worker processes, partitioned by "storey" or "style"
+        self.processes = 1
+        self.partition_by = "storey"
+        # mitre Extrusions with a Tessellation instead of boolean clipping
+        self.analytic_mitres = False
+        # build profile, see PREVIEW: structural analysis model members,
+        # space boundaries, stashed topology and usage annotations, spaces
+        # for void cells, and connections between structural members
+        self.structural = True
+        self.boundaries = True
+        self.stash = True
+        self.void_spaces = True
+        self.structural_connections = True
         for arg in args:
             self.__dict__[arg] = args[arg]
-        Molior.style = Style({"share_dir": self.share_dir})
+        if self.style is None:
+            self.style = Style({"share_dir": self.share_dir})
+        Molior.style = self.style
 
     def init_building(self):
         """Create and relate Site, Building and Storey Spatial Element products, set as current building"""
@@ -227,8 +394,9 @@ class Molior:
         else:
             create_default_contexts(self.file)
         self.project = self.file.by_type("IfcProject")[0]
-        site = get_site_by_name(self.file, self.project, self.name)
-        self.building = get_building_by_name(self.file, site, self.name)
+        if self.building is None:
+            site = get_site_by_name(self.file, self.project, self.name)
+            self.building = get_building_by_name(self.file, site, self.name)
         self.structural_analysis_model = get_structural_analysis_model_by_name(
             self.file, self.building, self.name
         )
@@ -237,6 +405,60 @@ class Molior:
     def execute(self):
         """Iterate through 'traces' and 'hulls' and populate an ifc 'file' object"""
         self.init_building()
+        parallel = self.processes > 1 and self.cellcomplex and not self.incremental
+        # worker processes find their jobs by fingerprint
+        jobs = self.jobs(fingerprints=self.tagging() or parallel)
+
+        if self.incremental:
+            # products from the previous build, keyed by input fingerprint
+            existing = self.get_fingerprints()
+            if not existing:
+                self.remove_untagged()
+            wanted = [job[2] for job in jobs]
+            if self.cellcomplex and self.void_spaces:
+                cells_ptr = []
+                self.cellcomplex.Cells(None, cells_ptr)
+                wanted.extend(self.fingerprint_cell(cell) for cell in cells_ptr)
+            for fingerprint in wanted:
+                if existing.get(fingerprint):
+                    existing[fingerprint].pop()
+            stale = []
+            for groups in existing.values():
+                for products in groups:
+                    stale.extend(products)
+            self.remove_products(stale)
+            existing = self.get_fingerprints()
+        else:
+            existing = {}
+
+        if parallel:
+            self.execute_parallel(jobs)
+        else:
+            self.run_jobs(jobs, existing)
+
+        # use the topologic_core model to connect stuff
+        if self.cellcomplex:
+            if self.structural and self.structural_connections:
+                with stage(self.timings, "connect_structure", self.file):
+                    self.connect_structure()
+            with stage(self.timings, "connect_spaces", self.file):
+                self.connect_spaces()
+            with stage(self.timings, "connect_assemblies", self.file):
+                self.connect_assemblies()
+            if self.stash:
+                with stage(self.timings, "stash_topology", self.file):
+                    self.stash_topology()
+
+    def tagging(self):
+        """Whether products are tagged with the fingerprint of their inputs"""
+        return self.incremental or self.tag_fingerprints
+
+    def jobs(self, fingerprints=True):
+        """Every build_trace() and build_hull() call, with the fingerprint of its inputs
+
+        Fingerprints are None unless asked for, they are not free to calculate.
+        """
+        jobs = []
         for condition in self.traces:
             for elevation in self.traces[condition]:
                 for height in self.traces[condition][elevation]:
@@ -244,28 +466,372 @@ class Molior:
                         for chain in self.traces[condition][elevation][height][
                             stylename
                         ]:
-                            self.build_trace(
-                                stylename=stylename,
-                                condition=condition,
-                                elevation=elevation,
-                                height=height,
-                                chain=chain,
+                            jobs.append(
+                                [
+                                    self.build_trace,
+                                    {
+                                        "stylename": stylename,
+                                        "condition": condition,
+                                        "elevation": elevation,
+                                        "height": height,
+                                        "chain": chain,
+                                    },
+                                    (
+                                        self.fingerprint_trace(
+                                            stylename,
+                                            condition,
+                                            elevation,
+                                            height,
+                                            chain,
+                                        )
+                                        if fingerprints
+                                        else None
+                                    ),
+                                ]
                             )
         for condition in self.hulls:
             for stylename in self.hulls[condition]:
                 for hull in self.hulls[condition][stylename]:
-                    self.build_hull(
-                        stylename=stylename,
-                        condition=condition,
-                        hull=hull,
+                    jobs.append(
+                        [
+                            self.build_hull,
+                            {
+                                "stylename": stylename,
+                                "condition": condition,
+                                "hull": hull,
+                            },
+                            (
+                                self.fingerprint_hull(stylename, condition, hull)
+                                if fingerprints
+                                else None
+                            ),
+                        ]
                     )
+        return jobs
 
-        # use the topologic_core model to connect stuff
-        if self.cellcomplex:
-            self.connect_structure()
-            self.connect_spaces()
-            self.connect_assemblies()
-            self.stash_topology()
+    def run_jobs(self, jobs, existing):
+        """Build jobs in this process, skipping products that already exist"""
+        if self.bulk_relationships:
+            begin_bulk_relationships(self.file)
+        try:
+            for index, (method, kwargs, fingerprint) in enumerate(jobs):
+                step(self.timings, index, len(jobs))
+                if existing.get(fingerprint):
+                    existing[fingerprint].pop()
+                    continue
+                if not self.tagging():
+                    method(**kwargs)
+                    continue
+                first_id = self.file.get_max_id()
+                method(**kwargs)
+                self.add_fingerprint(fingerprint, self.products_since(first_id))
+            step(self.timings, len(jobs), len(jobs))
+            with stage(self.timings, "flush_bulk_relationships", self.file):
+                flush_bulk_relationships(self.file)
+        finally:
+            # a failed or cancelled build mustn't leave assignments queued
+            flush_bulk_relationships(self.file)
+
+    def partition(self, job):
+        """Jobs with the same partition are built in the same worker process"""
+        method, kwargs, fingerprint = job
+        if self.partition_by == "style":
+            return kwargs["stylename"]
+        if method == self.build_trace:
+            return kwargs["elevation"]
+        return "hull " + kwargs["stylename"]
+
+    def execute_parallel(self, jobs):
+        """Build partitions of the jobs in worker processes, and merge the results
+
+        Each worker starts with a copy of the file as it is now, rebuilds
+        the traces and hulls from a copy of the CellComplex, and builds the
+        jobs in its partition into a fragment. Fragments are merged in
+        order, so the result doesn't depend on which worker finishes first.
+        """
+        partitions = {}
+        for job in jobs:
+            partitions.setdefault(self.partition(job), []).append(job[2])
+
+        with tempfile.TemporaryDirectory() as folder:
+            skeleton = os.path.join(folder, "skeleton.ifc")
+            skeleton_max_id = self.file.get_max_id()
+            self.file.write(skeleton)
+            cellcomplex = os.path.join(folder, "cellcomplex.json.gz")
+            self.write_cellcomplex(cellcomplex, self.cellcomplex)
+
+            tasks = []
+            for index, selected in enumerate(partitions.values()):
+                tasks.append(
+                    {
+                        "skeleton": skeleton,
+                        "cellcomplex": cellcomplex,
+                        "fragment": os.path.join(folder, str(index) + ".ifc"),
+                        "fingerprints": selected,
+                        "building": self.building.id(),
+                        "name": self.name,
+                        "share_dir": Molior.style.share_dir,
+                        "profile": self.profile(),
+                        "bulk_relationships": self.bulk_relationships,
+                        "tag_fingerprints": self.tagging(),
+                        "timings": self.timings is not None,
+                    }
+                )
+
+            executor = ProcessPoolExecutor(
+                max_workers=min(self.processes, len(tasks)),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            try:
+                futures = [executor.submit(build_fragment, task) for task in tasks]
+                base = ifcopenshell.open(skeleton)
+                done = 0
+                step(self.timings, done, len(jobs))
+                for task, future in zip(tasks, futures):
+                    report = future.result()
+                    with stage(self.timings, "merge_fragment", self.file):
+                        merge_fragment(
+                            self.file,
+                            ifcopenshell.open(task["fragment"]),
+                            skeleton_max_id,
+                            base,
+                        )
+                    if self.timings is not None:
+                        self.timings.merge(report)
+                    done += len(task["fingerprints"])
+                    step(self.timings, done, len(jobs))
+            finally:
+                executor.shutdown(cancel_futures=True)
+
+    def profile(self):
+        """Build options that change what gets built, see PREVIEW"""
+        return {
+            "analytic_mitres": self.analytic_mitres,
+            "structural": self.structural,
+            "boundaries": self.boundaries,
+            "stash": self.stash,
+            "void_spaces": self.void_spaces,
+            "structural_connections": self.structural_connections,
+        }
+
+    @staticmethod
+    def fingerprint(data):
+        """A short hash of any json-able data"""
+        return hashlib.sha1(
+            json.dumps(data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    @staticmethod
+    def topology_data(topology):
+        """Dictionary and rounded vertex coordinates of a Topologic Face or Cell"""
+        if topology is None:
+            return None
+        vertices_ptr = []
+        topology.Vertices(None, vertices_ptr)
+        return [
+            topology.DumpDictionary(),
+            sorted(
+                [round(coor, 6) for coor in vertex.Coordinates()]
+                for vertex in vertices_ptr
+            ),
+        ]
+
+    @staticmethod
+    def coor_data(coor):
+        """Rounded coordinates, so they are the same after a round trip through Serialise()"""
+        if coor is None:
+            return None
+        return [round(float(value), 6) + 0.0 for value in coor]
+
+    def circulation_faces(self):
+        """Indices of Faces that have a Vertex in the circulation Graph, i.e. doors"""
+        if not hasattr(self, "_circulation_faces"):
+            self._circulation_faces = set()
+            if self.circulation:
+                vertices_ptr = []
+                self.circulation.Vertices(vertices_ptr)
+                for vertex in vertices_ptr:
+                    if vertex.Get("class") == "Face":
+                        self._circulation_faces.add(vertex.Get("index"))
+        return self._circulation_faces
+
+    def fingerprint_edge(self, data):
+        """Everything about a trace or hull edge that can change what gets built"""
+        face = data["face"]
+        return [
+            self.topology_data(face),
+            face.Get("index") in self.circulation_faces() if face else None,
+            self.topology_data(data["back_cell"]),
+            self.topology_data(data["front_cell"]),
+        ]
+
+    def fingerprint_trace(self, stylename, condition, elevation, height, chain):
+        """Fingerprint the inputs of build_trace()"""
+        edges = []
+        for node in chain.graph:
+            edges.append(
+                [
+                    self.coor_data(string_to_coor(node)),
+                    self.coor_data(string_to_coor(chain.graph[node][0])),
+                    self.fingerprint_edge(chain.graph[node][1]),
+                    [
+                        self.coor_data(
+                            self.normals[normal_set].get(
+                                "__".join(node.split("__")[0:2] + [str(elevation)])
+                            )
+                        )
+                        for normal_set in sorted(self.normals)
+                    ],
+                ]
+            )
+        return self.fingerprint(
+            [
+                "trace",
+                self.profile(),
+                Molior.style.get(stylename),
+                condition,
+                elevation,
+                height,
+                self.elevations.get(elevation),
+                edges,
+            ]
+        )
+
+    def fingerprint_hull(self, stylename, condition, hull):
+        """Fingerprint the inputs of build_hull()"""
+        return self.fingerprint(
+            [
+                "hull",
+                self.profile(),
+                Molior.style.get(stylename),
+                condition,
+                sorted(self.elevations.items()),
+                [
+                    [
+                        [self.coor_data(string_to_coor(node)) for node in face[0]],
+                        self.fingerprint_edge(face[1]),
+                    ]
+                    for face in hull.faces
+                ],
+            ]
+        )
+
+    def fingerprint_cell(self, cell):
+        """Fingerprint the inputs of a void space created by connect_spaces()"""
+        return self.fingerprint(
+            ["void-space", self.topology_data(cell), sorted(self.elevations.items())]
+        )
+
+    def products_since(self, entity_id):
+        """Products created after a given entity id"""
+        products = []
+        for new_id in range(entity_id + 1, self.file.get_max_id() + 1):
+            try:
+                entity = self.file.by_id(new_id)
+            except RuntimeError:
+                continue
+            if entity.is_a("IfcProduct"):
+                products.append(entity)
+        return products
+
+    def add_fingerprint(self, fingerprint, products):
+        """Tag products with the fingerprint of the inputs that created them"""
+        if not products:
+            return
+        pset = api.pset.add_pset(
+            self.file, product=products[0], name="EPset_Fingerprint"
+        )
+        api.pset.edit_pset(
+            self.file, pset=pset, properties={"Fingerprint": fingerprint}
+        )
+        pset.DefinesOccurrence[0].RelatedObjects = products
+
+    def get_fingerprints(self):
+        """Products in this building from a previous build, grouped by fingerprint"""
+        results = {}
+        for pset in self.file.by_type("IfcPropertySet"):
+            if not pset.Name == "EPset_Fingerprint":
+                continue
+            products = []
+            for rel in pset.DefinesOccurrence:
+                products.extend(rel.RelatedObjects)
+            if not [
+                product
+                for product in products
+                if get_parent_building(product) == self.building
+            ]:
+                continue
+            for prop in pset.HasProperties:
+                if prop.Name == "Fingerprint":
+                    fingerprint = prop.NominalValue.wrappedValue
+                    if fingerprint not in results:
+                        results[fingerprint] = []
+                    results[fingerprint].append(products)
+        return results
+
+    def remove_untagged(self):
+        """Delete everything built without fingerprints, but keep the Storeys"""
+        products = []
+        for storey in self.file.by_type("IfcBuildingStorey"):
+            if get_parent_building(storey) == self.building:
+                products.extend(ifcopenshell.util.element.get_decomposition(storey))
+        for rel in self.structural_analysis_model.IsGroupedBy:
+            products.extend(
+                item for item in rel.RelatedObjects if item.is_a("IfcStructuralItem")
+            )
+        delete_ifc_products_bulk(self.file, products)
+
+    def remove_products(self, products):
+        """Delete products, anything else they contain is moved up to the Storey"""
+        doomed = {product.id() for product in products}
+        for product in products:
+            if product.is_a("IfcSpace"):
+                # boundaries go back to how they were before connect_spaces()
+                for boundary in product.BoundedBy:
+                    if boundary.RelatedBuildingElement.id() not in doomed:
+                        self.detach_boundary(boundary)
+            children = []
+            for rel in getattr(product, "IsDecomposedBy", []):
+                children.extend(rel.RelatedObjects)
+            if product.is_a("IfcSpatialElement"):
+                for rel in product.ContainsElements:
+                    children.extend(rel.RelatedElements)
+            children = [child for child in children if child.id() not in doomed]
+            if not children:
+                continue
+            storey = product
+            while storey and not storey.is_a("IfcBuildingStorey"):
+                storey = ifcopenshell.util.element.get_container(
+                    storey
+                ) or ifcopenshell.util.element.get_aggregate(storey)
+            for child in children:
+                if child.is_a("IfcSpatialElement"):
+                    api.aggregate.assign_object(
+                        self.file, products=[child], relating_object=storey
+                    )
+                else:
+                    api.spatial.assign_container(
+                        self.file, products=[child], relating_structure=storey
+                    )
+        delete_ifc_products_bulk(self.file, products, recursive=False)
+
+    def detach_boundary(self, boundary):
+        """Reverse the attachment of a space boundary to a Space"""
+        storey_elevation = boundary.RelatingSpace.Decomposes[0].RelatingObject.Elevation
+        self.shift_boundary(boundary, storey_elevation)
+        boundary.RelatingSpace = None
+
+    def shift_boundary(self, boundary, height):
+        """Move a space boundary vertically, placements are shared so replace it"""
+        plane = boundary.ConnectionGeometry.SurfaceOnRelatingElement.BasisSurface
+        position = plane.Position
+        coor = position.Location.Coordinates
+        plane.Position = create_axis2_placement_3d(
+            self.file,
+            [coor[0], coor[1], coor[2] + height],
+            position.Axis.DirectionRatios if position.Axis else None,
+            position.RefDirection.DirectionRatios if position.RefDirection else None,
+        )
 
     def connect_structure(self):
         """Given Structural Member entities are tagged with Topologic indexes, connect them"""
@@ -273,29 +839,25 @@ class Molior:
             self.file, context_identifier="Reference", target_view="GRAPH_VIEW"
         )
 
+        # connections from a previous build are regenerated from scratch
+        connections = []
+        for rel in self.structural_analysis_model.IsGroupedBy:
+            connections.extend(
+                item
+                for item in rel.RelatedObjects
+                if item.is_a("IfcStructuralConnection")
+            )
+        delete_ifc_products_bulk(self.file, connections, recursive=False)
+
         structural_placement = self.file.createIfcLocalPlacement(
             None,
-            self.file.createIfcAxis2Placement3D(
-                self.file.createIfcCartesianPoint([0.0, 0.0, 0.0]),
-                self.file.createIfcDirection([0.0, 0.0, 1.0]),
-                self.file.createIfcDirection([1.0, 0.0, 0.0]),
+            create_axis2_placement_3d(
+                self.file, [0.0, 0.0, 0.0], [0.0, 0.0, 1.0], [1.0, 0.0, 0.0]
             ),
         )
 
-        style = api.style.add_style(self.file, name="Structural Surface Member")
-        api.style.add_surface_style(
-            self.file,
-            style=style,
-            ifc_class="IfcSurfaceStyleShading",
-            attributes={
-                "SurfaceColour": {
-                    "Name": None,
-                    "Red": 0.5,
-                    "Green": 0.5,
-                    "Blue": 0.0,
-                },
-                "Transparency": 0.95,
-            },
+        style = get_surface_style(
+            self.file, "Structural Surface Member", [0.5, 0.5, 0.0], 0.95
         )
 
         # lookup tables to connect members to face indices
@@ -309,11 +871,13 @@ class Molior:
                 )
                 if pset_topology:
                     surface_lookup[pset_topology["FaceIndex"]] = member
-            self.file.createIfcStyledItem(
-                member.Representation.Representations[0].Items[0],
-                [style],
-                "Structural Surface Member",
-            )
+                item = member.Representation.Representations[0].Items[0]
+                if not item.StyledByItem:
+                    self.file.createIfcStyledItem(
+                        item,
+                        [style],
+                        "Structural Surface Member",
+                    )
         for member in self.file.by_type("IfcStructuralCurveMember"):
             if get_parent_building(member) == self.building:
                 member.ObjectPlacement = structural_placement
@@ -346,16 +910,16 @@ class Molior:
                 structural_analysis_model=self.structural_analysis_model,
             )
             if abs(start[2] - end[2]) < 0.0001:
-                curve_connection.Axis = self.file.createIfcDirection([0.0, 0.0, 1.0])
+                curve_connection.Axis = create_direction(self.file, [0.0, 0.0, 1.0])
                 curve_connection.Name = "Horizontal connection"
             elif abs(start[0] - end[0]) < 0.0001 and abs(start[1] - end[1]) < 0.0001:
-                curve_connection.Axis = self.file.createIfcDirection([0.0, 1.0, 0.0])
+                curve_connection.Axis = create_direction(self.file, [0.0, 1.0, 0.0])
                 curve_connection.Name = "Vertical connection"
             else:
                 vec_1 = subtract_3d(end, start)
                 vec_2 = [vec_1[1], 0.0 - vec_1[0], 0.0]
-                curve_connection.Axis = self.file.createIfcDirection(
-                    x_product_3d(vec_1, vec_2)
+                curve_connection.Axis = create_direction(
+                    self.file, x_product_3d(vec_1, vec_2)
                 )
                 curve_connection.Name = "Inclined connection"
             api.geometry.assign_representation(
@@ -368,10 +932,10 @@ class Molior:
                     [
                         self.file.createIfcEdge(
                             self.file.createIfcVertexPoint(
-                                self.file.createIfcCartesianPoint(start)
+                                create_cartesian_point(self.file, start)
                             ),
                             self.file.createIfcVertexPoint(
-                                self.file.createIfcCartesianPoint(end)
+                                create_cartesian_point(self.file, end)
                             ),
                         )
                     ],
@@ -490,8 +1054,8 @@ class Molior:
                                     "Vertex",
                                     [
                                         self.file.createIfcVertexPoint(
-                                            self.file.createIfcCartesianPoint(
-                                                point_coordinates
+                                            create_cartesian_point(
+                                                self.file, point_coordinates
                                             )
                                         ),
                                     ],
@@ -537,13 +1101,26 @@ class Molior:
         body_context = get_context_by_name(self.file, context_identifier="Body")
 
         space_lookup = {}
+        void_lookup = {}
         for space in self.file.by_type("IfcSpace"):
             if get_parent_building(space) == self.building:
                 pset_topology = ifcopenshell.util.element.get_psets(space).get(
                     "EPset_Topology"
                 )
                 if pset_topology:
-                    space_lookup[pset_topology["CellIndex"]] = space
+                    if space.Name and space.Name.startswith("void-space/"):
+                        void_lookup[pset_topology["CellIndex"]] = space
+                    else:
+                        space_lookup[pset_topology["CellIndex"]] = space
+
+        # void spaces from a previous build may have been replaced by real spaces
+        self.remove_products(
+            [
+                void_lookup.pop(index)
+                for index in list(void_lookup)
+                if index in space_lookup
+            ]
+        )
 
         # create Space elements for Cells that don't already have one
         cells_ptr = []
@@ -552,7 +1129,9 @@ class Molior:
             topology_index = cell.Get("index")
             if topology_index is not None and topology_index in space_lookup:
                 continue
-            else:
+            elif topology_index is not None and topology_index in void_lookup:
+                space_lookup[topology_index] = void_lookup[topology_index]
+            elif self.void_spaces:
                 element = api.root.create_entity(
                     self.file,
                     ifc_class="IfcSpace",
@@ -577,21 +1156,7 @@ class Molior:
                     "Tessellation",
                     [create_tessellation_from_mesh(self.file, vertices_shifted, faces)],
                 )
-                style = api.style.add_style(self.file, name="Void Space")
-                api.style.add_surface_style(
-                    self.file,
-                    style=style,
-                    ifc_class="IfcSurfaceStyleShading",
-                    attributes={
-                        "SurfaceColour": {
-                            "Name": None,
-                            "Red": 0.5,
-                            "Green": 0.5,
-                            "Blue": 0.5,
-                        },
-                        "Transparency": 0.5,
-                    },
-                )
+                style = get_surface_style(self.file, "Void Space", [0.5, 0.5, 0.5], 0.5)
                 api.style.assign_representation_styles(
                     self.file,
                     shape_representation=shape,
@@ -607,6 +1172,8 @@ class Molior:
                     product=element,
                     matrix=matrix_align([0.0, 0.0, storey.Elevation], [1.0, 0.0, 0.0]),
                 )
+                if self.tagging():
+                    self.add_fingerprint(self.fingerprint_cell(cell), [element])
 
         # attach spaces to space boundaries
         for boundary in self.file.by_type("IfcRelSpaceBoundary2ndLevel"):
@@ -614,20 +1181,18 @@ class Molior:
                 if boundary.Description:
                     items = boundary.Description.split()
                     if len(items) == 2 and items[0] == "CellIndex":
-                        if items[1] in space_lookup:
+                        if (
+                            items[1] in space_lookup
+                            and boundary.RelatingSpace != space_lookup[items[1]]
+                        ):
+                            if boundary.RelatingSpace:
+                                self.detach_boundary(boundary)
                             boundary.RelatingSpace = space_lookup[items[1]]
                             # there ought to be a better way..
                             storey_elevation = boundary.RelatingSpace.Decomposes[
                                 0
                             ].RelatingObject.Elevation
-                            coor = (
-                                boundary.ConnectionGeometry.SurfaceOnRelatingElement.BasisSurface.Position.Location.Coordinates
-                            )
-                            boundary.ConnectionGeometry.SurfaceOnRelatingElement.BasisSurface.Position.Location.Coordinates = (
-                                coor[0],
-                                coor[1],
-                                coor[2] - storey_elevation,
-                            )
+                            self.shift_boundary(boundary, -storey_elevation)
                 for (
                     element_boundary
                 ) in boundary.RelatedBuildingElement.ProvidesBoundaries:
@@ -761,6 +1326,30 @@ class Molior:
             context_identifier="Reference",
             target_view="SKETCH_VIEW",
         )
+        footprint_context = get_context_by_name(
+            self.file,
+            parent_context_identifier="Model",
+            context_identifier="FootPrint",
+            target_view="PLAN_VIEW",
+        )
+
+        # replace anything stashed by a previous build
+        if self.building.Representation:
+            for representation in list(self.building.Representation.Representations):
+                if representation.ContextOfItems in (sketch_context, footprint_context):
+                    api.geometry.unassign_representation(
+                        self.file, product=self.building, representation=representation
+                    )
+                    api.geometry.remove_representation(
+                        self.file, representation=representation
+                    )
+        annotations = []
+        for rel in self.building.ContainsElements:
+            for element in rel.RelatedElements:
+                if element.is_a("IfcAnnotation") and element.ObjectType == "USAGE":
+                    annotations.append(element)
+        delete_ifc_products_bulk(self.file, annotations, recursive=False)
+
         api.geometry.assign_representation(
             self.file,
             product=self.building,
@@ -774,12 +1363,6 @@ class Molior:
             ),
         )
         # A FootPrint representation will have visualisation priority
-        footprint_context = get_context_by_name(
-            self.file,
-            parent_context_identifier="Model",
-            context_identifier="FootPrint",
-            target_view="PLAN_VIEW",
-        )
         paths = self.cellcomplex.FootPrint()
         if paths:
             polycurves = []
@@ -826,6 +1409,25 @@ class Molior:
                 relating_structure=self.building,
             )
 
+        if self.stash_cellcomplex:
+            self.stash_serialised()
+
+    def stash_serialised(self):
+        """Stash an exact copy of the CellComplex, see get_cellcomplex_from_ifc()"""
+        # valid only as long as the tessellation and annotations are unchanged
+        data = self.cellcomplex.Serialise(keys=["stylename", "usage", "badnormal"])
+        add_pset(
+            self.file,
+            self.building,
+            "EPset_CellComplex",
+            {
+                "Serialised": self.file.createIfcText(
+                    base64.b64encode(zlib.compress(json.dumps(data).encode())).decode()
+                ),
+                "Hash": self.fingerprint(list(self.get_stashed_sketch(self.building))),
+            },
+        )
+
     def build_trace(
         self,
         stylename="default",
@@ -876,6 +1478,9 @@ class Molior:
                     "style_openings": myconfig["openings"],
                     "style_families": myconfig["families"],
                     "style_object": Molior.style,
+                    "analytic_mitres": self.analytic_mitres,
+                    "structural": self.structural,
+                    "boundaries": self.boundaries,
                 }
                 vals.update(config)
                 modules = {
@@ -886,9 +1491,9 @@ class Molior:
                     "Wall": Wall,
                     "Repeat": Repeat,
                 }
-                part = modules[config["class"]](vals)
-
-                part.execute()
+                with stage(self.timings, config["class"], self.file, stylename):
+                    part = modules[config["class"]](vals)
+                    part.execute()
                 # results are only used by test suite
                 results.append(part)
         return results
@@ -913,12 +1518,54 @@ class Molior:
                     "hull": hull,
                     "style_families": myconfig["families"],
                     "style_object": Molior.style,
+                    "analytic_mitres": self.analytic_mitres,
+                    "structural": self.structural,
+                    "boundaries": self.boundaries,
                 }
                 vals.update(config)
                 modules = {"Shell": Shell, "Grillage": Grillage}
-                part = modules[config["class"]](vals)
-
-                part.execute()
+                with stage(self.timings, config["class"], self.file, stylename):
+                    part = modules[config["class"]](vals)
+                    part.execute()
                 # results are only used by test suite
                 results.append(part)
         return results
+
+
+def build_fragment(task):
+    """Build some of the jobs of a Molior.execute_parallel() in a worker process
+
+    Returns the report() of the Timings, or None.
+    """
+    file = ifcopenshell.open(task["skeleton"])
+    timings = Timings() if task["timings"] else None
+    molior_object = Molior.from_cellcomplex(
+        file=file,
+        cellcomplex=Molior.read_cellcomplex(task["cellcomplex"]),
+        name=task["name"],
+        share_dir=task["share_dir"],
+        building=file.by_id(task["building"]),
+        **task["profile"],
+        bulk_relationships=task["bulk_relationships"],
+        tag_fingerprints=task["tag_fingerprints"],
+        timings=timings,
+    )
+    molior_object.init_building()
+
+    # jobs with the same fingerprint have the same inputs, so are interchangeable
+    available = {}
+    for job in molior_object.jobs(fingerprints=True):
+        available.setdefault(job[2], []).append(job)
+    selected = []
+    for fingerprint in task["fingerprints"]:
+        if not available.get(fingerprint):
+            raise ValueError(
+                "CellComplex produced different jobs in worker process: " + fingerprint
+            )
+        selected.append(available[fingerprint].pop())
+    molior_object.run_jobs(selected, {})
+
+    file.write(task["fragment"])
+    if timings is None:
+        return None
+    return timings.report()
@@ -1,14 +1,17 @@
 from math import pi
+import numpy as np
 
 from .geometry import (
     add_2d,
     angle_2d,
-    distance_2d,
+    matrices_align,
+    normalise,
     normalise_2d,
-    points_2line,
+    rigid_inverse,
     scale_2d,
-    subtract_2d,
-    line_intersection,
+    segment_normals,
+    intersect_lines,
+    offset_path,
 )
 from .ifc import add_pset
 
@@ -18,6 +21,8 @@ class BaseClass:
 
     def __init__(self, args=None):
         args = args or {}
+        self.analytic_mitres = False
+        self.boundaries = True
         self.do_representation = True
         self.elevation = 0.0
         self.extension = 0.0
@@ -31,6 +36,7 @@ class BaseClass:
         self.parent_aggregate = None
         self.plot = "my plot"
         self.psets = {}
+        self.structural = True
         self.style = "default"
         self.file = None
         self.ifc = "IfcBuildingElementProxy"
@@ -54,9 +60,45 @@ class TraceClass(BaseClass):
             segments -= 1
         return segments
 
+    def path_cache(self):
+        """Arrays derived from the path, discarded if the path is replaced"""
+        if self.__dict__.get("_cached_path") is not self.path:
+            self._cached_path = self.path
+            self._segment_arrays = None
+            self._segment_matrices = None
+            self._corner_arrays = {}
+        return self.__dict__
+
+    def segment_arrays(self):
+        """Directions, right-hand normals and lengths of every segment
+
+        Calculated once for the whole path, segment N joins corner N to
+        N+1, wrapping around even if the path isn't closed.
+        """
+        cache = self.path_cache()
+        if cache["_segment_arrays"] is None:
+            path = np.asarray(self.path, dtype=float)[:, :2]
+            vectors = np.roll(path, -1, axis=0) - path
+            cache["_segment_arrays"] = (
+                normalise(vectors),
+                segment_normals(path),
+                np.linalg.norm(vectors, axis=1),
+            )
+        return cache["_segment_arrays"]
+
+    def segment_matrices(self):
+        """Transform matrices that map the X axis onto each segment, and their inverses"""
+        cache = self.path_cache()
+        if cache["_segment_matrices"] is None:
+            path = np.zeros((len(self.path), 3))
+            path[:, :2] = np.asarray(self.path, dtype=float)[:, :2]
+            forward = matrices_align(path, np.roll(path, -1, axis=0))
+            cache["_segment_matrices"] = (forward, rigid_inverse(forward))
+        return cache["_segment_matrices"]
+
     def length_segment(self, index):
         """Distance between vertices of this segment"""
-        return distance_2d(self.corner_coor(index), self.corner_coor(index + 1))
+        return float(self.segment_arrays()[2][index % len(self.path)])
 
     def angle_segment(self, index):
         """Angle of segment, degrees anticlockwise from 'east'"""
@@ -64,22 +106,15 @@ class TraceClass(BaseClass):
 
     def direction_segment(self, index):
         """Normalised 2D direction vector of segment"""
-        return normalise_2d(
-            subtract_2d(self.corner_coor(index + 1), self.corner_coor(index))
-        )
+        return self.segment_arrays()[0][index % len(self.path)].tolist()
 
     def normal_segment(self, index):
         """2D normal right-hand side"""
-        vector = self.direction_segment(index)
-        return [vector[1], 0 - vector[0]]
+        return self.segment_arrays()[1][index % len(self.path)].tolist()
 
     def corner_coor(self, index):
         """2D coordinates of a corner"""
-        while index >= len(self.path):
-            index -= len(self.path)
-        while index < 0:
-            index += len(self.path)
-        return self.path[index]
+        return self.path[index % len(self.path)]
 
     def clipping_plane(self, index):
         """A plane defined by x, y & z directions and a point on the plane"""
@@ -94,45 +129,36 @@ class TraceClass(BaseClass):
             [0.0, 0.0, 0.0, 1.0],
         ]
 
+    def corner_arrays(self, distance):
+        """2D coordinates of all corners offset by a distance, cached per distance"""
+        cache = self.path_cache()["_corner_arrays"]
+        if distance in cache:
+            return cache[distance]
+        corners = offset_path(self.path, distance, closed=self.closed)
+
+        # ends of open paths can have a stashed normal
+        if not self.closed and self.normal_set in self.normals:
+            normal_map = self.normals[self.normal_set]
+            directions, normals = self.segment_arrays()[0:2]
+            for index, segment in [[len(self.path) - 1, -2], [0, 0]]:
+                coor = self.corner_coor(index)
+                string = str(coor[0]) + "__" + str(coor[1]) + "__" + str(self.elevation)
+                if self.condition == "external" and string in normal_map:
+                    corner = intersect_lines(
+                        [np.add(coor, normals[segment] * distance)],
+                        [directions[segment]],
+                        [coor],
+                        [normal_map[string]],
+                    )[0]
+                    if not np.isnan(corner).any():
+                        corners[index] = corner
+
+        cache[distance] = corners
+        return corners
+
     def corner_offset(self, index, distance):
         """2D coordinates of a corner offset by an arbitrary distance"""
-        offset_a = scale_2d(distance, self.normal_segment(index - 1))
-        offset_b = scale_2d(distance, self.normal_segment(index))
-
-        # line equations of offset edges
-        line_a = points_2line(
-            add_2d(self.corner_coor(index - 1), offset_a),
-            add_2d(self.corner_coor(index), offset_a),
-        )
-        line_b = points_2line(
-            add_2d(self.corner_coor(index), offset_b),
-            add_2d(self.corner_coor(index + 1), offset_b),
-        )
-
-        # deal with ends of open paths
-        if not self.closed and index in (len(self.path) - 1, 0):
-            coor = self.corner_coor(index)
-            string = str(coor[0]) + "__" + str(coor[1]) + "__" + str(self.elevation)
-            if self.normal_set in self.normals:
-                normal_map = self.normals[self.normal_set]
-                if self.condition == "external" and string in normal_map:
-                    # we have a stashed normal for this corner
-                    line_mitre = points_2line(coor, add_2d(coor, normal_map[string]))
-                    if index == len(self.path) - 1:
-                        return line_intersection(line_a, line_mitre)
-                    if index == 0:
-                        return line_intersection(line_b, line_mitre)
-
-            if index == len(self.path) - 1:
-                return add_2d(self.corner_coor(index), offset_a)
-            if index == 0:
-                return add_2d(self.corner_coor(index), offset_b)
-
-        # deal with non-end corners
-        if abs(distance_2d([0.0, 0.0], subtract_2d(offset_a, offset_b))) < 0.0000000001:
-            return add_2d(self.corner_coor(index), offset_a)
-
-        return line_intersection(line_a, line_b)
+        return self.corner_arrays(distance)[index % len(self.path)].tolist()
 
     def corner_in(self, index):
         """offset inside corner"""
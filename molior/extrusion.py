@@ -1,19 +1,22 @@
 import numpy as np
 import ifcopenshell.api.root
-from ifcopenshell.util.placement import a2p
 
 from .baseclass import TraceClass
-from .geometry import (
-    normalise_3d,
-    subtract_3d,
-    magnitude_3d,
-)
+from .geometry import matrices_align, rigid_inverse, normalise, clip_prism
 from .ifc import (
+    assign_aggregate,
+    assign_type,
     add_face_topology_epsets,
     assign_storey_byindex,
     get_material_by_name,
     get_context_by_name,
     get_type_object,
+    create_cartesian_point,
+    create_direction,
+    create_tessellation_from_mesh,
+    get_profile_points,
+    get_shared_representation,
+    add_shared_representation,
 )
 
 api = ifcopenshell.api
@@ -79,40 +82,10 @@ class Extrusion(TraceClass):
                 product=path_aggregate,
             )
 
-        for id_segment in range(segments):
-            # create an element
-
-            linear_element = api.root.create_entity(
-                self.file,
-                ifc_class=self.ifc,
-                name=self.name,
-            )
-            api.type.assign_type(
-                self.file,
-                related_objects=[linear_element],
-                relating_type=type_product,
-            )
-            if segments > 1:
-                api.aggregate.assign_object(
-                    self.file,
-                    products=[linear_element],
-                    relating_object=path_aggregate,
-                )
-
-            # axis and matrix stuff
-
-            start_world = [
-                *self.corner_offset(id_segment, self.xshift),
-                self.elevation + self.height,
-            ]
-            end_world = [
-                *self.corner_offset(id_segment + 1, self.xshift),
-                self.elevation + self.height,
-            ]
-            vector = subtract_3d(end_world, start_world)
-            direction = normalise_3d(vector)
-            length = magnitude_3d(vector)
+        # extensions beyond the start and end of each segment
 
+        extensions = []
+        for id_segment in range(segments):
             start_extension = 0.0
             end_extension = 0.0
             if self.closed or id_segment > 0:
@@ -123,16 +96,48 @@ class Extrusion(TraceClass):
                 start_extension += self.extension
             if not self.closed and id_segment == segments - 1:
                 end_extension += self.extension
+            extensions.append([start_extension, end_extension])
+
+        # axis and matrix stuff for every segment
+
+        corners = np.zeros((len(self.path), 3))
+        corners[:, :2] = self.corner_arrays(self.xshift)
+        corners[:, 2] = self.elevation + self.height
+        starts = corners[:segments]
+        ends = np.roll(corners, -1, axis=0)[:segments]
+        lengths = np.linalg.norm(ends - starts, axis=1)
 
-            to_x_axis = [
-                [0.0, 0.0, -1.0, length + end_extension],
+        to_x_axis = np.tile(
+            [
+                [0.0, 0.0, -1.0, 0.0],
                 [-1.0, 0.0, 0.0, 0.0],
                 [0.0, 1.0, 0.0, 0.0],
                 [0.0, 0.0, 0.0, 1.0],
-            ]
-            placement = a2p(start_world, [0.0, 0.0, 1.0], direction)
-            matrix = placement @ to_x_axis
-            inverse = np.linalg.inv(matrix)
+            ],
+            (segments, 1, 1),
+        )
+        to_x_axis[:, 0, 3] = lengths + [end for start, end in extensions]
+        matrices = matrices_align(starts, ends) @ to_x_axis
+        inverses = rigid_inverse(matrices)
+
+        for id_segment in range(segments):
+            # create an element
+
+            linear_element = api.root.create_entity(
+                self.file,
+                ifc_class=self.ifc,
+                name=self.name,
+            )
+            assign_type(self.file, [linear_element], type_product)
+            if segments > 1:
+                assign_aggregate(self.file, [linear_element], path_aggregate)
+
+            start_world = starts[id_segment].tolist()
+            end_world = ends[id_segment].tolist()
+            length = float(lengths[id_segment])
+            start_extension, end_extension = extensions[id_segment]
+            matrix = matrices[id_segment]
+            inverse = inverses[id_segment]
 
             # clip ends
 
@@ -197,20 +202,50 @@ class Extrusion(TraceClass):
                     profile_set = association.RelatingMaterial
                     material_profiles = association.RelatingMaterial.MaterialProfiles
 
-            shape_representation = api.geometry.add_profile_representation(
-                self.file,
-                context=body_context,
-                profile=material_profiles[0].Profile,
-                depth=length + start_extension + end_extension,
-                clippings=clippings,
+            # identical extrusions, such as the infill between repeated
+            # items, share a single representation map
+
+            depth = length + start_extension + end_extension
+            key = [
+                "Extrusion",
+                material_profiles[0].Profile.id(),
+                depth,
+                [clipping["matrix"] for clipping in clippings],
+                self.ref_direction,
+                self.analytic_mitres,
+            ]
+            shape_representation = get_shared_representation(
+                self.file, body_context, key
             )
+            solid = None
+            if shape_representation is None and self.analytic_mitres and clippings:
+                solid = self.mitred_solid(
+                    material_profiles[0].Profile, depth, clippings
+                )
+            if solid is not None:
+                shape_representation = self.file.createIfcShapeRepresentation(
+                    body_context,
+                    body_context.ContextIdentifier,
+                    "Tessellation",
+                    [solid],
+                )
+                add_shared_representation(self.file, shape_representation, key)
+            elif shape_representation is None:
+                shape_representation = api.geometry.add_profile_representation(
+                    self.file,
+                    context=body_context,
+                    profile=material_profiles[0].Profile,
+                    depth=depth,
+                    clippings=clippings,
+                )
 
-            # rotate extrusion profile on axis
+                # rotate extrusion profile on axis
 
-            if self.ref_direction:
-                shape_representation.Items[0].Position.RefDirection = (
-                    self.file.createIfcDirection(self.ref_direction)
-                )
+                if self.ref_direction:
+                    shape_representation.Items[0].Position.RefDirection = (
+                        create_direction(self.file, self.ref_direction)
+                    )
+                add_shared_representation(self.file, shape_representation, key)
 
             api.geometry.assign_representation(
                 self.file,
@@ -247,10 +282,14 @@ class Extrusion(TraceClass):
             # structural stuff
 
             if (
-                linear_element.is_a("IfcBeam")
-                or linear_element.is_a("IfcFooting")
-                or linear_element.is_a("IfcMember")
-            ) and hasattr(self, "chain"):
+                (
+                    linear_element.is_a("IfcBeam")
+                    or linear_element.is_a("IfcFooting")
+                    or linear_element.is_a("IfcMember")
+                )
+                and hasattr(self, "chain")
+                and self.structural
+            ):
                 # TODO skip unless Pset_MemberCommon.LoadBearing
                 # generate structural edges
                 structural_member = api.root.create_entity(
@@ -272,7 +311,7 @@ class Extrusion(TraceClass):
                 add_face_topology_epsets(
                     self.file, structural_member, face, back_cell, front_cell
                 )
-                structural_member.Axis = self.file.createIfcDirection([0.0, 0.0, 1.0])
+                structural_member.Axis = create_direction(self.file, [0.0, 0.0, 1.0])
                 api.structural.assign_structural_analysis_model(
                     self.file,
                     products=[structural_member],
@@ -288,10 +327,10 @@ class Extrusion(TraceClass):
                         [
                             self.file.createIfcEdge(
                                 self.file.createIfcVertexPoint(
-                                    self.file.createIfcCartesianPoint(start_world)
+                                    create_cartesian_point(self.file, start_world)
                                 ),
                                 self.file.createIfcVertexPoint(
-                                    self.file.createIfcCartesianPoint(end_world)
+                                    create_cartesian_point(self.file, end_world)
                                 ),
                             )
                         ],
@@ -330,12 +369,33 @@ class Extrusion(TraceClass):
         else:
             top_object = linear_element
         if self.parent_aggregate is not None:
-            api.aggregate.assign_object(
-                self.file,
-                products=[top_object],
-                relating_object=self.parent_aggregate,
-            )
+            assign_aggregate(self.file, [top_object], self.parent_aggregate)
         else:
             assign_storey_byindex(self.file, top_object, self.building, self.level)
 
         return top_object
+
+    def mitred_solid(self, profile, depth, clippings):
+        """A Tessellation of the profile extruded with the ends cut by the
+        clipping planes, None if this can't be done without a boolean"""
+        points = get_profile_points(profile)
+        if points is None:
+            return None
+
+        # profile is rotated on the axis by ref_direction
+        points = np.array(points)
+        axis = np.array([1.0, 0.0])
+        if self.ref_direction:
+            axis = normalise(self.ref_direction[0:2])
+        points = np.outer(points[:, 0], axis) + np.outer(
+            points[:, 1], [0.0 - axis[1], axis[0]]
+        )
+
+        planes = [
+            [np.array(clipping["matrix"])[:3, 3], np.array(clipping["matrix"])[:3, 2]]
+            for clipping in clippings
+        ]
+        mesh = clip_prism(points, depth, planes)
+        if mesh is None:
+            return None
+        return create_tessellation_from_mesh(self.file, mesh[0].tolist(), mesh[1])
@@ -4,6 +4,7 @@ import ifcopenshell.api.root
 from .baseclass import TraceClass
 from .geometry import matrix_align
 from .ifc import (
+    assign_type,
     add_pset,
     add_cell_topology_epsets,
     create_closed_profile_from_points,
@@ -95,11 +96,7 @@ class Floor(TraceClass):
             stylename=self.style,
             name=self.typename,
         )
-        api.type.assign_type(
-            self.file,
-            related_objects=[element],
-            relating_type=type_product,
-        )
+        assign_type(self.file, [element], type_product)
 
         thickness = get_thickness(self.file, type_product)
 
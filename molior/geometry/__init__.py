@@ -17,29 +17,152 @@ def matrix_transform(theta, coor):
     )
 
 
+# Batched kernel, these take and return (N, 2) or (N, 3) arrays
+
+
+def normalise(vectors):
+    """Normalise a vector or an array of vectors, zero length becomes the X axis"""
+    vectors = np.asarray(vectors, dtype=float)
+    lengths = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    result = np.zeros_like(vectors)
+    result[..., 0] = 1.0
+    np.divide(vectors, lengths, out=result, where=lengths != 0.0)
+    return result
+
+
+def matrices_align(A, B):
+    """A stack of matrix_align() transform matrices, one for each pair of 3D points"""
+    A = np.asarray(A, dtype=float).reshape(-1, 3)
+    v = normalise(np.asarray(B, dtype=float).reshape(-1, 3)[:, :2] - A[:, :2])
+    matrices = np.zeros((len(A), 4, 4))
+    matrices[:, 0, 0] = v[:, 0]
+    matrices[:, 0, 1] = 0.0 - v[:, 1]
+    matrices[:, 1, 0] = v[:, 1]
+    matrices[:, 1, 1] = v[:, 0]
+    matrices[:, :3, 3] = A
+    matrices[:, 2, 2] = 1.0
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def rigid_inverse(matrices):
+    """Inverse of a 4x4 rotation and translation matrix, or a stack of them"""
+    matrices = np.asarray(matrices, dtype=float)
+    rotations = np.swapaxes(matrices[..., :3, :3], -1, -2)
+    inverses = np.zeros_like(matrices)
+    inverses[..., :3, :3] = rotations
+    inverses[..., :3, 3] = -np.einsum(
+        "...ij,...j->...i", rotations, matrices[..., :3, 3]
+    )
+    inverses[..., 3, 3] = 1.0
+    return inverses
+
+
+def transform_points(matrix, points):
+    """Transform an array of 2d or 3d points using a 4x4 matrix"""
+    points = np.asarray(points, dtype=float)
+    size = points.shape[1]
+    homogeneous = np.zeros((len(points), 4))
+    homogeneous[:, :size] = points
+    homogeneous[:, 3] = 1.0
+    return (homogeneous @ np.asarray(matrix, dtype=float).T)[:, :size]
+
+
+def segment_normals(path):
+    """2D right-hand normals of each segment of a closed path, segment N joins corner N to N+1"""
+    path = np.asarray(path, dtype=float)[:, :2]
+    directions = normalise(np.roll(path, -1, axis=0) - path)
+    return np.stack([directions[:, 1], 0.0 - directions[:, 0]], axis=1)
+
+
+def intersect_lines(points_a, vectors_a, points_b, vectors_b):
+    """Intersections of pairs of 2D lines given as points and vectors, NaN if parallel"""
+    points_a = np.asarray(points_a, dtype=float)
+    vectors_a = np.asarray(vectors_a, dtype=float)
+    vectors_b = np.asarray(vectors_b, dtype=float)
+    shift = np.asarray(points_b, dtype=float) - points_a
+    cross = vectors_a[:, 0] * vectors_b[:, 1] - vectors_a[:, 1] * vectors_b[:, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (shift[:, 0] * vectors_b[:, 1] - shift[:, 1] * vectors_b[:, 0]) / cross
+    t[np.abs(cross) < 1e-12] = np.nan
+    return points_a + vectors_a * t[:, np.newaxis]
+
+
+def offset_path(path, distance, closed=True):
+    """Corners of a 2D path offset to the right-hand side, with mitred corners
+
+    Straight-through corners are offset square to the path, as are the ends
+    of an open path.
+    """
+    path = np.asarray(path, dtype=float)[:, :2]
+    normals = segment_normals(path)
+    offset_a = np.roll(normals, 1, axis=0) * distance
+    offset_b = normals * distance
+    corners = intersect_lines(
+        path + offset_a,
+        path - np.roll(path, 1, axis=0),
+        path + offset_b,
+        np.roll(path, -1, axis=0) - path,
+    )
+    square = np.linalg.norm(offset_a - offset_b, axis=1) < 0.0000000001
+    square |= np.isnan(corners).any(axis=1)
+    corners[square] = path[square] + offset_a[square]
+    if not closed:
+        corners[0] = path[0] + offset_b[0]
+        corners[-1] = path[-1] + offset_a[-1]
+    return corners
+
+
+def clip_prism(profile, depth, planes):
+    """Vertices and faces of a 2D profile extruded along Z, with the ends cut by planes
+
+    Each plane is a location and a normal, the side the normal points to is
+    removed. None if a plane doesn't cut cleanly across every edge of the
+    extrusion, or if more than one plane cuts the same end.
+    """
+    profile = np.asarray(profile, dtype=float)[:, :2]
+    x, y = profile[:, 0], profile[:, 1]
+    if np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)) < 0.0:
+        profile = profile[::-1]
+    size = len(profile)
+    ends = [np.zeros(size), np.full(size, float(depth))]
+    cut = [False, False]
+    for location, normal in planes:
+        location = np.asarray(location, dtype=float)
+        normal = np.asarray(normal, dtype=float)
+        if abs(normal[2]) < 1e-9:
+            return None
+        t = (np.dot(location, normal) - profile @ normal[:2]) / normal[2]
+        end = 1 if normal[2] > 0.0 else 0
+        if cut[end] or t.min() <= 0.0 or t.max() >= depth:
+            return None
+        ends[end] = t
+        cut[end] = True
+    if (ends[1] - ends[0]).min() <= 0.0:
+        return None
+
+    vertices = np.concatenate(
+        [np.column_stack([profile, ends[0]]), np.column_stack([profile, ends[1]])]
+    )
+    faces = [list(reversed(range(size))), list(range(size, 2 * size))]
+    for index in range(size):
+        following = (index + 1) % size
+        faces.append([index, following, following + size, index + size])
+    return vertices, faces
+
+
+# Scalar functions, these take and return lists
+
+
 def matrix_align(A, B):
     """A transform matrix that moves to A and 2D rotates to align the X axis to B"""
-    v = normalise_2d(subtract_2d(B, A))
-    return np.array(
-        [
-            [v[0], 0 - v[1], 0.0, A[0]],
-            [v[1], v[0], 0.0, A[1]],
-            [0.0, 0.0, 1.0, A[2]],
-            [0.0, 0.0, 0.0, 1.0],
-        ]
-    )
+    return matrices_align(A, B)[0]
 
 
 def transform(matrix, A):
     """Transform a 2d or 3d vector using a 4x4 matrix"""
-    if len(A) == 3:
-        vertex = np.array([[*A, 1.0]]).T
-        result = matrix @ vertex
-        return result.T.tolist()[0][:3]
-    elif len(A) == 2:
-        vertex = np.array([[*A, 0.0, 1.0]]).T
-        result = matrix @ vertex
-        return result.T.tolist()[0][:2]
+    if len(A) in (2, 3):
+        return transform_points(matrix, [A])[0].tolist()
 
 
 def map_to_2d(vertices, normal_vector):
@@ -124,7 +247,7 @@ def map_to_2d_simple(vertices, normal):
     xvector = normalise_3d(subtract_3d(vertices[1], vertices[0]))
     matrix = a2p(vertices[0], normal, xvector)
     inverse = np.linalg.inv(matrix)
-    nodes_2d = [transform(inverse, node3d)[0:2] for node3d in vertices]
+    nodes_2d = transform_points(inverse, vertices)[:, :2].tolist()
     return nodes_2d, matrix
 
 
@@ -174,10 +297,7 @@ def line_intersection(line_0, line_1):
 
 
 def normalise_2d(A):
-    A = np.array(A[:2])
-    length = np.linalg.norm(A)
-    result = np.array([1.0, 0.0]) if length == 0.0 else A / length
-    return result.tolist()
+    return normalise(A[:2]).tolist()
 
 
 def points_2line(A, B):
@@ -203,8 +323,7 @@ def subtract_2d(A, B):
 
 
 def x_product_3d(A, B):
-    result = np.cross(np.array(A), np.array(B))
-    return normalise_3d(result.tolist())
+    return normalise(np.cross(np.array(A), np.array(B))).tolist()
 
 
 def dot_product_3d(A, B):
@@ -212,10 +331,7 @@ def dot_product_3d(A, B):
 
 
 def normalise_3d(A):
-    A = np.array(A)
-    magnitude = np.linalg.norm(A)
-    result = np.array([1.0, 0.0, 0.0]) if magnitude == 0.0 else A / magnitude
-    return result.tolist()
+    return normalise(A).tolist()
 
 
 def magnitude_3d(A):
@@ -7,6 +7,7 @@ from topologic_core import Face, Vertex
 from .baseclass import BaseClass
 from .geometry import map_to_2d, add_2d, scale_2d, subtract_3d, inset_path
 from .ifc import (
+    assign_aggregate,
     add_face_topology_epsets,
     create_face_surface,
     assign_storey_byindex,
@@ -97,11 +98,7 @@ class Grillage(BaseClass):
                 ifc_class=self.ifc,
                 name=self.name,
             )
-            api.aggregate.assign_object(
-                self.file,
-                products=[face_aggregate],
-                relating_object=aggregate,
-            )
+            assign_aggregate(self.file, [face_aggregate], aggregate)
             add_face_topology_epsets(
                 self.file,
                 face_aggregate,
@@ -121,51 +118,52 @@ class Grillage(BaseClass):
 
             # FIXME should generate Structural Curve Member for each extrusion
             # generate structural surfaces
-            structural_surface = api.root.create_entity(
-                self.file,
-                ifc_class="IfcStructuralSurfaceMember",
-                name=self.style + self.name,
-                predefined_type="SHELL",
-            )
-            add_face_topology_epsets(
-                self.file,
-                structural_surface,
-                face[1]["face"],
-                face[1]["back_cell"],
-                face[1]["front_cell"],
-            )
-            structural_surface.Thickness = 0.2
-            api.structural.assign_structural_analysis_model(
-                self.file,
-                products=[structural_surface],
-                structural_analysis_model=self.structural_analysis_model,
-            )
-            api.geometry.assign_representation(
-                self.file,
-                product=structural_surface,
-                representation=self.file.createIfcTopologyRepresentation(
-                    reference_context,
-                    reference_context.ContextIdentifier,
-                    "Face",
-                    [face_surface],
-                ),
-            )
-            api.material.assign_material(
-                self.file,
-                products=[structural_surface],
-                material=get_material_by_name(
+            if self.structural:
+                structural_surface = api.root.create_entity(
                     self.file,
-                    self.style_object,
-                    name=self.structural_material,
-                    stylename=self.style,
-                ),
-            )
-
-            assignment = api.root.create_entity(
-                self.file, ifc_class="IfcRelAssignsToProduct"
-            )
-            assignment.RelatingProduct = structural_surface
-            assignment.RelatedObjects = [face_aggregate]
+                    ifc_class="IfcStructuralSurfaceMember",
+                    name=self.style + self.name,
+                    predefined_type="SHELL",
+                )
+                add_face_topology_epsets(
+                    self.file,
+                    structural_surface,
+                    face[1]["face"],
+                    face[1]["back_cell"],
+                    face[1]["front_cell"],
+                )
+                structural_surface.Thickness = 0.2
+                api.structural.assign_structural_analysis_model(
+                    self.file,
+                    products=[structural_surface],
+                    structural_analysis_model=self.structural_analysis_model,
+                )
+                api.geometry.assign_representation(
+                    self.file,
+                    product=structural_surface,
+                    representation=self.file.createIfcTopologyRepresentation(
+                        reference_context,
+                        reference_context.ContextIdentifier,
+                        "Face",
+                        [face_surface],
+                    ),
+                )
+                api.material.assign_material(
+                    self.file,
+                    products=[structural_surface],
+                    material=get_material_by_name(
+                        self.file,
+                        self.style_object,
+                        name=self.structural_material,
+                        stylename=self.style,
+                    ),
+                )
+
+                assignment = api.root.create_entity(
+                    self.file, ifc_class="IfcRelAssignsToProduct"
+                )
+                assignment.RelatingProduct = structural_surface
+                assignment.RelatedObjects = [face_aggregate]
 
             # generate repeating grillage elements
 
@@ -214,6 +212,9 @@ class Grillage(BaseClass):
                                 "hull": myhull[0],
                                 "style_families": self.style_families,
                                 "style_object": self.style_object,
+                                "analytic_mitres": self.analytic_mitres,
+                                "structural": self.structural,
+                                "boundaries": self.boundaries,
                             }
                             vals.update(config)
                             part = getattr(self, config["class"])(vals)
@@ -267,6 +268,9 @@ class Grillage(BaseClass):
                                 "level": self.level,
                                 "style_families": self.style_families,
                                 "style_object": self.style_object,
+                                "analytic_mitres": self.analytic_mitres,
+                                "structural": self.structural,
+                                "boundaries": self.boundaries,
                             }
                             vals.update(config)
                             part = getattr(self, config["class"])(vals)
@@ -283,10 +287,6 @@ class Grillage(BaseClass):
         if elevation in self.elevations:
             level = self.elevations[elevation]
         if self.parent_aggregate is not None:
-            api.aggregate.assign_object(
-                self.file,
-                products=[aggregate],
-                relating_object=self.parent_aggregate,
-            )
+            assign_aggregate(self.file, [aggregate], self.parent_aggregate)
         else:
             assign_storey_byindex(self.file, aggregate, self.building, level)
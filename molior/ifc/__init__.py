@@ -18,7 +18,10 @@ import ifcopenshell.api.pset
 import ifcopenshell.api.root
 import ifcopenshell.api.structural
 import ifcopenshell.api.style
+import ifcopenshell.api.type
 import ifcopenshell.api.unit
+import ifcopenshell.guid
+import ifcopenshell.util.placement
 import ifcopenshell.util.system
 from ..geometry import (
     matrix_align,
@@ -54,6 +57,36 @@ def _register_library_file(
         _library_file_registry[project_file].append(library_file)
 
 
+# Registry of body representations that can be shared between products
+# Maps project IFC files to {key: [representation id, representation map id]}
+_shared_representation_registry: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+# Registry of interned geometry entities, points, directions and placements
+# Maps project IFC files to {(ifc class, quantised attributes): entity id}
+_geometry_pool_registry: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+# Registry of simple shaded surface styles
+# Maps project IFC files to {(name, colour name, rgb, transparency): style id}
+_surface_style_registry: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+# Registry of relationships waiting to be created in bulk
+# Maps project IFC files to {"spatial": {product id: [rel class, parent id]},
+# "type": {type id: [product ids]}}
+_relationship_queue_registry: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _quantise(value: Any) -> Any:
+    """Hashable copy of nested lists of coordinates, rounded to 6 places"""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(_quantise(item) for item in value)
+    if isinstance(value, (float, np.floating)):
+        return round(float(value), 6) + 0.0
+    return value
+
+
 def init(
     name: str = "Homemaker Project", file: Optional[ifcopenshell.file] = None
 ) -> ifcopenshell.file:
@@ -202,22 +235,32 @@ def create_storeys(
                 and storey.Decomposes
                 and storey.Decomposes[0].RelatingObject == parent
             ):
-                continue
-        mystorey = api.root.create_entity(
-            self,
-            ifc_class="IfcBuildingStorey",
-            name=str(elevations[elevation]),
-        )
-        mystorey.Elevation = elevation
-        mystorey.Description = "Storey " + mystorey.Name
-        mystorey.LongName = mystorey.Description
-        mystorey.CompositionType = "ELEMENT"
-        api.aggregate.assign_object(self, products=[mystorey], relating_object=parent)
-        api.geometry.edit_object_placement(
-            self,
-            product=mystorey,
-            matrix=matrix_align([0.0, 0.0, elevation], [1.0, 0.0, 0.0]),
-        )
+                if storey.Elevation != elevation:
+                    storey.Elevation = elevation
+                    api.geometry.edit_object_placement(
+                        self,
+                        product=storey,
+                        matrix=matrix_align([0.0, 0.0, elevation], [1.0, 0.0, 0.0]),
+                    )
+                break
+        else:
+            mystorey = api.root.create_entity(
+                self,
+                ifc_class="IfcBuildingStorey",
+                name=str(elevations[elevation]),
+            )
+            mystorey.Elevation = elevation
+            mystorey.Description = "Storey " + mystorey.Name
+            mystorey.LongName = mystorey.Description
+            mystorey.CompositionType = "ELEMENT"
+            api.aggregate.assign_object(
+                self, products=[mystorey], relating_object=parent
+            )
+            api.geometry.edit_object_placement(
+                self,
+                product=mystorey,
+                matrix=matrix_align([0.0, 0.0, elevation], [1.0, 0.0, 0.0]),
+            )
 
 
 def get_context_by_name(
@@ -534,6 +577,105 @@ def get_thickness(
     return thickness
 
 
+def _pooled(
+    self: ifcopenshell.file, key: Any
+) -> Optional[ifcopenshell.entity_instance]:
+    """Retrieve an interned entity, if it still exists"""
+    pool = _geometry_pool_registry.get(self)
+    if pool is None or key not in pool:
+        return None
+    try:
+        entity = self.by_id(pool[key])
+    except RuntimeError:
+        entity = None
+    if entity is None or not entity.is_a(key[0]):
+        del pool[key]
+        return None
+    return entity
+
+
+def _add_pooled(
+    self: ifcopenshell.file, key: Any, entity: ifcopenshell.entity_instance
+) -> ifcopenshell.entity_instance:
+    """Intern an entity for reuse"""
+    if self not in _geometry_pool_registry:
+        _geometry_pool_registry[self] = {}
+    _geometry_pool_registry[self][key] = entity.id()
+    return entity
+
+
+def create_cartesian_point(
+    self: ifcopenshell.file, coordinates: List[float]
+) -> ifcopenshell.entity_instance:
+    """An IfcCartesianPoint shared with any other point at the same location.
+
+    Interned entities are shared, so they must be replaced rather than
+    edited in place.
+
+    Args:
+        self: The IFC file.
+        coordinates: 2D or 3D coordinates.
+
+    Returns:
+        An IfcCartesianPoint entity.
+    """
+    key = ("IfcCartesianPoint", _quantise([float(value) for value in coordinates]))
+    return _pooled(self, key) or _add_pooled(
+        self, key, self.createIfcCartesianPoint([float(value) for value in coordinates])
+    )
+
+
+def create_direction(
+    self: ifcopenshell.file, ratios: List[float]
+) -> ifcopenshell.entity_instance:
+    """An IfcDirection shared with any other identical direction.
+
+    Args:
+        self: The IFC file.
+        ratios: 2D or 3D direction ratios.
+
+    Returns:
+        An IfcDirection entity.
+    """
+    key = ("IfcDirection", _quantise([float(value) for value in ratios]))
+    return _pooled(self, key) or _add_pooled(
+        self, key, self.createIfcDirection([float(value) for value in ratios])
+    )
+
+
+def create_axis2_placement_3d(
+    self: ifcopenshell.file,
+    location: List[float] = [0.0, 0.0, 0.0],
+    axis: Optional[List[float]] = None,
+    ref_direction: Optional[List[float]] = None,
+) -> ifcopenshell.entity_instance:
+    """An IfcAxis2Placement3D shared with any other identical placement.
+
+    Args:
+        self: The IFC file.
+        location: The origin, defaults to (0, 0, 0).
+        axis: Optional Z axis direction.
+        ref_direction: Optional X axis direction.
+
+    Returns:
+        An IfcAxis2Placement3D entity.
+    """
+    point = create_cartesian_point(self, location)
+    axis = create_direction(self, axis) if axis is not None else None
+    ref_direction = (
+        create_direction(self, ref_direction) if ref_direction is not None else None
+    )
+    key = (
+        "IfcAxis2Placement3D",
+        point.id(),
+        axis.id() if axis else None,
+        ref_direction.id() if ref_direction else None,
+    )
+    return _pooled(self, key) or _add_pooled(
+        self, key, self.createIfcAxis2Placement3D(point, axis, ref_direction)
+    )
+
+
 def create_closed_profile_from_points(
     self: ifcopenshell.file, points: List[List[float]]
 ) -> ifcopenshell.entity_instance:
@@ -555,11 +697,73 @@ def create_closed_profile_from_points(
         "AREA",
         None,
         self.createIfcPolyline(
-            [self.createIfcCartesianPoint(point) for point in points]
+            [create_cartesian_point(self, point) for point in points]
         ),
     )
 
 
+def get_profile_points(
+    profile: ifcopenshell.entity_instance,
+) -> Optional[List[List[float]]]:
+    """The outline of a profile as a list of 2D points.
+
+    Args:
+        profile: An IfcRectangleProfileDef, or an IfcArbitraryClosedProfileDef
+            bounded by straight segments.
+
+    Returns:
+        A list of 2D points without a closing duplicate, or None if the
+        profile has curves, voids or isn't a simple polygon.
+    """
+    if profile.is_a("IfcRectangleProfileDef") and not profile.is_a(
+        "IfcRoundedRectangleProfileDef"
+    ):
+        x = profile.XDim / 2
+        y = profile.YDim / 2
+        points = np.array([[-x, -y], [x, -y], [x, y], [-x, y]])
+        if profile.Position:
+            origin = np.array(profile.Position.Location.Coordinates[0:2])
+            axis = np.array([1.0, 0.0])
+            if profile.Position.RefDirection:
+                axis = np.array(profile.Position.RefDirection.DirectionRatios[0:2])
+                axis = axis / np.linalg.norm(axis)
+            perpendicular = np.array([0.0 - axis[1], axis[0]])
+            points = (
+                origin
+                + np.outer(points[:, 0], axis)
+                + np.outer(points[:, 1], perpendicular)
+            )
+        return points.tolist()
+    if not profile.is_a("IfcArbitraryClosedProfileDef") or profile.is_a(
+        "IfcArbitraryProfileDefWithVoids"
+    ):
+        return None
+    curve = profile.OuterCurve
+    if curve.is_a("IfcPolyline"):
+        points = [list(point.Coordinates[0:2]) for point in curve.Points]
+    elif curve.is_a("IfcIndexedPolyCurve"):
+        coordinates = curve.Points.CoordList
+        if curve.Segments:
+            if not all(segment.is_a("IfcLineIndex") for segment in curve.Segments):
+                return None
+            indices = [index for segment in curve.Segments for index in segment[0]]
+            indices = [
+                index
+                for position, index in enumerate(indices)
+                if position == 0 or not index == indices[position - 1]
+            ]
+        else:
+            indices = range(1, len(coordinates) + 1)
+        points = [list(coordinates[index - 1][0:2]) for index in indices]
+    else:
+        return None
+    if points[-1] == points[0]:
+        points.pop()
+    if len(points) < 3:
+        return None
+    return points
+
+
 def create_extruded_area_solid(
     self: ifcopenshell.file,
     points: List[List[float]],
@@ -579,10 +783,8 @@ def create_extruded_area_solid(
     """
     return self.createIfcExtrudedAreaSolid(
         create_closed_profile_from_points(self, points),
-        self.createIfcAxis2Placement3D(
-            self.createIfcCartesianPoint((0.0, 0.0, 0.0)), None, None
-        ),
-        self.createIfcDirection(direction),
+        create_axis2_placement_3d(self),
+        create_direction(self, direction),
         height,
     )
 
@@ -608,12 +810,13 @@ def create_extruded_area_solid2(
     """
     return self.createIfcExtrudedAreaSolid(
         material_profile.Profile,
-        self.createIfcAxis2Placement3D(
-            self.createIfcCartesianPoint(start),
-            self.createIfcDirection(subtract_3d([0.0, 0.0, 0.0], direction)),
-            self.createIfcDirection([direction[1], -direction[0], direction[2]]),
+        create_axis2_placement_3d(
+            self,
+            start,
+            subtract_3d([0.0, 0.0, 0.0], direction),
+            [direction[1], -direction[0], direction[2]],
         ),
-        self.createIfcDirection([0.0, 0.0, -1.0]),
+        create_direction(self, [0.0, 0.0, -1.0]),
         length,
     )
 
@@ -636,14 +839,15 @@ def create_curve_bounded_plane(
 
     return self.createIfcCurveBoundedPlane(
         self.createIfcPlane(
-            self.createIfcAxis2Placement3D(
-                self.createIfcCartesianPoint(matrix[:, 3][0:3].tolist()),
-                self.createIfcDirection(matrix[:, 2][0:3].tolist()),
-                self.createIfcDirection(matrix[:, 0][0:3].tolist()),
+            create_axis2_placement_3d(
+                self,
+                matrix[:, 3][0:3].tolist(),
+                matrix[:, 2][0:3].tolist(),
+                matrix[:, 0][0:3].tolist(),
             )
         ),
         self.createIfcPolyline(
-            [self.createIfcCartesianPoint(point) for point in polygon]
+            [create_cartesian_point(self, point) for point in polygon]
         ),
         [],
     )
@@ -663,15 +867,16 @@ def create_face_surface(
         An IfcFaceSurface entity.
     """
     surface = self.createIfcPlane(
-        self.createIfcAxis2Placement3D(
-            self.createIfcCartesianPoint(polygon[0]),
-            self.createIfcDirection(normal),
-            self.createIfcDirection(normalise_3d(subtract_3d(polygon[1], polygon[0]))),
+        create_axis2_placement_3d(
+            self,
+            polygon[0],
+            normal,
+            normalise_3d(subtract_3d(polygon[1], polygon[0])),
         )
     )
     vertices = []
     for point in polygon:
-        vertices.append(self.createIfcVertexPoint(self.createIfcCartesianPoint(point)))
+        vertices.append(self.createIfcVertexPoint(create_cartesian_point(self, point)))
 
     face_bound = self.createIfcFaceBound(
         self.createIfcEdgeLoop(
@@ -709,6 +914,89 @@ def create_tessellation_from_mesh(
     return self.createIfcPolygonalFaceSet(pointlist, True, indexedfaces, None)
 
 
+def _surface_style_key(
+    name: Optional[str],
+    colour_name: Optional[str],
+    rgb: List[float],
+    transparency: Optional[float],
+) -> Any:
+    return (
+        name,
+        colour_name,
+        _quantise([float(value) for value in rgb]),
+        None if transparency is None else _quantise(float(transparency)),
+    )
+
+
+def get_surface_style(
+    self: ifcopenshell.file,
+    name: str,
+    rgb: List[float],
+    transparency: float = 0.0,
+    colour_name: Optional[str] = None,
+) -> ifcopenshell.entity_instance:
+    """Retrieve or create a surface style with a single shading colour.
+
+    Identical styles are shared by everything in the file, styles already in
+    the file are found the first time this is called.
+
+    Args:
+        self: The IFC file.
+        name: The name of the style.
+        rgb: The red, green and blue components of the colour, 0.0 to 1.0.
+        transparency: Transparency, 0.0 is opaque.
+        colour_name: Optional name of the colour.
+
+    Returns:
+        An IfcSurfaceStyle entity.
+    """
+    if self not in _surface_style_registry:
+        registry = {}
+        for style in self.by_type("IfcSurfaceStyle"):
+            if len(style.Styles) != 1 or style.Styles[0].is_a() != (
+                "IfcSurfaceStyleShading"
+            ):
+                continue
+            shading = style.Styles[0]
+            colour = shading.SurfaceColour
+            key = _surface_style_key(
+                style.Name,
+                colour.Name,
+                [colour.Red, colour.Green, colour.Blue],
+                shading.Transparency,
+            )
+            registry.setdefault(key, style.id())
+        _surface_style_registry[self] = registry
+    registry = _surface_style_registry[self]
+
+    key = _surface_style_key(name, colour_name, rgb, transparency)
+    if key in registry:
+        try:
+            style = self.by_id(registry[key])
+            if style.is_a("IfcSurfaceStyle"):
+                return style
+        except RuntimeError:
+            pass
+
+    style = api.style.add_style(self, name=name)
+    api.style.add_surface_style(
+        self,
+        style=style,
+        ifc_class="IfcSurfaceStyleShading",
+        attributes={
+            "SurfaceColour": {
+                "Name": colour_name,
+                "Red": float(rgb[0]),
+                "Green": float(rgb[1]),
+                "Blue": float(rgb[2]),
+            },
+            "Transparency": float(transparency),
+        },
+    )
+    registry[key] = style.id()
+    return style
+
+
 def create_tessellations_from_mesh_split(
     self: ifcopenshell.file,
     vertices: List[List[float]],
@@ -736,21 +1024,9 @@ def create_tessellations_from_mesh_split(
             pointlist, False, indexedfaces, None
         )
         tessellations.append(tessellation)
-        style = api.style.add_style(self, name=stylename)
         fac = (index % 5) / 5
-        api.style.add_surface_style(
-            self,
-            style=style,
-            ifc_class="IfcSurfaceStyleShading",
-            attributes={
-                "SurfaceColour": {
-                    "Name": stylename,
-                    "Red": fac,
-                    "Green": 1.0 - fac,
-                    "Blue": 0.0,
-                },
-                "Transparency": 0.8,
-            },
+        style = get_surface_style(
+            self, stylename, [fac, 1.0 - fac, 0.0], 0.8, colour_name=stylename
         )
         self.createIfcStyledItem(tessellation, [style], stylename)
         index += 1
@@ -791,23 +1067,107 @@ def clip_solid(
         solid,
         self.createIfcPolygonalBoundedHalfSpace(
             self.createIfcPlane(
-                self.createIfcAxis2Placement3D(
-                    self.createIfcCartesianPoint(start),
-                    self.createIfcDirection(xprod),
-                    self.createIfcDirection(perp_plan),
-                )
+                create_axis2_placement_3d(self, start, xprod, perp_plan)
             ),
             False,
-            self.createIfcAxis2Placement3D(
-                self.createIfcCartesianPoint((0.0, 0.0, 0.0)), None, None
-            ),
+            create_axis2_placement_3d(self),
             self.createIfcPolyline(
-                [self.createIfcCartesianPoint(point) for point in polygon]
+                [create_cartesian_point(self, point) for point in polygon]
             ),
         ),
     )
 
 
+def get_shared_representation(
+    self: ifcopenshell.file,
+    context: ifcopenshell.entity_instance,
+    key: Any,
+) -> Optional[ifcopenshell.entity_instance]:
+    """Reuse geometry previously registered with add_shared_representation().
+
+    The first time geometry is reused, an IfcRepresentationMap is created
+    from the registered representation, this and every subsequent request
+    gets a new MappedRepresentation instancing the map in place.
+
+    Args:
+        self: The IFC file.
+        context: The representation context.
+        key: Description of the geometry in local coordinates, nested lists of
+            numbers and strings.
+
+    Returns:
+        An IfcShapeRepresentation, or None if nothing matches the key.
+    """
+    registry = _shared_representation_registry.get(self)
+    if registry is None:
+        return None
+    key = (context.id(), _quantise(key))
+    if key not in registry:
+        return None
+    representation_id, map_id = registry[key]
+
+    representation_map = None
+    if map_id is not None:
+        try:
+            representation_map = self.by_id(map_id)
+        except RuntimeError:
+            pass
+        if representation_map and not representation_map.is_a("IfcRepresentationMap"):
+            representation_map = None
+    if representation_map is None:
+        try:
+            representation = self.by_id(representation_id)
+        except RuntimeError:
+            del registry[key]
+            return None
+        if not representation.is_a("IfcShapeRepresentation"):
+            del registry[key]
+            return None
+        representation_map = self.createIfcRepresentationMap(
+            create_axis2_placement_3d(self),
+            self.createIfcShapeRepresentation(
+                context,
+                context.ContextIdentifier,
+                representation.RepresentationType,
+                representation.Items,
+            ),
+        )
+        registry[key][1] = representation_map.id()
+
+    origin = create_cartesian_point(self, [0.0, 0.0, 0.0])
+    identity_key = ("IfcCartesianTransformationOperator3D", origin.id())
+    identity = _pooled(self, identity_key) or _add_pooled(
+        self,
+        identity_key,
+        self.createIfcCartesianTransformationOperator3D(None, None, origin, None, None),
+    )
+    return self.createIfcShapeRepresentation(
+        context,
+        context.ContextIdentifier,
+        "MappedRepresentation",
+        [self.createIfcMappedItem(representation_map, identity)],
+    )
+
+
+def add_shared_representation(
+    self: ifcopenshell.file,
+    representation: ifcopenshell.entity_instance,
+    key: Any,
+) -> None:
+    """Register a representation for reuse with get_shared_representation().
+
+    Args:
+        self: The IFC file.
+        representation: An IfcShapeRepresentation defined in local coordinates.
+        key: Description of the geometry in local coordinates.
+    """
+    if self not in _shared_representation_registry:
+        _shared_representation_registry[self] = {}
+    _shared_representation_registry[self][
+        (representation.ContextOfItems.id(), _quantise(key))
+    ] = [representation.id(), None]
+
+
 def add_pset(
     self: ifcopenshell.file,
     product: ifcopenshell.entity_instance,
@@ -846,31 +1206,24 @@ def add_face_topology_epsets(
         back_cell: The cell behind the face.
         front_cell: The cell in front of the face.
     """
+    properties = {}
     if face:
         face_index = face.Get("index")
         if face_index is not None:
-            add_pset(self, entity, "EPset_Topology", {"FaceIndex": str(face_index)})
+            properties["FaceIndex"] = str(face_index)
         face_stylename = face.Get("stylename")
         if face_stylename is not None:
-            add_pset(self, entity, "EPset_Topology", {"StyleName": str(face_stylename)})
+            properties["StyleName"] = str(face_stylename)
     if front_cell:
         front_cell_index = front_cell.Get("index")
         if front_cell_index is not None:
-            add_pset(
-                self,
-                entity,
-                "EPset_Topology",
-                {"FrontCellIndex": str(front_cell_index)},
-            )
+            properties["FrontCellIndex"] = str(front_cell_index)
     if back_cell:
         back_cell_index = back_cell.Get("index")
         if back_cell_index is not None:
-            add_pset(
-                self,
-                entity,
-                "EPset_Topology",
-                {"BackCellIndex": str(back_cell_index)},
-            )
+            properties["BackCellIndex"] = str(back_cell_index)
+    if properties:
+        add_pset(self, entity, "EPset_Topology", properties)
 
 
 def add_cell_topology_epsets(
@@ -884,12 +1237,15 @@ def add_cell_topology_epsets(
         cell: The topological cell, which may have properties like index and usage.
     """
     if cell:
+        properties = {}
         cell_index = cell.Get("index")
         if cell_index is not None:
-            add_pset(self, entity, "EPset_Topology", {"CellIndex": cell_index})
+            properties["CellIndex"] = cell_index
         cell_usage = cell.Get("usage")
         if cell_usage is not None:
-            add_pset(self, entity, "EPset_Topology", {"Usage": cell_usage})
+            properties["Usage"] = cell_usage
+        if properties:
+            add_pset(self, entity, "EPset_Topology", properties)
 
 
 def assign_storey_byindex(
@@ -914,17 +1270,9 @@ def assign_storey_byindex(
         if get_parent_building(storey) == building:
             storeys[storey.Name] = storey
     if entity.is_a("IfcSpatialElement"):
-        api.aggregate.assign_object(
-            self,
-            products=[entity],
-            relating_object=storeys[str(index)],
-        )
+        assign_aggregate(self, [entity], storeys[str(index)])
     else:
-        api.spatial.assign_container(
-            self,
-            products=[entity],
-            relating_structure=storeys[str(index)],
-        )
+        assign_container(self, [entity], storeys[str(index)])
     return storeys[str(index)]
 
 
@@ -966,6 +1314,521 @@ def assign_space_byindex(
         )
 
 
+def begin_bulk_relationships(self: ifcopenshell.file) -> None:
+    """Defer aggregation, containment and typing until flush_bulk_relationships().
+
+    Until then assign_aggregate(), assign_container() and assign_type() only
+    record what they are asked to do, so nothing may rely on these
+    relationships or on placements being relative to their parents.
+
+    Args:
+        self: The IFC file.
+    """
+    if self not in _relationship_queue_registry:
+        _relationship_queue_registry[self] = {"spatial": {}, "type": {}}
+
+
+def assign_aggregate(
+    self: ifcopenshell.file,
+    products: List[ifcopenshell.entity_instance],
+    relating_object: ifcopenshell.entity_instance,
+) -> None:
+    """Aggregate products in a parent, equivalent to api.aggregate.assign_object()
+
+    Args:
+        self: The IFC file.
+        products: The parts.
+        relating_object: The whole.
+    """
+    queue = _relationship_queue_registry.get(self)
+    if queue is None:
+        api.aggregate.assign_object(
+            self, products=products, relating_object=relating_object
+        )
+        return
+    for product in products:
+        queue["spatial"].pop(product.id(), None)
+        queue["spatial"][product.id()] = ["IfcRelAggregates", relating_object.id()]
+
+
+def assign_container(
+    self: ifcopenshell.file,
+    products: List[ifcopenshell.entity_instance],
+    relating_structure: ifcopenshell.entity_instance,
+) -> None:
+    """Contain products in a spatial element, equivalent to api.spatial.assign_container()
+
+    Args:
+        self: The IFC file.
+        products: The elements.
+        relating_structure: The storey, space etc. to contain them.
+    """
+    queue = _relationship_queue_registry.get(self)
+    if queue is None:
+        api.spatial.assign_container(
+            self, products=products, relating_structure=relating_structure
+        )
+        return
+    for product in products:
+        queue["spatial"].pop(product.id(), None)
+        queue["spatial"][product.id()] = [
+            "IfcRelContainedInSpatialStructure",
+            relating_structure.id(),
+        ]
+
+
+def assign_type(
+    self: ifcopenshell.file,
+    related_objects: List[ifcopenshell.entity_instance],
+    relating_type: ifcopenshell.entity_instance,
+) -> None:
+    """Type objects, equivalent to api.type.assign_type()
+
+    Types with representation maps are assigned immediately, as the api
+    replaces any representations the objects already have when mapping them.
+
+    Args:
+        self: The IFC file.
+        related_objects: The occurrences.
+        relating_type: The type.
+    """
+    queue = _relationship_queue_registry.get(self)
+    if queue is None or relating_type.RepresentationMaps:
+        api.type.assign_type(
+            self, related_objects=related_objects, relating_type=relating_type
+        )
+        return
+    queue["type"].setdefault(relating_type.id(), []).extend(
+        product.id() for product in related_objects
+    )
+
+
+def _exists(self: ifcopenshell.file, entity_id: int) -> bool:
+    """Is there still an entity with this id in the file"""
+    try:
+        self.by_id(entity_id)
+    except RuntimeError:
+        return False
+    return True
+
+
+def flush_bulk_relationships(self: ifcopenshell.file) -> None:
+    """Create everything recorded since begin_bulk_relationships().
+
+    There is one IfcRelAggregates per whole, one
+    IfcRelContainedInSpatialStructure per spatial element and one
+    IfcRelDefinesByType per type. Product placements are made relative to
+    their new parents without moving them.
+
+    Args:
+        self: The IFC file.
+    """
+    queue = _relationship_queue_registry.pop(self, None)
+    if queue is None:
+        return
+    # forget anything deleted in the meantime
+    for product_id, (rel_class, parent_id) in list(queue["spatial"].items()):
+        if not (_exists(self, product_id) and _exists(self, parent_id)):
+            del queue["spatial"][product_id]
+    for type_id, product_ids in list(queue["type"].items()):
+        queue["type"][type_id] = [
+            product_id for product_id in product_ids if _exists(self, product_id)
+        ]
+        if not (_exists(self, type_id) and queue["type"][type_id]):
+            del queue["type"][type_id]
+
+    # world placements, before anything is reattached
+    matrices = {}
+    for product_id in queue["spatial"]:
+        placement = self.by_id(product_id).ObjectPlacement
+        if placement and placement.is_a("IfcLocalPlacement"):
+            matrices[product_id] = ifcopenshell.util.placement.get_local_placement(
+                placement
+            )
+
+    groups = {}
+    for product_id, (rel_class, parent_id) in queue["spatial"].items():
+        product = self.by_id(product_id)
+        if (
+            product.Decomposes
+            or getattr(product, "ContainedInStructure", None)
+            or getattr(product, "Nests", None)
+        ):
+            # already somewhere, let the api do the unassigning
+            if rel_class == "IfcRelAggregates":
+                api.aggregate.assign_object(
+                    self, products=[product], relating_object=self.by_id(parent_id)
+                )
+            else:
+                api.spatial.assign_container(
+                    self, products=[product], relating_structure=self.by_id(parent_id)
+                )
+            matrices.pop(product_id, None)
+            continue
+        groups.setdefault((rel_class, parent_id), []).append(product)
+
+    for (rel_class, parent_id), products in groups.items():
+        parent = self.by_id(parent_id)
+        if rel_class == "IfcRelAggregates":
+            rel = next(iter(parent.IsDecomposedBy), None)
+            if rel:
+                rel.RelatedObjects = list(rel.RelatedObjects) + products
+            else:
+                self.create_entity(
+                    rel_class,
+                    GlobalId=ifcopenshell.guid.new(),
+                    OwnerHistory=api.owner.create_owner_history(self),
+                    RelatingObject=parent,
+                    RelatedObjects=products,
+                )
+        else:
+            rel = next(iter(parent.ContainsElements), None)
+            if rel:
+                rel.RelatedElements = list(rel.RelatedElements) + products
+            else:
+                self.create_entity(
+                    rel_class,
+                    GlobalId=ifcopenshell.guid.new(),
+                    OwnerHistory=api.owner.create_owner_history(self),
+                    RelatingStructure=parent,
+                    RelatedElements=products,
+                )
+
+        # placements are relative to the parent, as api.geometry.edit_object_placement()
+        parent_placement = getattr(parent, "ObjectPlacement", None)
+        if parent_placement is None:
+            continue
+        parent_inverse = np.linalg.inv(
+            ifcopenshell.util.placement.get_local_placement(parent_placement)
+        )
+        for product in products:
+            if product.id() not in matrices:
+                continue
+            if rel_class != "IfcRelAggregates" and any(
+                getattr(product, attribute, None)
+                for attribute in [
+                    "Nests",
+                    "ContainedIn",
+                    "VoidsElements",
+                    "FillsVoids",
+                    "ProjectsElements",
+                    "AdheresToElement",
+                ]
+            ):
+                # placement is relative to something more specific
+                continue
+            placement = product.ObjectPlacement
+            if placement.PlacementRelTo == parent_placement:
+                continue
+            matrix = parent_inverse @ matrices[product.id()]
+            old = placement.RelativePlacement
+            placement.RelativePlacement = create_axis2_placement_3d(
+                self,
+                matrix[:, 3][0:3].tolist(),
+                matrix[:, 2][0:3].tolist(),
+                matrix[:, 0][0:3].tolist(),
+            )
+            placement.PlacementRelTo = parent_placement
+            _remove_unreferenced(self, [old])
+
+    for type_id, product_ids in queue["type"].items():
+        api.type.assign_type(
+            self,
+            related_objects=[self.by_id(product_id) for product_id in product_ids],
+            relating_type=self.by_id(type_id),
+        )
+
+
+def merge_fragment(
+    self: ifcopenshell.file,
+    fragment: ifcopenshell.file,
+    skeleton_max_id: int,
+    base: Optional[ifcopenshell.file] = None,
+) -> None:
+    """Copy everything that has been added to a copy of this file.
+
+    The fragment started as a copy of this file, written when the highest
+    entity id was skeleton_max_id, and has since been built on elsewhere.
+    Entities up to skeleton_max_id are the same in both files so they are
+    not copied. Rooted entities with a GlobalId already in this file, such
+    as Types appended from a library, are reused, as are libraries and
+    materials with the same name, identical surface styles and interned
+    points, directions and placements. A relationship with a relating
+    entity already in this file is merged into an existing relationship of
+    the same class, objects already in this file are not related again.
+    New objects in a relationship that is already in this file, such as a
+    new Site aggregated by the Project, or a Type appended from a library
+    that was already appended elsewhere, are added to it.
+
+    Entities up to skeleton_max_id that have been edited in the fragment,
+    such as a Type given another RepresentationMap, get the edited
+    attributes here too, and those removed from the fragment are removed
+    here. Edits are found by comparing with base, so attributes edited by
+    an earlier fragment are kept, lists of entities gain and lose only the
+    members the fragment added or removed. Rooted entities reused by
+    GlobalId are assumed to be unedited.
+
+    Fragments are merged in a deterministic order, entities are copied in
+    order of id, starting with those that nothing else refers to.
+
+    Args:
+        self: The IFC file.
+        fragment: The IFC file to merge.
+        skeleton_max_id: The highest entity id shared by both files.
+        base: The file the fragment was copied from, if this file has
+            changed since, defaults to this file.
+    """
+    if base is None:
+        base = self
+    mapping = {}
+    created = set()
+
+    def existing(entity):
+        """An equivalent entity already in this file, or None"""
+        if entity.id() <= skeleton_max_id:
+            return self.by_id(entity.id())
+        if entity.is_a("IfcRoot"):
+            try:
+                return self.by_guid(entity.GlobalId)
+            except RuntimeError:
+                pass
+        if entity.is_a("IfcProjectLibrary") or entity.is_a("IfcMaterial"):
+            for candidate in self.by_type(entity.is_a()):
+                if candidate.Name == entity.Name:
+                    return candidate
+        return None
+
+    def value(item):
+        if isinstance(item, ifcopenshell.entity_instance):
+            if item.id() == 0:
+                # a defined type in a select, e.g. IfcLabel
+                return self.create_entity(item.is_a(), item.wrappedValue)
+            return copy(item)
+        if isinstance(item, tuple):
+            return tuple(value(member) for member in item)
+        return item
+
+    def pooled(entity):
+        """Interned equivalent of a point, direction, placement or style"""
+        if entity.is_a("IfcCartesianPoint"):
+            return create_cartesian_point(self, list(entity.Coordinates))
+        if entity.is_a("IfcDirection"):
+            return create_direction(self, list(entity.DirectionRatios))
+        if entity.is_a("IfcAxis2Placement3D"):
+            return create_axis2_placement_3d(
+                self,
+                list(entity.Location.Coordinates),
+                list(entity.Axis.DirectionRatios) if entity.Axis else None,
+                (
+                    list(entity.RefDirection.DirectionRatios)
+                    if entity.RefDirection
+                    else None
+                ),
+            )
+        if (
+            entity.is_a("IfcSurfaceStyle")
+            and len(entity.Styles) == 1
+            and entity.Styles[0].is_a() == "IfcSurfaceStyleShading"
+        ):
+            colour = entity.Styles[0].SurfaceColour
+            return get_surface_style(
+                self,
+                entity.Name,
+                [colour.Red, colour.Green, colour.Blue],
+                entity.Styles[0].Transparency,
+                colour.Name,
+            )
+        return None
+
+    def relationship(entity):
+        """Names of the relating entity and list of related entities, or None"""
+        relating_name = None
+        related_name = None
+        for index, attribute in enumerate(entity):
+            name = entity.attribute_name(index)
+            if name.startswith("Relating") and relating_name is None:
+                relating_name = name
+            elif (
+                name.startswith("Related")
+                and isinstance(attribute, tuple)
+                and attribute
+                and isinstance(attribute[0], ifcopenshell.entity_instance)
+            ):
+                # not e.g. RelatedPriorities of IfcRelConnectsPathElements
+                related_name = name
+        if relating_name is None or related_name is None:
+            return None
+        return relating_name, related_name
+
+    def merge(entity, relating_name, related_name):
+        """Relate only new objects, to an existing relationship if possible"""
+        related = [
+            copy(item)
+            for item in getattr(entity, related_name)
+            if item.id() > skeleton_max_id
+        ]
+        related = [item for item in related if item.id() in created]
+        if not related:
+            return None
+        relating = copy(getattr(entity, relating_name))
+        if relating.id() not in created:
+            for candidate in self.get_inverse(relating):
+                if (
+                    candidate.is_a() == entity.is_a()
+                    and getattr(candidate, relating_name) == relating
+                    and not removed_from_fragment(candidate)
+                ):
+                    setattr(
+                        candidate,
+                        related_name,
+                        list(getattr(candidate, related_name)) + related,
+                    )
+                    return candidate
+        result = self.create_entity(
+            entity.is_a(), *[value(attribute) for attribute in entity]
+        )
+        setattr(result, related_name, related)
+        created.add(result.id())
+        return result
+
+    def removed_from_fragment(entity):
+        """A shared entity that the fragment no longer has"""
+        if entity.id() > skeleton_max_id:
+            return False
+        try:
+            fragment.by_id(entity.id())
+        except RuntimeError:
+            return True
+        return False
+
+    def extend(entity, result, related_name):
+        """Add new objects to a relationship that is already in this file"""
+        related = [
+            copy(item)
+            for item in getattr(entity, related_name)
+            if item.id() > skeleton_max_id
+        ]
+        related = [item for item in related if item.id() in created]
+        if related:
+            setattr(result, related_name, list(getattr(result, related_name)) + related)
+
+    def copy(entity):
+        if entity.id() in mapping:
+            return mapping[entity.id()]
+        result = existing(entity)
+        if result is not None and entity.is_a("IfcRelationship"):
+            mapping[entity.id()] = result
+            names = relationship(entity)
+            if names:
+                extend(entity, result, names[1])
+            return result
+        if result is None:
+            result = pooled(entity)
+        if result is None and entity.is_a("IfcRelationship"):
+            names = relationship(entity)
+            if names:
+                result = merge(entity, *names)
+                mapping[entity.id()] = result
+                return result
+        if (
+            result is None
+            and entity.is_a("IfcRelSpaceBoundary2ndLevel")
+            and entity.CorrespondingBoundary
+        ):
+            # corresponding boundaries refer to each other, relate afterwards
+            info = entity.get_info(recursive=False, include_identifier=False)
+            del info["type"]
+            del info["CorrespondingBoundary"]
+            result = self.create_entity(
+                entity.is_a(), **{name: value(item) for name, item in info.items()}
+            )
+            created.add(result.id())
+            mapping[entity.id()] = result
+            result.CorrespondingBoundary = copy(entity.CorrespondingBoundary)
+            return result
+        if result is None:
+            result = self.create_entity(
+                entity.is_a(), *[value(attribute) for attribute in entity]
+            )
+            created.add(result.id())
+        mapping[entity.id()] = result
+        return result
+
+    for entity in fragment:
+        if entity.id() > skeleton_max_id and not fragment.get_total_inverses(entity):
+            copy(entity)
+    # relationships already here may have new objects, and relationships
+    # that refer to each other, e.g. corresponding space boundaries, are
+    # not reached from the start
+    for entity in fragment.by_type("IfcRelationship"):
+        copy(entity)
+
+    def same(item, other):
+        """Are values from the fragment and from base the same"""
+        if isinstance(item, ifcopenshell.entity_instance):
+            if not isinstance(other, ifcopenshell.entity_instance):
+                return False
+            if item.id() == 0 or other.id() == 0:
+                return (
+                    item.id() == other.id()
+                    and item.is_a() == other.is_a()
+                    and item.wrappedValue == other.wrappedValue
+                )
+            return item.id() == other.id() <= skeleton_max_id
+        if isinstance(item, tuple):
+            return (
+                isinstance(other, tuple)
+                and len(item) == len(other)
+                and all(same(*pair) for pair in zip(item, other))
+            )
+        return item == other
+
+    def members(attribute):
+        """Is this a list of entities, rather than e.g. coordinates"""
+        return isinstance(attribute, tuple) and all(
+            isinstance(item, ifcopenshell.entity_instance) and item.id()
+            for item in attribute
+        )
+
+    def edit(entity, original, target):
+        """Bring edits of a shared entity in the fragment over to this file"""
+        for index, attribute in enumerate(entity):
+            if same(attribute, original[index]):
+                continue
+            if members(attribute) and members(original[index] or ()):
+                # others may have been added here by an earlier fragment
+                before = {item.id() for item in original[index] or ()}
+                after = {item.id() for item in attribute}
+                target[index] = [
+                    item
+                    for item in target[index] or ()
+                    if item.id() in after or item.id() not in before
+                ] + [
+                    copy(item)
+                    for item in attribute
+                    if item.id() > skeleton_max_id or item.id() not in before
+                ]
+            else:
+                target[index] = value(attribute)
+
+    removed = []
+    for original in base:
+        if original.id() > skeleton_max_id:
+            continue
+        try:
+            target = self.by_id(original.id())
+        except RuntimeError:
+            # already removed by an earlier fragment
+            continue
+        if removed_from_fragment(original):
+            removed.append(target)
+        elif not original.is_a("IfcRelationship"):
+            # relationships are already merged above
+            edit(fragment.by_id(original.id()), original, target)
+    for target in removed:
+        self.remove(target)
+
+
 def get_type_object(
     self: ifcopenshell.file,
     style_object: Any,
@@ -1018,7 +1881,9 @@ def get_type_object(
 
 
 def delete_ifc_product(
-    self: ifcopenshell.file, product: Optional[ifcopenshell.entity_instance]
+    self: ifcopenshell.file,
+    product: Optional[ifcopenshell.entity_instance],
+    bulk: bool = False,
 ) -> None:
     """Recursively delete a product and its children.
 
@@ -1028,9 +1893,14 @@ def delete_ifc_product(
     Args:
         self: The IFC file.
         product: The product to delete, or None (in which case no action is taken).
+        bulk: Collect the whole subtree first and remove it with low-level
+            file operations instead of one api.root.remove_product per product.
     """
     if not product:
         return
+    if bulk:
+        delete_ifc_products_bulk(self, [product])
+        return
     if getattr(product, "IsDecomposedBy", None):
         for child in product.IsDecomposedBy:
             for child_object in child.RelatedObjects:
@@ -1065,6 +1935,174 @@ def delete_ifc_product(
     api.root.remove_product(self, product=product)
 
 
+def collect_ifc_subtree(
+    self: ifcopenshell.file, products: List[ifcopenshell.entity_instance]
+) -> List[ifcopenshell.entity_instance]:
+    """Collect products and everything decomposing them.
+
+    Follows the same relationships as delete_ifc_product(): aggregation,
+    grouping, nesting (including ports), spatial containment, openings and
+    fillings.
+
+    Args:
+        self: The IFC file.
+        products: The root products of the subtree.
+
+    Returns:
+        All products in the subtree, roots included, each listed once.
+    """
+    result = []
+    seen = set()
+    todo = list(products)
+    while todo:
+        product = todo.pop()
+        if product.id() in seen:
+            continue
+        seen.add(product.id())
+        result.append(product)
+        for rel in getattr(product, "IsDecomposedBy", None) or []:
+            todo.extend(rel.RelatedObjects)
+        for rel in getattr(product, "IsGroupedBy", None) or []:
+            todo.extend(rel.RelatedObjects)
+        for rel in getattr(product, "IsNestedBy", None) or []:
+            todo.extend(rel.RelatedObjects)
+        if product.is_a("IfcSpatialElement"):
+            for rel in product.ContainsElements:
+                todo.extend(rel.RelatedElements)
+        for rel in getattr(product, "HasOpenings", None) or []:
+            todo.append(rel.RelatedOpeningElement)
+        for rel in getattr(product, "HasFillings", None) or []:
+            todo.append(rel.RelatedBuildingElement)
+        if product.is_a("IfcElement"):
+            todo.extend(ifcopenshell.util.system.get_ports(product))
+    return result
+
+
+def delete_ifc_products_bulk(
+    self: ifcopenshell.file,
+    products: List[ifcopenshell.entity_instance],
+    recursive: bool = True,
+) -> None:
+    """Delete products and their subtrees in a single sweep.
+
+    The subtree is collected first, then every relationship touching it is
+    either trimmed or removed, the products are removed with file.remove(),
+    and finally placements, representations, property sets, connection
+    geometry etc. are removed if nothing else refers to them.
+
+    Args:
+        self: The IFC file.
+        products: The root products to delete.
+        recursive: Delete the subtree, otherwise delete exactly these products
+            and leave any children detached.
+    """
+    doomed = [product for product in products if product]
+    if recursive:
+        doomed = collect_ifc_subtree(self, doomed)
+    else:
+        doomed = list({product.id(): product for product in doomed}.values())
+    doomed_ids = {product.id() for product in doomed}
+
+    rels = {}
+    for product in doomed:
+        for inverse in self.get_inverse(product):
+            if inverse.is_a("IfcRelationship"):
+                rels[inverse.id()] = inverse
+
+    # detach relationships, keeping any that still relate surviving objects
+    orphans = []
+    for rel in rels.values():
+        if rel.id() in doomed_ids:
+            continue
+        updates = {}
+        delete = False
+        for index, value in enumerate(rel):
+            if isinstance(value, ifcopenshell.entity_instance):
+                if value.id() in doomed_ids:
+                    delete = True
+                    break
+            elif isinstance(value, tuple) and value:
+                if not isinstance(value[0], ifcopenshell.entity_instance):
+                    continue
+                kept = [item for item in value if item.id() not in doomed_ids]
+                if not kept:
+                    delete = True
+                    break
+                if len(kept) != len(value):
+                    updates[rel.attribute_name(index)] = kept
+        if delete:
+            orphans.extend(_forward_references(self, rel))
+            doomed_ids.add(rel.id())
+            self.remove(rel)
+        else:
+            for name, kept in updates.items():
+                setattr(rel, name, kept)
+
+    for product in doomed:
+        orphans.extend(_forward_references(self, product))
+    for product in doomed:
+        self.remove(product)
+
+    _remove_unreferenced(self, orphans, removed=doomed_ids)
+
+
+def _forward_references(
+    self: ifcopenshell.file, entity: ifcopenshell.entity_instance
+) -> List[ifcopenshell.entity_instance]:
+    """Entities directly referenced by an entity"""
+    return [
+        item
+        for item in self.traverse(entity, max_levels=1)[1:]
+        if item.id() and item != entity
+    ]
+
+
+def _remove_unreferenced(
+    self: ifcopenshell.file,
+    candidates: List[ifcopenshell.entity_instance],
+    removed: Optional[set] = None,
+) -> None:
+    """Remove candidates nothing refers to anymore, and anything they own
+
+    Rooted objects (other than property definitions), contexts, owner history,
+    materials and presentation styles are left for purge_unused() to consider.
+    Styled items are the only inverse references that don't keep a
+    representation item alive.
+    """
+    todo = [entity.id() for entity in candidates]
+    if removed is None:
+        removed = set()
+    while todo:
+        entity_id = todo.pop()
+        if entity_id in removed:
+            continue
+        entity = self.by_id(entity_id)
+        if (
+            (entity.is_a("IfcRoot") and not entity.is_a("IfcPropertyDefinition"))
+            or entity.is_a("IfcRepresentationContext")
+            or entity.is_a("IfcOwnerHistory")
+            or entity.is_a("IfcMaterialDefinition")
+            or entity.is_a("IfcPresentationStyle")
+        ):
+            continue
+        if self.get_total_inverses(entity):
+            inverses = self.get_inverse(entity)
+            if not all(
+                inverse.is_a("IfcStyledItem") and inverse.Item == entity
+                for inverse in inverses
+            ):
+                continue
+            for styled_item in inverses:
+                todo.extend(
+                    item.id() for item in _forward_references(self, styled_item)
+                )
+                removed.add(styled_item.id())
+                self.remove(styled_item)
+        todo.extend(item.id() for item in _forward_references(self, entity))
+        removed.add(entity_id)
+        self.remove(entity)
+
+
 def purge_unused(self: ifcopenshell.file) -> None:
     """Delete unused entities from the IFC file.
 
@@ -1096,13 +2134,12 @@ def purge_unused(self: ifcopenshell.file) -> None:
                 todo = True
         for placement in self.by_type("IfcLocalPlacement"):
             if not placement.PlacesObject and not placement.ReferencedByPlacements:
+                # points and directions may be shared, these are removed
+                # below as unused representation items
                 rel = placement.RelativePlacement
-                self.remove(rel.Location)
-                self.remove(rel.RefDirection)
-                if getattr(rel, "Axis", None):
-                    self.remove(rel.Axis)
-                self.remove(rel)
                 self.remove(placement)
+                if not self.get_total_inverses(rel):
+                    self.remove(rel)
                 todo = True
         for entity in self.by_type("IfcConnectionGeometry"):
             if not self.get_inverse(entity):
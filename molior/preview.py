@@ -0,0 +1,370 @@
+"""Rough preview meshes of walls, floors and roofs, without building IFC
+
+Walls are prisms between the inside and outside corners of each trace
+segment, floors are slabs under each room, and roofs and soffits are
+slabs under each hull face.  Thicknesses come from the Type Objects in the
+style libraries, but nothing is added to an IFC file, so a preview can be
+refreshed much faster than a full build.  Extrusions, Repeats, Stairs,
+Spaces and openings are not previewed, and walls are not cropped under
+pitched roofs.
+
+Usage:
+    molior_object = Molior.from_faces_and_widgets(faces=faces, widgets=widgets)
+    write_preview(meshes(molior_object), "preview.glb")
+
+"""
+
+import re
+import json
+import struct
+import numpy as np
+import shapely
+
+from .geometry import clip_prism, normalise
+from .ifc import get_thickness
+from .wall import Wall
+from .floor import Floor
+from .shell import Shell
+
+try:
+    from topologist.helpers import string_to_coor
+except ImportError:
+    from ..topologist.helpers import string_to_coor
+
+# RGBA colours used for each class in glTF output
+COLOURS = {
+    "Wall": [0.9, 0.88, 0.82, 1.0],
+    "Floor": [0.55, 0.4, 0.3, 1.0],
+    "Shell": [0.65, 0.3, 0.25, 1.0],
+}
+
+
+def thickness(style_object, stylename, ifc_type, typename):
+    """Total layer thickness of a Type Object in a style library, cached"""
+    key = (stylename, ifc_type, typename)
+    if key not in style_object.thicknesses:
+        found_stylename, library_file, element = style_object.get_from_library(
+            stylename, ifc_type, typename
+        )
+        result = 0.0
+        if element:
+            result = get_thickness(library_file, element)
+        style_object.thicknesses[key] = result
+    return style_object.thicknesses[key]
+
+
+def slab(vertices, normal, bottom, top):
+    """Vertices and faces of a planar polygon thickened between two offsets along its normal"""
+    vertices = np.asarray(vertices, dtype=float)
+    normal = np.asarray(normal, dtype=float)
+    if (
+        np.dot(np.cross(vertices, np.roll(vertices, -1, axis=0)).sum(axis=0), normal)
+        < 0
+    ):
+        vertices = vertices[::-1]
+    if bottom > top:
+        bottom, top = top, bottom
+    size = len(vertices)
+    vertices = np.concatenate([vertices + normal * bottom, vertices + normal * top])
+    faces = [list(reversed(range(size))), list(range(size, 2 * size))]
+    for index in range(size):
+        following = (index + 1) % size
+        faces.append([index, following, following + size, index + size])
+    return vertices, faces
+
+
+def triangulate(vertices, face):
+    """Triangles of a planar polygon face, as indices into vertices"""
+    if len(face) == 3:
+        return [face]
+    points = vertices[face]
+    normal = np.cross(points, np.roll(points, -1, axis=0)).sum(axis=0)
+    axis = np.argmax(np.abs(normal))
+    points_2d = np.delete(points, axis, axis=1)
+    lookup = {tuple(np.round(point, 9)): index for point, index in zip(points_2d, face)}
+    triangles = []
+    for triangle in shapely.constrained_delaunay_triangles(
+        shapely.Polygon(points_2d)
+    ).geoms:
+        corners = [
+            lookup.get(tuple(np.round(coor, 9)))
+            for coor in triangle.exterior.coords[:-1]
+        ]
+        if None in corners:
+            # a point added by the triangulation, fall back to a fan
+            return [[face[0], a, b] for a, b in zip(face[1:-1], face[2:])]
+        triangles.append(corners)
+    # keep the winding of the original face
+    for triangle in triangles:
+        a, b, c = vertices[triangle]
+        if np.dot(np.cross(b - a, c - a), normal) < 0.0:
+            triangle.reverse()
+    return triangles
+
+
+def add_mesh(parts, group, vertices, faces):
+    """Collect vertices and faces for a named group, see join_meshes()"""
+    if group not in parts:
+        parts[group] = [[], [], 0]
+    offset = parts[group][2]
+    parts[group][0].append(vertices)
+    parts[group][1].extend([[index + offset for index in face] for face in faces])
+    parts[group][2] += len(vertices)
+
+
+def join_meshes(parts):
+    """A single array of vertices and a list of faces for each group"""
+    return {
+        group: (np.concatenate(vertices), faces)
+        for group, (vertices, faces, count) in parts.items()
+    }
+
+
+def each_trace(traces):
+    """Condition, elevation, height, stylename and chain of every trace"""
+    for condition in traces:
+        for elevation in traces[condition]:
+            for height in traces[condition][elevation]:
+                for stylename in traces[condition][elevation][height]:
+                    for chain in traces[condition][elevation][height][stylename]:
+                        yield condition, elevation, height, stylename, chain
+
+
+def trace_meshes(parts, traces, elevations, normals, style_object):
+    """Wall and Floor prisms for every trace, grouped by class, style and name"""
+    modules = {"Wall": Wall, "Floor": Floor}
+    for condition, elevation, height, stylename, chain in each_trace(traces):
+        closed = chain.is_simple_cycle()
+        path = []
+        for node in chain.graph:
+            path.append(chain.graph[node][1]["start_vertex"].Coordinates()[0:2])
+        if not closed:
+            last_node = list(chain.graph)[-1]
+            path.append(chain.graph[last_node][1]["end_vertex"].Coordinates()[0:2])
+        normal_set = "bottom"
+        if re.search("^top-", condition):
+            normal_set = "top"
+
+        myconfig = style_object.get(stylename)
+        for name, config in myconfig["traces"].items():
+            if config.get("condition") != condition:
+                continue
+            if config.get("class") not in modules:
+                continue
+            vals = {
+                "closed": closed,
+                "path": path,
+                "elevation": elevation,
+                "height": height,
+                "normals": normals,
+                "normal_set": normal_set,
+                "style": stylename,
+                "level": elevations.get(elevation, 0),
+            }
+            vals.update(config)
+            part = modules[config["class"]](vals)
+            if part.ifc == "IfcVirtualElement":
+                continue
+            depth = thickness(style_object, stylename, part.ifc + "Type", part.typename)
+            if depth <= 0.0:
+                continue
+            group = config["class"] + "/" + stylename + "/" + name
+
+            if config["class"] == "Wall":
+                part.inner = depth + part.offset
+                for id_segment in range(part.segments()):
+                    prism = clip_prism(
+                        [
+                            part.corner_out(id_segment),
+                            part.corner_out(id_segment + 1),
+                            part.corner_in(id_segment + 1),
+                            part.corner_in(id_segment),
+                        ],
+                        part.height,
+                        [],
+                    )
+                    if prism is None:
+                        continue
+                    vertices, faces = prism
+                    vertices[:, 2] += part.elevation
+                    add_mesh(parts, group, vertices, faces)
+            elif len(path) > 2:
+                vertices, faces = clip_prism(
+                    [part.corner_in(index) for index in range(len(path))], depth, []
+                )
+                vertices[:, 2] += part.elevation + part.offset
+                add_mesh(parts, group, vertices, faces)
+    return parts
+
+
+def hull_meshes(parts, hulls, style_object):
+    """Shell slabs for every hull face, grouped by class, style and name"""
+    for condition in hulls:
+        for stylename in hulls[condition]:
+            myconfig = style_object.get(stylename)
+            for name, config in myconfig["hulls"].items():
+                if config.get("condition") != condition:
+                    continue
+                if config.get("class") != "Shell":
+                    continue
+                part = Shell(dict(config, style=stylename))
+                depth = thickness(
+                    style_object, stylename, part.ifc + "Type", part.typename
+                )
+                if depth <= 0.0:
+                    continue
+                inner = depth + part.offset
+                group = "Shell/" + stylename + "/" + name
+                for hull in hulls[condition][stylename]:
+                    for face in hull.faces:
+                        vertices = [string_to_coor(node_str) for node_str in face[0]]
+                        if len(vertices) < 3:
+                            continue
+                        normal = normalise([face[1]["face"].Normal()])[0]
+                        add_mesh(
+                            parts,
+                            group,
+                            *slab(vertices, normal, -inner, -part.offset),
+                        )
+    return parts
+
+
+def meshes(molior_object):
+    """Preview meshes for a Molior object, keyed by 'class/stylename/name'"""
+    parts = {}
+    trace_meshes(
+        parts,
+        molior_object.traces,
+        molior_object.elevations,
+        molior_object.normals,
+        molior_object.style,
+    )
+    hull_meshes(parts, molior_object.hulls, molior_object.style)
+    return join_meshes(parts)
+
+
+def write_obj(meshes, path):
+    """Write meshes as Wavefront OBJ, each group has a material of the same name"""
+    offset = 1
+    with open(path, "w") as obj_file:
+        for group, (vertices, faces) in meshes.items():
+            obj_file.write("o " + group.replace(" ", "_") + "\n")
+            obj_file.write("usemtl " + group.replace(" ", "_") + "\n")
+            obj_file.write(
+                "".join(
+                    "v {:.6f} {:.6f} {:.6f}\n".format(*vertex) for vertex in vertices
+                )
+            )
+            obj_file.write(
+                "".join(
+                    "f " + " ".join(str(index + offset) for index in face) + "\n"
+                    for face in faces
+                )
+            )
+            offset += len(vertices)
+
+
+def write_glb(meshes, path):
+    """Write meshes as binary glTF, one primitive and material per group
+
+    glTF is Y-up, so Z-up coordinates are rotated to suit.  A mesh needs at
+    least one primitive, so ValueError is raised if there are no faces.
+    """
+    gltf = {
+        "asset": {"version": "2.0", "generator": "homemaker preview"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0, "name": "preview"}],
+        "meshes": [{"primitives": []}],
+        "materials": [],
+        "accessors": [],
+        "bufferViews": [],
+        "buffers": [],
+    }
+    blobs = []
+    length = 0
+
+    def add_view(data, target):
+        nonlocal length
+        gltf["bufferViews"].append(
+            {
+                "buffer": 0,
+                "byteOffset": length,
+                "byteLength": len(data),
+                "target": target,
+            }
+        )
+        padding = b"\x00" * (-len(data) % 4)
+        blobs.append(data + padding)
+        length += len(data) + len(padding)
+        return len(gltf["bufferViews"]) - 1
+
+    for group, (vertices, faces) in meshes.items():
+        triangles = []
+        for face in faces:
+            triangles.extend(triangulate(vertices, face))
+        if not triangles:
+            continue
+        positions = np.asarray(vertices, dtype=np.float32)[:, [0, 2, 1]]
+        positions[:, 2] *= -1.0
+        indices = np.asarray(triangles, dtype=np.uint32).reshape(-1)
+
+        gltf["accessors"].append(
+            {
+                "bufferView": add_view(positions.tobytes(), 34962),
+                "componentType": 5126,
+                "count": len(positions),
+                "type": "VEC3",
+                "min": positions.min(axis=0).tolist(),
+                "max": positions.max(axis=0).tolist(),
+            }
+        )
+        gltf["accessors"].append(
+            {
+                "bufferView": add_view(indices.tobytes(), 34963),
+                "componentType": 5125,
+                "count": len(indices),
+                "type": "SCALAR",
+            }
+        )
+        gltf["materials"].append(
+            {
+                "name": group,
+                "pbrMetallicRoughness": {
+                    "baseColorFactor": COLOURS.get(
+                        group.split("/")[0], [0.8, 0.8, 0.8, 1.0]
+                    ),
+                    "metallicFactor": 0.0,
+                },
+            }
+        )
+        gltf["meshes"][0]["primitives"].append(
+            {
+                "attributes": {"POSITION": len(gltf["accessors"]) - 2},
+                "indices": len(gltf["accessors"]) - 1,
+                "material": len(gltf["materials"]) - 1,
+            }
+        )
+    if not gltf["meshes"][0]["primitives"]:
+        raise ValueError("nothing to preview: " + path)
+    gltf["buffers"].append({"byteLength": length})
+
+    content = json.dumps(gltf, separators=(",", ":")).encode()
+    content += b" " * (-len(content) % 4)
+    binary = b"".join(blobs)
+    with open(path, "wb") as glb_file:
+        glb_file.write(struct.pack("<III", 0x46546C67, 2, 28 + len(content) + length))
+        glb_file.write(struct.pack("<II", len(content), 0x4E4F534A))
+        glb_file.write(content)
+        glb_file.write(struct.pack("<II", length, 0x004E4942))
+        glb_file.write(binary)
+
+
+def write_preview(meshes, path):
+    """Write meshes as OBJ or binary glTF, depending on the file extension"""
+    if path.lower().endswith(".obj"):
+        write_obj(meshes, path)
+    elif path.lower().endswith(".glb"):
+        write_glb(meshes, path)
+    else:
+        raise ValueError("preview must be .obj or .glb: " + path)
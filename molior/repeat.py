@@ -6,11 +6,15 @@ import ifcopenshell.api.root
 from .baseclass import TraceClass
 from .geometry import add_2d, subtract_2d, scale_2d, distance_2d, matrix_align
 from .ifc import (
+    assign_aggregate,
+    assign_type,
     add_face_topology_epsets,
     assign_storey_byindex,
     get_type_object,
     get_material_by_name,
     get_context_by_name,
+    create_cartesian_point,
+    create_direction,
 )
 from .extrusion import Extrusion
 
@@ -82,6 +86,7 @@ class Repeat(TraceClass):
                 product=path_aggregate,
             )
 
+        instances = []
         for id_segment in range(segments):
             if self.length_segment(id_segment) < 2 * self.inset:
                 continue
@@ -110,11 +115,7 @@ class Repeat(TraceClass):
                 name=self.name,
             )
             if segments > 1:
-                api.aggregate.assign_object(
-                    self.file,
-                    products=[aggregate],
-                    relating_object=path_aggregate,
-                )
+                assign_aggregate(self.file, [aggregate], path_aggregate)
             api.geometry.edit_object_placement(
                 self.file,
                 product=aggregate,
@@ -125,11 +126,7 @@ class Repeat(TraceClass):
             )
 
             if self.parent_aggregate is not None:
-                api.aggregate.assign_object(
-                    self.file,
-                    products=[aggregate],
-                    relating_object=self.parent_aggregate,
-                )
+                assign_aggregate(self.file, [aggregate], self.parent_aggregate)
 
             for index in range(items):
                 location = add_2d(
@@ -173,6 +170,9 @@ class Repeat(TraceClass):
                                     "level": self.level,
                                     "style_families": self.style_families,
                                     "style_object": self.style_object,
+                                    "analytic_mitres": self.analytic_mitres,
+                                    "structural": self.structural,
+                                    "boundaries": self.boundaries,
                                 }
                                 vals.update(config)
                                 part = getattr(self, config["class"])(vals)
@@ -210,17 +210,15 @@ class Repeat(TraceClass):
                         name=self.name,
                     )
                     # assign the entity to the aggregate
-                    api.aggregate.assign_object(
-                        self.file,
-                        products=[entity],
-                        relating_object=aggregate,
-                    )
+                    assign_aggregate(self.file, [entity], aggregate)
 
                     # structural stuff
 
                     if (
-                        entity.is_a("IfcColumn") or entity.is_a("IfcMember")
-                    ) and hasattr(self, "chain"):
+                        (entity.is_a("IfcColumn") or entity.is_a("IfcMember"))
+                        and hasattr(self, "chain")
+                        and self.structural
+                    ):
                         # TODO support IfcPile IfcFooting
                         # TODO skip unless Pset_MemberCommon.LoadBearing
                         start = [*location, self.elevation]
@@ -244,8 +242,8 @@ class Repeat(TraceClass):
                             self.file, structural_member, face, back_cell, front_cell
                         )
                         structural_member.PredefinedType = "RIGID_JOINED_MEMBER"
-                        structural_member.Axis = self.file.createIfcDirection(
-                            [*self.normal_segment(id_segment), 0.0]
+                        structural_member.Axis = create_direction(
+                            self.file, [*self.normal_segment(id_segment), 0.0]
                         )
                         api.structural.assign_structural_analysis_model(
                             self.file,
@@ -262,10 +260,10 @@ class Repeat(TraceClass):
                                 [
                                     self.file.createIfcEdge(
                                         self.file.createIfcVertexPoint(
-                                            self.file.createIfcCartesianPoint(start)
+                                            create_cartesian_point(self.file, start)
                                         ),
                                         self.file.createIfcVertexPoint(
-                                            self.file.createIfcCartesianPoint(end)
+                                            create_cartesian_point(self.file, end)
                                         ),
                                     )
                                 ],
@@ -311,11 +309,8 @@ class Repeat(TraceClass):
                         stylename=self.style,
                         name=asset_name,
                     )
-                    api.type.assign_type(
-                        self.file,
-                        related_objects=[entity],
-                        relating_type=type_product,
-                    )
+                    # type representation maps are instanced in one go below
+                    instances.append(entity)
                     # TODO Axis Representation
 
                     # place the entity in space
@@ -357,16 +352,15 @@ class Repeat(TraceClass):
 
         # segments done
 
+        if instances:
+            assign_type(self.file, instances, type_product)
+
         if segments > 1:
             top_object = path_aggregate
         else:
             top_object = aggregate
         if self.parent_aggregate is not None:
-            api.aggregate.assign_object(
-                self.file,
-                products=[top_object],
-                relating_object=self.parent_aggregate,
-            )
+            assign_aggregate(self.file, [top_object], self.parent_aggregate)
         else:
             assign_storey_byindex(self.file, top_object, self.building, self.level)
 
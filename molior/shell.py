@@ -7,6 +7,8 @@ import ifcopenshell.api.type
 from .baseclass import BaseClass
 from .geometry import map_to_2d, map_to_2d_simple, matrix_align, inset_path
 from .ifc import (
+    assign_aggregate,
+    assign_type,
     add_face_topology_epsets,
     create_extruded_area_solid,
     create_curve_bounded_plane,
@@ -89,11 +91,7 @@ class Shell(BaseClass):
                 ifc_class=self.ifc,
                 name=self.name,
             )
-            api.aggregate.assign_object(
-                self.file,
-                products=[element],
-                relating_object=aggregate,
-            )
+            assign_aggregate(self.file, [element], aggregate)
             add_face_topology_epsets(
                 self.file,
                 element,
@@ -103,52 +101,53 @@ class Shell(BaseClass):
             )
 
             # generate space boundar(y|ies)
-            for mycell in face[1]["back_cell"], face[1]["front_cell"]:
-                if mycell:
-                    boundary = api.root.create_entity(
-                        self.file,
-                        ifc_class="IfcRelSpaceBoundary2ndLevel",
-                    )
-
-                    if mycell == face[1]["front_cell"]:
-                        # the face points to this cell
-                        nodes_2d, matrix = map_to_2d_simple(
-                            reversed(vertices), [-v for v in normal]
+            if self.boundaries:
+                for mycell in face[1]["back_cell"], face[1]["front_cell"]:
+                    if mycell:
+                        boundary = api.root.create_entity(
+                            self.file,
+                            ifc_class="IfcRelSpaceBoundary2ndLevel",
                         )
-                    else:
-                        nodes_2d, matrix = map_to_2d_simple(vertices, normal)
 
-                    curve_bounded_plane = create_curve_bounded_plane(
-                        self.file, nodes_2d, matrix
-                    )
-                    boundary.ConnectionGeometry = (
-                        self.file.createIfcConnectionSurfaceGeometry(
-                            curve_bounded_plane
+                        if mycell == face[1]["front_cell"]:
+                            # the face points to this cell
+                            nodes_2d, matrix = map_to_2d_simple(
+                                reversed(vertices), [-v for v in normal]
+                            )
+                        else:
+                            nodes_2d, matrix = map_to_2d_simple(vertices, normal)
+
+                        curve_bounded_plane = create_curve_bounded_plane(
+                            self.file, nodes_2d, matrix
                         )
-                    )
-                    if element.is_a("IfcVirtualElement"):
-                        boundary.PhysicalOrVirtualBoundary = "VIRTUAL"
-                    else:
-                        boundary.PhysicalOrVirtualBoundary = "PHYSICAL"
-                    if self.party_wall:
-                        boundary.InternalOrExternalBoundary = "EXTERNAL_FIRE"
-                    elif face[1]["face"].IsHorizontal() and not face[1][
-                        "face"
-                    ].CellBelow(self.cellcomplex):
-                        boundary.InternalOrExternalBoundary = "EXTERNAL_EARTH"
-                    elif face[1]["face"].IsInternal(self.cellcomplex):
-                        boundary.InternalOrExternalBoundary = "INTERNAL"
-                    else:
-                        boundary.InternalOrExternalBoundary = "EXTERNAL"
-                    boundary.RelatedBuildingElement = element
+                        boundary.ConnectionGeometry = (
+                            self.file.createIfcConnectionSurfaceGeometry(
+                                curve_bounded_plane
+                            )
+                        )
+                        if element.is_a("IfcVirtualElement"):
+                            boundary.PhysicalOrVirtualBoundary = "VIRTUAL"
+                        else:
+                            boundary.PhysicalOrVirtualBoundary = "PHYSICAL"
+                        if self.party_wall:
+                            boundary.InternalOrExternalBoundary = "EXTERNAL_FIRE"
+                        elif face[1]["face"].IsHorizontal() and not face[1][
+                            "face"
+                        ].CellBelow(self.cellcomplex):
+                            boundary.InternalOrExternalBoundary = "EXTERNAL_EARTH"
+                        elif face[1]["face"].IsInternal(self.cellcomplex):
+                            boundary.InternalOrExternalBoundary = "INTERNAL"
+                        else:
+                            boundary.InternalOrExternalBoundary = "EXTERNAL"
+                        boundary.RelatedBuildingElement = element
 
-                    cell_index = mycell.Get("index")
-                    if cell_index is not None:
-                        # can't assign psets to an IfcRelationship, use Description instead
-                        boundary.Description = "CellIndex " + str(cell_index)
-                    face_index = face[1]["face"].Get("index")
-                    if face_index is not None:
-                        boundary.Name = "FaceIndex " + face_index
+                        cell_index = mycell.Get("index")
+                        if cell_index is not None:
+                            # can't assign psets to an IfcRelationship, use Description instead
+                            boundary.Description = "CellIndex " + str(cell_index)
+                        face_index = face[1]["face"].Get("index")
+                        if face_index is not None:
+                            boundary.Name = "FaceIndex " + face_index
 
             if element.is_a("IfcVirtualElement"):
                 continue
@@ -157,51 +156,52 @@ class Shell(BaseClass):
 
             # TODO skip unless Pset_*Common.LoadBearing
             # generate structural surfaces
-            structural_surface = api.root.create_entity(
-                self.file,
-                ifc_class="IfcStructuralSurfaceMember",
-                name=self.style + "/" + self.name,
-                predefined_type="SHELL",
-            )
-            add_face_topology_epsets(
-                self.file,
-                structural_surface,
-                face[1]["face"],
-                face[1]["back_cell"],
-                face[1]["front_cell"],
-            )
-            structural_surface.Thickness = self.structural_thickness
-            api.structural.assign_structural_analysis_model(
-                self.file,
-                products=[structural_surface],
-                structural_analysis_model=self.structural_analysis_model,
-            )
-            api.geometry.assign_representation(
-                self.file,
-                product=structural_surface,
-                representation=self.file.createIfcTopologyRepresentation(
-                    reference_context,
-                    reference_context.ContextIdentifier,
-                    "Face",
-                    [face_surface],
-                ),
-            )
-            api.material.assign_material(
-                self.file,
-                products=[structural_surface],
-                material=get_material_by_name(
+            if self.structural:
+                structural_surface = api.root.create_entity(
                     self.file,
-                    self.style_object,
-                    name=self.structural_material,
-                    stylename=self.style,
-                ),
-            )
+                    ifc_class="IfcStructuralSurfaceMember",
+                    name=self.style + "/" + self.name,
+                    predefined_type="SHELL",
+                )
+                add_face_topology_epsets(
+                    self.file,
+                    structural_surface,
+                    face[1]["face"],
+                    face[1]["back_cell"],
+                    face[1]["front_cell"],
+                )
+                structural_surface.Thickness = self.structural_thickness
+                api.structural.assign_structural_analysis_model(
+                    self.file,
+                    products=[structural_surface],
+                    structural_analysis_model=self.structural_analysis_model,
+                )
+                api.geometry.assign_representation(
+                    self.file,
+                    product=structural_surface,
+                    representation=self.file.createIfcTopologyRepresentation(
+                        reference_context,
+                        reference_context.ContextIdentifier,
+                        "Face",
+                        [face_surface],
+                    ),
+                )
+                api.material.assign_material(
+                    self.file,
+                    products=[structural_surface],
+                    material=get_material_by_name(
+                        self.file,
+                        self.style_object,
+                        name=self.structural_material,
+                        stylename=self.style,
+                    ),
+                )
 
-            assignment = api.root.create_entity(
-                self.file, ifc_class="IfcRelAssignsToProduct"
-            )
-            assignment.RelatingProduct = structural_surface
-            assignment.RelatedObjects = [element]
+                assignment = api.root.create_entity(
+                    self.file, ifc_class="IfcRelAssignsToProduct"
+                )
+                assignment.RelatingProduct = structural_surface
+                assignment.RelatedObjects = [element]
 
             # type (IfcVirtualElementType isn't valid)
 
@@ -212,11 +212,7 @@ class Shell(BaseClass):
                 stylename=self.style,
                 name=self.typename,
             )
-            api.type.assign_type(
-                self.file,
-                related_objects=[element],
-                relating_type=product_type,
-            )
+            assign_type(self.file, [element], product_type)
 
             thickness = get_thickness(self.file, product_type)
             inner = thickness + self.offset
@@ -280,10 +276,6 @@ class Shell(BaseClass):
         if elevation in self.elevations:
             level = self.elevations[elevation]
         if self.parent_aggregate is not None:
-            api.aggregate.assign_object(
-                self.file,
-                products=[aggregate],
-                relating_object=self.parent_aggregate,
-            )
+            assign_aggregate(self.file, [aggregate], self.parent_aggregate)
         else:
             assign_storey_byindex(self.file, aggregate, self.building, level)
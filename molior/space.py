@@ -2,6 +2,7 @@ import numpy as np
 import ifcopenshell.api.root
 import ifcopenshell.api.style
 
+from topologic_core import Vertex, Face, Cell
 from .baseclass import TraceClass
 from .geometry import matrix_align
 from .ifc import (
@@ -11,8 +12,14 @@ from .ifc import (
     create_tessellation_from_mesh,
     assign_storey_byindex,
     get_context_by_name,
+    get_surface_style,
 )
 
+try:
+    from topologist.helpers import clean_mesh, orient_mesh
+except ImportError:
+    from ..topologist.helpers import clean_mesh, orient_mesh
+
 api = ifcopenshell.api
 
 
@@ -87,18 +94,27 @@ class Space(TraceClass):
 
         if not self.do_representation:
             return
-        # simple extruded representation
-        representation = create_extruded_area_solid(
-            self.file,
-            [self.corner_in(index) for index in range(len(self.path))],
-            self.height - self.ceiling,
-        )
-        representationtype = "SweptSolid"
-
         # clip if original cell has non-horizontal ceiling
         faces_ptr = []
         cell.FacesInclined(faces_ptr)
+        mesh = None
         if len(faces_ptr) > 0:
+            mesh = self.clipped_mesh(cell)
+
+        if mesh is not None:
+            representation = create_tessellation_from_mesh(self.file, *mesh)
+            representationtype = "Tessellation"
+        else:
+            # simple extruded representation
+            representation = create_extruded_area_solid(
+                self.file,
+                [self.corner_in(index) for index in range(len(self.path))],
+                self.height - self.ceiling,
+            )
+            representationtype = "SweptSolid"
+
+        # fallback to a boolean if the Topologic intersection failed
+        if mesh is None and len(faces_ptr) > 0:
             vertices, faces = cell.Mesh()
             vertices = [
                 [v[0], v[1], v[2] - self.elevation - self.floor] for v in vertices
@@ -120,40 +136,15 @@ class Space(TraceClass):
             red = np.clip(1.0 - crinkliness, 0.0, 1.0)
             green = np.clip(crinkliness, 0.0, 1.0)
             blue = np.clip(crinkliness - 1.0, 0.0, 1.0)
-            style = api.style.add_style(
-                self.file, name="Crinkliness " + str(crinkliness)
-            )
-            api.style.add_surface_style(
+            style = get_surface_style(
                 self.file,
-                style=style,
-                ifc_class="IfcSurfaceStyleShading",
-                attributes={
-                    "SurfaceColour": {
-                        "Name": None,
-                        "Red": red,
-                        "Green": green,
-                        "Blue": blue,
-                    },
-                    "Transparency": 0.5,
-                },
+                "Crinkliness " + str(crinkliness),
+                [red, green, blue],
+                0.5,
             )
             # FIXME report 159 LIGHT ON TWO SIDES: custom psets? STDERR?
         else:
-            style = api.style.add_style(self.file, name="Outside Space")
-            api.style.add_surface_style(
-                self.file,
-                style=style,
-                ifc_class="IfcSurfaceStyleShading",
-                attributes={
-                    "SurfaceColour": {
-                        "Name": None,
-                        "Red": 1.0,
-                        "Green": 1.0,
-                        "Blue": 1.0,
-                    },
-                    "Transparency": 0.9,
-                },
-            )
+            style = get_surface_style(self.file, "Outside Space", [1.0, 1.0, 1.0], 0.9)
         api.style.assign_representation_styles(
             self.file,
             shape_representation=shape,
@@ -172,3 +163,43 @@ class Space(TraceClass):
                 [0.0, 0.0, self.elevation + self.floor], [1.0, 0.0, 0.0]
             ),
         )
+
+    def clipped_mesh(self, cell):
+        """The extruded path intersected with the cell, as vertices and faces
+        relative to the floor, None if the intersection fails"""
+        bottom = self.elevation + self.floor
+        top = bottom + self.height - self.ceiling
+        path = [self.corner_in(index) for index in range(len(self.path))]
+        vertices_bottom = [Vertex.ByCoordinates(x, y, bottom) for x, y in path]
+        vertices_top = [Vertex.ByCoordinates(x, y, top) for x, y in path]
+        faces_ptr = [Face.ByVertices(vertices_bottom), Face.ByVertices(vertices_top)]
+        for index in range(len(path)):
+            following = (index + 1) % len(path)
+            faces_ptr.append(
+                Face.ByVertices(
+                    [
+                        vertices_bottom[index],
+                        vertices_bottom[following],
+                        vertices_top[following],
+                        vertices_top[index],
+                    ]
+                )
+            )
+        try:
+            prism = Cell.ByFaces(faces_ptr, 0.0001)
+            result = prism.Intersect(cell)
+        except RuntimeError:
+            return None
+        if result is None:
+            return None
+        cells_ptr = []
+        result.Cells(None, cells_ptr)
+        if not cells_ptr:
+            return None
+
+        vertices, faces = result.Mesh()
+        vertices, faces, kept = clean_mesh(vertices, faces)
+        if not faces:
+            return None
+        vertices -= [0.0, 0.0, bottom]
+        return vertices.tolist(), orient_mesh(vertices, faces)
@@ -40,6 +40,9 @@ class Style:
         self.data = {"default": {"ancestors": [], "traces": {}, "hulls": {}}}
         self.files = {}
         self.libraries = {}
+        # opening families compiled by Wall.get_family(), per style and usage
+        self.opening_families = {}
+        self.thicknesses = {}
         for arg in args:
             self.__dict__[arg] = args[arg]
 
@@ -0,0 +1,131 @@
+"""Per-stage timing and IFC entity counts for a Molior build
+
+Pass a Timings object to Molior.from_faces_and_widgets(), from_cellcomplex()
+etc. as timings=Timings(), after execute() the report() method returns a
+json-able dictionary of where the time went. Without a Timings object
+nothing is measured.
+
+A Progress object is a Timings object that can be watched and cancelled
+from another thread while the build is running.
+
+"""
+
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+
+class Timings:
+    """Wall-clock seconds, calls and new IFC entities, per stage and per style"""
+
+    def __init__(self):
+        self.stages = {}
+        self.styles = {}
+        self.done = 0
+        self.total = 0
+
+    @contextmanager
+    def stage(self, name, file=None, stylename=None):
+        """Measure everything within this context as a named stage"""
+        first_id = file.get_max_id() if file else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            entities = file.get_max_id() - first_id if file else 0
+            self.add(self.stages, name, seconds, entities)
+            if stylename is not None:
+                self.add(self.styles, stylename, seconds, entities)
+
+    @staticmethod
+    def add(table, name, seconds, entities):
+        """Accumulate a measurement"""
+        if name not in table:
+            table[name] = {"calls": 0, "seconds": 0.0, "entities": 0}
+        table[name]["calls"] += 1
+        table[name]["seconds"] += seconds
+        table[name]["entities"] += entities
+
+    def merge(self, report):
+        """Accumulate the report() of a Timings object from another process"""
+        for table, measurements in [
+            [self.stages, report["stages"]],
+            [self.styles, report["styles"]],
+        ]:
+            for name, measurement in measurements.items():
+                if name not in table:
+                    table[name] = {"calls": 0, "seconds": 0.0, "entities": 0}
+                for key in ["calls", "seconds", "entities"]:
+                    table[name][key] += measurement[key]
+
+    def step(self, done, total):
+        """Record how many of the build jobs are finished"""
+        self.done = done
+        self.total = total
+
+    def report(self):
+        """A json-able copy of all the measurements, slowest first"""
+
+        def ordered(table):
+            return {
+                name: dict(table[name])
+                for name in sorted(table, key=lambda x: -table[x]["seconds"])
+            }
+
+        return {"stages": ordered(self.stages), "styles": ordered(self.styles)}
+
+
+def stage(timings, name, file=None, stylename=None):
+    """A timed context if there is a Timings object, otherwise a no-op"""
+    if timings is None:
+        return nullcontext()
+    return timings.stage(name, file=file, stylename=stylename)
+
+
+def step(timings, done, total):
+    """Record progress through the build jobs if there is a Timings object"""
+    if timings is not None:
+        timings.step(done, total)
+
+
+class Cancelled(Exception):
+    """Raised in a build that has been cancelled with Progress.cancel()"""
+
+
+class Progress(Timings):
+    """Timings with the name of the current stage, that can be cancelled"""
+
+    def __init__(self):
+        super().__init__()
+        self.current = None
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        """Stop the build at the start of the next stage or job"""
+        self.cancelled.set()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise Cancelled(self.current)
+
+    @contextmanager
+    def stage(self, name, file=None, stylename=None):
+        self.check()
+        previous = self.current
+        self.current = name
+        try:
+            with super().stage(name, file=file, stylename=stylename):
+                yield
+        finally:
+            self.current = previous
+
+    def step(self, done, total):
+        super().step(done, total)
+        self.check()
+
+    def fraction(self):
+        """How much of the build is done, 0.0 until the jobs are counted"""
+        if not self.total:
+            return 0.0
+        return self.done / self.total
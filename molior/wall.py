@@ -12,14 +12,21 @@ from .geometry import (
     distance_2d,
     subtract_3d,
     add_3d,
-    transform,
+    transform_points,
     map_to_2d_simple,
 )
 from .ifc import (
+    assign_aggregate,
+    assign_type,
     add_face_topology_epsets,
     create_extruded_area_solid,
     clip_solid,
     create_face_surface,
+    create_cartesian_point,
+    create_direction,
+    create_axis2_placement_3d,
+    get_shared_representation,
+    add_shared_representation,
     assign_storey_byindex,
     get_type_object,
     get_material_by_name,
@@ -87,6 +94,7 @@ class Wall(TraceClass):
 
         previous_wall = None
         segments = self.segments()
+        matrices_forward, matrices_reverse = self.segment_matrices()
         for id_segment in range(segments):
             mywall = api.root.create_entity(
                 self.file,
@@ -94,11 +102,7 @@ class Wall(TraceClass):
                 name=self.name,
             )
 
-            api.aggregate.assign_object(
-                self.file,
-                products=[mywall],
-                relating_object=aggregate,
-            )
+            assign_aggregate(self.file, [mywall], aggregate)
 
             segment = self.chain.edges()[id_segment]
             face = self.chain.graph[segment[0]][1]["face"]
@@ -109,49 +113,52 @@ class Wall(TraceClass):
 
             # generate space boundaries
             boundaries = []
-            cells_ordered = face.CellsOrdered(self.cellcomplex)
-            for cell in cells_ordered:
-                if cell is None:
-                    boundaries.append(None)
-                    continue
-                boundary = api.root.create_entity(
-                    self.file,
-                    ifc_class="IfcRelSpaceBoundary2ndLevel",
-                )
-                if self.party_wall:
-                    boundary.InternalOrExternalBoundary = "EXTERNAL_FIRE"
-                elif face.IsInternal(self.cellcomplex):
-                    boundary.InternalOrExternalBoundary = "INTERNAL"
-                else:
-                    boundary.InternalOrExternalBoundary = "EXTERNAL"
-                if mywall.is_a("IfcVirtualElement"):
-                    boundary.PhysicalOrVirtualBoundary = "VIRTUAL"
-                else:
-                    boundary.PhysicalOrVirtualBoundary = "PHYSICAL"
-
-                boundary.RelatedBuildingElement = mywall
-                if cell == cells_ordered[0]:
-                    # the face points to this cell
-                    nodes_2d, matrix = map_to_2d_simple(
-                        reversed(vertices), [-v for v in normal]
+            if self.boundaries:
+                cells_ordered = face.CellsOrdered(self.cellcomplex)
+                for cell in cells_ordered:
+                    if cell is None:
+                        boundaries.append(None)
+                        continue
+                    boundary = api.root.create_entity(
+                        self.file,
+                        ifc_class="IfcRelSpaceBoundary2ndLevel",
                     )
-                else:
-                    nodes_2d, matrix = map_to_2d_simple(vertices, normal)
+                    if self.party_wall:
+                        boundary.InternalOrExternalBoundary = "EXTERNAL_FIRE"
+                    elif face.IsInternal(self.cellcomplex):
+                        boundary.InternalOrExternalBoundary = "INTERNAL"
+                    else:
+                        boundary.InternalOrExternalBoundary = "EXTERNAL"
+                    if mywall.is_a("IfcVirtualElement"):
+                        boundary.PhysicalOrVirtualBoundary = "VIRTUAL"
+                    else:
+                        boundary.PhysicalOrVirtualBoundary = "PHYSICAL"
 
-                curve_bounded_plane = create_curve_bounded_plane(
-                    self.file, nodes_2d, matrix
-                )
-                boundary.ConnectionGeometry = (
-                    self.file.createIfcConnectionSurfaceGeometry(curve_bounded_plane)
-                )
-                cell_index = cell.Get("index")
-                if cell_index is not None:
-                    # can't assign psets to an IfcRelationship, use Description instead
-                    boundary.Description = "CellIndex " + str(cell_index)
-                face_index = face.Get("index")
-                if face_index is not None:
-                    boundary.Name = "FaceIndex " + face_index
-                boundaries.append(boundary)
+                    boundary.RelatedBuildingElement = mywall
+                    if cell == cells_ordered[0]:
+                        # the face points to this cell
+                        nodes_2d, matrix = map_to_2d_simple(
+                            reversed(vertices), [-v for v in normal]
+                        )
+                    else:
+                        nodes_2d, matrix = map_to_2d_simple(vertices, normal)
+
+                    curve_bounded_plane = create_curve_bounded_plane(
+                        self.file, nodes_2d, matrix
+                    )
+                    boundary.ConnectionGeometry = (
+                        self.file.createIfcConnectionSurfaceGeometry(
+                            curve_bounded_plane
+                        )
+                    )
+                    cell_index = cell.Get("index")
+                    if cell_index is not None:
+                        # can't assign psets to an IfcRelationship, use Description instead
+                        boundary.Description = "CellIndex " + str(cell_index)
+                    face_index = face.Get("index")
+                    if face_index is not None:
+                        boundary.Name = "FaceIndex " + face_index
+                    boundaries.append(boundary)
 
             # representation
 
@@ -169,6 +176,7 @@ class Wall(TraceClass):
                 stylename=self.style,
                 name=self.typename,
             )
+            # layer set usage is edited below, so don't defer this
             api.type.assign_type(
                 self.file,
                 related_objects=[mywall],
@@ -185,29 +193,29 @@ class Wall(TraceClass):
                         inverse.OffsetFromReferenceLine = self.offset
 
             # mapping from normalised X-axis to this rotated axis
-            matrix_forward = matrix_align(
-                [*self.corner_coor(id_segment), 0.0],
-                [*self.corner_coor(id_segment + 1), 0.0],
-            )
-            matrix_reverse = np.linalg.inv(matrix_forward)
-
-            # outside face start and end coordinates
-            v_out_a = self.corner_out(id_segment)
-            v_out_b = self.corner_out(id_segment + 1)
-            # inside face start and end coordinates
-            v_in_a = self.corner_in(id_segment)
-            v_in_b = self.corner_in(id_segment + 1)
-
-            # wall is a plan shape extruded vertically
-            # FIXME solid is created and clipped even if it doesn't get used because it has no thickness
-            solid = create_extruded_area_solid(
-                self.file,
+            matrix_forward = matrices_forward[id_segment]
+            matrix_reverse = matrices_reverse[id_segment]
+
+            # inside and outside face start and end coordinates, and the
+            # corners, all mapped to the X-axis
+            (
+                v_in_a,
+                v_out_a,
+                v_out_b,
+                v_in_b,
+                corner_a,
+                corner_b,
+            ) = transform_points(
+                matrix_reverse,
                 [
-                    transform(matrix_reverse, vertex)
-                    for vertex in [v_in_a, v_out_a, v_out_b, v_in_b]
+                    self.corner_in(id_segment),
+                    self.corner_out(id_segment),
+                    self.corner_out(id_segment + 1),
+                    self.corner_in(id_segment + 1),
+                    self.corner_coor(id_segment),
+                    self.corner_coor(id_segment + 1),
                 ],
-                self.height,
-            )
+            ).tolist()
 
             # FIXME use geometry.connect_path
             # Rel Connects Path Elements
@@ -226,12 +234,8 @@ class Wall(TraceClass):
                     self.file.createIfcConnectionCurveGeometry(
                         self.file.createIfcPolyline(
                             [
-                                self.file.createIfcCartesianPoint(
-                                    transform(matrix_reverse, v_in_a)
-                                ),
-                                self.file.createIfcCartesianPoint(
-                                    transform(matrix_reverse, v_out_a)
-                                ),
+                                create_cartesian_point(self.file, v_in_a),
+                                create_cartesian_point(self.file, v_out_a),
                             ]
                         ),
                         None,
@@ -254,12 +258,8 @@ class Wall(TraceClass):
                     self.file.createIfcConnectionCurveGeometry(
                         self.file.createIfcPolyline(
                             [
-                                self.file.createIfcCartesianPoint(
-                                    transform(matrix_reverse, v_in_b)
-                                ),
-                                self.file.createIfcCartesianPoint(
-                                    transform(matrix_reverse, v_out_b)
-                                ),
+                                create_cartesian_point(self.file, v_in_b),
+                                create_cartesian_point(self.file, v_out_b),
                             ]
                         ),
                         None,
@@ -274,14 +274,8 @@ class Wall(TraceClass):
             # axis is a straight line
             axis = self.file.createIfcPolyline(
                 [
-                    self.file.createIfcCartesianPoint(point)
-                    for point in [
-                        transform(matrix_reverse, vertex)
-                        for vertex in [
-                            self.corner_coor(id_segment),
-                            self.corner_coor(id_segment + 1),
-                        ]
-                    ]
+                    create_cartesian_point(self.file, point)
+                    for point in [corner_a, corner_b]
                 ]
             )
 
@@ -290,159 +284,178 @@ class Wall(TraceClass):
             add_face_topology_epsets(self.file, mywall, face, back_cell, front_cell)
 
             # structure
-            face_surface = create_face_surface(self.file, vertices, normal)
-            # generate structural surfaces
-            structural_surface = api.root.create_entity(
-                self.file,
-                ifc_class="IfcStructuralSurfaceMember",
-                name=self.style + "/" + self.name,
-                predefined_type="SHELL",
-            )
-            assignment = api.root.create_entity(
-                self.file, ifc_class="IfcRelAssignsToProduct"
-            )
-            assignment.RelatingProduct = structural_surface
-            assignment.RelatedObjects = [mywall]
-            add_face_topology_epsets(
-                self.file, structural_surface, face, back_cell, front_cell
-            )
-            structural_surface.Thickness = self.structural_thickness
-            api.structural.assign_structural_analysis_model(
-                self.file,
-                products=[structural_surface],
-                structural_analysis_model=self.structural_analysis_model,
-            )
-            api.geometry.assign_representation(
-                self.file,
-                product=structural_surface,
-                representation=self.file.createIfcTopologyRepresentation(
-                    reference_context,
-                    reference_context.ContextIdentifier,
-                    "Face",
-                    [face_surface],
-                ),
-            )
-            api.material.assign_material(
-                self.file,
-                products=[structural_surface],
-                material=get_material_by_name(
+            if self.structural:
+                face_surface = create_face_surface(self.file, vertices, normal)
+                # generate structural surfaces
+                structural_surface = api.root.create_entity(
                     self.file,
-                    self.style_object,
-                    name=self.structural_material,
-                    stylename=self.style,
-                ),
-            )
+                    ifc_class="IfcStructuralSurfaceMember",
+                    name=self.style + "/" + self.name,
+                    predefined_type="SHELL",
+                )
+                assignment = api.root.create_entity(
+                    self.file, ifc_class="IfcRelAssignsToProduct"
+                )
+                assignment.RelatingProduct = structural_surface
+                assignment.RelatedObjects = [mywall]
+                add_face_topology_epsets(
+                    self.file, structural_surface, face, back_cell, front_cell
+                )
+                structural_surface.Thickness = self.structural_thickness
+                api.structural.assign_structural_analysis_model(
+                    self.file,
+                    products=[structural_surface],
+                    structural_analysis_model=self.structural_analysis_model,
+                )
+                api.geometry.assign_representation(
+                    self.file,
+                    product=structural_surface,
+                    representation=self.file.createIfcTopologyRepresentation(
+                        reference_context,
+                        reference_context.ContextIdentifier,
+                        "Face",
+                        [face_surface],
+                    ),
+                )
+                api.material.assign_material(
+                    self.file,
+                    products=[structural_surface],
+                    material=get_material_by_name(
+                        self.file,
+                        self.style_object,
+                        name=self.structural_material,
+                        stylename=self.style,
+                    ),
+                )
 
             # clip the top of the wall if face isn't rectangular
+            clips = []
             edges_ptr = []
             face.EdgesCrop(edges_ptr)
+            coors = []
             for edge in edges_ptr:
-                start_coor = transform(matrix_reverse, edge.StartVertex().Coordinates())
-                end_coor = transform(matrix_reverse, edge.EndVertex().Coordinates())
-                solid = clip_solid(
-                    self.file,
-                    solid,
-                    subtract_3d(
-                        start_coor,
-                        [0.0, 0.0, self.elevation],
-                    ),
-                    subtract_3d(end_coor, [0.0, 0.0, self.elevation]),
+                coors.append(edge.StartVertex().Coordinates())
+                coors.append(edge.EndVertex().Coordinates())
+            if coors:
+                coors = transform_points(matrix_reverse, coors).tolist()
+            for start_coor, end_coor in zip(coors[0::2], coors[1::2]):
+                clips.append(
+                    [
+                        subtract_3d(
+                            start_coor,
+                            [0.0, 0.0, self.elevation],
+                        ),
+                        subtract_3d(end_coor, [0.0, 0.0, self.elevation]),
+                    ]
                 )
                 # clip beyond the end of the wall if necessary
                 if (
                     el(start_coor[2]) < el(self.elevation + self.height)
                     and distance_2d(
                         start_coor[0:2],
-                        transform(matrix_reverse, self.corner_coor(id_segment + 1)),
+                        corner_b,
                     )
                     < 0.001
                 ):
-                    solid = clip_solid(
-                        self.file,
-                        solid,
-                        subtract_3d(
-                            start_coor,
-                            [0.0, 0.0, self.elevation],
-                        ),
-                        subtract_3d(
-                            add_3d(start_coor, [1.0, 0.0, 0.0]),
-                            [0.0, 0.0, self.elevation],
-                        ),
+                    clips.append(
+                        [
+                            subtract_3d(
+                                start_coor,
+                                [0.0, 0.0, self.elevation],
+                            ),
+                            subtract_3d(
+                                add_3d(start_coor, [1.0, 0.0, 0.0]),
+                                [0.0, 0.0, self.elevation],
+                            ),
+                        ]
                     )
                 elif (
                     el(start_coor[2]) < el(self.elevation + self.height)
                     and distance_2d(
                         start_coor[0:2],
-                        transform(matrix_reverse, self.corner_coor(id_segment)),
+                        corner_a,
                     )
                     < 0.001
                 ):
-                    solid = clip_solid(
-                        self.file,
-                        solid,
-                        subtract_3d(
-                            start_coor,
-                            [0.0, 0.0, self.elevation],
-                        ),
-                        subtract_3d(
-                            add_3d(start_coor, [-1.0, 0.0, 0.0]),
-                            [0.0, 0.0, self.elevation],
-                        ),
+                    clips.append(
+                        [
+                            subtract_3d(
+                                start_coor,
+                                [0.0, 0.0, self.elevation],
+                            ),
+                            subtract_3d(
+                                add_3d(start_coor, [-1.0, 0.0, 0.0]),
+                                [0.0, 0.0, self.elevation],
+                            ),
+                        ]
                     )
                 # clip beyond the start of the wall if necessary
                 if (
                     el(end_coor[2]) < el(self.elevation + self.height)
                     and distance_2d(
                         end_coor[0:2],
-                        transform(matrix_reverse, self.corner_coor(id_segment)),
+                        corner_a,
                     )
                     < 0.001
                 ):
-                    solid = clip_solid(
-                        self.file,
-                        solid,
-                        subtract_3d(
-                            end_coor,
-                            [0.0, 0.0, self.elevation],
-                        ),
-                        subtract_3d(
-                            subtract_3d(end_coor, [1.0, 0.0, 0.0]),
-                            [0.0, 0.0, self.elevation],
-                        ),
+                    clips.append(
+                        [
+                            subtract_3d(
+                                end_coor,
+                                [0.0, 0.0, self.elevation],
+                            ),
+                            subtract_3d(
+                                subtract_3d(end_coor, [1.0, 0.0, 0.0]),
+                                [0.0, 0.0, self.elevation],
+                            ),
+                        ]
                     )
                 elif (
                     el(end_coor[2]) < el(self.elevation + self.height)
                     and distance_2d(
                         end_coor[0:2],
-                        transform(matrix_reverse, self.corner_coor(id_segment + 1)),
+                        corner_b,
                     )
                     < 0.001
                 ):
-                    solid = clip_solid(
-                        self.file,
-                        solid,
-                        subtract_3d(
-                            end_coor,
-                            [0.0, 0.0, self.elevation],
-                        ),
-                        subtract_3d(
-                            subtract_3d(end_coor, [-1.0, 0.0, 0.0]),
-                            [0.0, 0.0, self.elevation],
-                        ),
+                    clips.append(
+                        [
+                            subtract_3d(
+                                end_coor,
+                                [0.0, 0.0, self.elevation],
+                            ),
+                            subtract_3d(
+                                subtract_3d(end_coor, [-1.0, 0.0, 0.0]),
+                                [0.0, 0.0, self.elevation],
+                            ),
+                        ]
                     )
 
-            if len(edges_ptr) == 0:
-                representationtype = "SweptSolid"
-            else:
-                representationtype = "Clipping"
-
             if thickness > 0:
-                shape = self.file.createIfcShapeRepresentation(
-                    body_context,
-                    body_context.ContextIdentifier,
-                    representationtype,
-                    [solid],
-                )
+                # wall is a plan shape extruded vertically, local coordinates
+                # are the same for identical walls on every storey
+                points = [v_in_a, v_out_a, v_out_b, v_in_b]
+                key = ["Wall", points, self.height, clips]
+                shape = get_shared_representation(self.file, body_context, key)
+                if shape is None:
+                    solid = create_extruded_area_solid(
+                        self.file, points.copy(), self.height
+                    )
+                    for start, end in clips:
+                        solid = clip_solid(self.file, solid, start, end)
+
+                    if len(clips) == 0:
+                        representationtype = "SweptSolid"
+                    else:
+                        representationtype = "Clipping"
+
+                    shape = self.file.createIfcShapeRepresentation(
+                        body_context,
+                        body_context.ContextIdentifier,
+                        representationtype,
+                        [solid],
+                    )
+                    add_shared_representation(self.file, shape, key)
                 api.geometry.assign_representation(
                     self.file,
                     product=mywall,
@@ -519,29 +532,31 @@ class Wall(TraceClass):
                     stylename=self.style,
                     name=typename,
                 )
-                api.type.assign_type(
-                    self.file,
-                    related_objects=[entity],
-                    relating_type=element_type,
-                )
+                assign_type(self.file, [entity], element_type)
 
-                # create an Opening to cut the wall
+                # create an Opening to cut the wall, openings of this type in
+                # walls of this thickness share geometry
 
-                myrepresentation = None
+                key = ["Opening", element_type.GlobalId, thickness]
+                myrepresentation = get_shared_representation(
+                    self.file, body_context, key
+                )
+                shared = myrepresentation is not None
 
                 # look for a Clearance representation in the Type
 
-                for representation_map in element_type.RepresentationMaps:
-                    if (
-                        representation_map.MappedRepresentation.RepresentationIdentifier
-                        == "Clearance"
-                    ):
-                        myrepresentation = self.file.createIfcShapeRepresentation(
-                            body_context,
-                            body_context.ContextIdentifier,
-                            representation_map.MappedRepresentation.RepresentationType,
-                            representation_map.MappedRepresentation.Items,
-                        )
+                if not shared:
+                    for representation_map in element_type.RepresentationMaps:
+                        if (
+                            representation_map.MappedRepresentation.RepresentationIdentifier
+                            == "Clearance"
+                        ):
+                            myrepresentation = self.file.createIfcShapeRepresentation(
+                                body_context,
+                                body_context.ContextIdentifier,
+                                representation_map.MappedRepresentation.RepresentationType,
+                                representation_map.MappedRepresentation.Items,
+                            )
 
                 if not myrepresentation:
                     # look for a Profile representation in the Type
@@ -587,14 +602,13 @@ class Wall(TraceClass):
                             )
                             swept_solid = self.file.createIfcExtrudedAreaSolid(
                                 myprofile,
-                                self.file.createIfcAxis2Placement3D(
-                                    self.file.createIfcCartesianPoint(
-                                        (0.0, -0.02, 0.0)
-                                    ),
-                                    self.file.createIfcDirection((0.0, -1.0, 0.0)),
-                                    self.file.createIfcDirection((1.0, 0.0, 0.0)),
+                                create_axis2_placement_3d(
+                                    self.file,
+                                    [0.0, -0.02, 0.0],
+                                    [0.0, -1.0, 0.0],
+                                    [1.0, 0.0, 0.0],
                                 ),
-                                self.file.createIfcDirection((0.0, 0.0, -1.0)),
+                                create_direction(self.file, [0.0, 0.0, -1.0]),
                                 thickness + 0.04,
                             )
                         except RuntimeError:
@@ -639,6 +653,9 @@ class Wall(TraceClass):
                         representation=clearance_representation,
                     )
 
+                if not shared:
+                    add_shared_representation(self.file, myrepresentation, key)
+
                 myopening = api.root.create_entity(
                     self.file,
                     ifc_class="IfcOpeningElement",
@@ -667,48 +684,49 @@ class Wall(TraceClass):
                 api.feature.add_filling(self.file, opening=myopening, element=entity)
 
                 # openings are also space boundaries
-                cill = self.elevation + db["cill"]
-                soffit = cill + opening["height"]
-                vertices = [
-                    [*left[0:2], cill],
-                    [*right[0:2], cill],
-                    [*right[0:2], soffit],
-                    [*left[0:2], soffit],
-                ]
-                cell_id = 0
-                for cell in cells_ordered:
-                    parent_boundary = boundaries[cell_id]
-                    cell_id += 1
-                    if cell is None:
-                        continue
-                    boundary = api.root.create_entity(
-                        self.file,
-                        ifc_class="IfcRelSpaceBoundary2ndLevel",
-                    )
-                    boundary.PhysicalOrVirtualBoundary = "PHYSICAL"
-                    boundary.InternalOrExternalBoundary = (
-                        parent_boundary.InternalOrExternalBoundary
-                    )
-                    boundary.RelatedBuildingElement = entity
-                    if cell == cells_ordered[0]:
-                        # the face points to this cell
-                        nodes_2d, matrix = map_to_2d_simple(
-                            reversed(vertices), [-v for v in normal]
+                if self.boundaries:
+                    cill = self.elevation + db["cill"]
+                    soffit = cill + opening["height"]
+                    vertices = [
+                        [*left[0:2], cill],
+                        [*right[0:2], cill],
+                        [*right[0:2], soffit],
+                        [*left[0:2], soffit],
+                    ]
+                    cell_id = 0
+                    for cell in cells_ordered:
+                        parent_boundary = boundaries[cell_id]
+                        cell_id += 1
+                        if cell is None:
+                            continue
+                        boundary = api.root.create_entity(
+                            self.file,
+                            ifc_class="IfcRelSpaceBoundary2ndLevel",
                         )
-                    else:
-                        nodes_2d, matrix = map_to_2d_simple(vertices, normal)
+                        boundary.PhysicalOrVirtualBoundary = "PHYSICAL"
+                        boundary.InternalOrExternalBoundary = (
+                            parent_boundary.InternalOrExternalBoundary
+                        )
+                        boundary.RelatedBuildingElement = entity
+                        if cell == cells_ordered[0]:
+                            # the face points to this cell
+                            nodes_2d, matrix = map_to_2d_simple(
+                                reversed(vertices), [-v for v in normal]
+                            )
+                        else:
+                            nodes_2d, matrix = map_to_2d_simple(vertices, normal)
 
-                    curve_bounded_plane = create_curve_bounded_plane(
-                        self.file, nodes_2d, matrix
-                    )
-                    boundary.ConnectionGeometry = (
-                        self.file.createIfcConnectionSurfaceGeometry(
-                            curve_bounded_plane
+                        curve_bounded_plane = create_curve_bounded_plane(
+                            self.file, nodes_2d, matrix
                         )
-                    )
-                    boundary.Description = parent_boundary.Description
-                    boundary.Name = parent_boundary.Name
-                    boundary.ParentBoundary = parent_boundary
+                        boundary.ConnectionGeometry = (
+                            self.file.createIfcConnectionSurfaceGeometry(
+                                curve_bounded_plane
+                            )
+                        )
+                        boundary.Description = parent_boundary.Description
+                        boundary.Name = parent_boundary.Name
+                        boundary.ParentBoundary = parent_boundary
 
     def init_openings(self):
         """We need an array for openings the same size as wall segments array"""
@@ -758,8 +776,8 @@ class Wall(TraceClass):
         """rectangle coordinates of an opening on the axis"""
         opening = self.openings[id_segment][id_opening]
         db = self.get_family(opening["family"])
-        width = db["list"][opening["size"]]["width"]
-        height = db["list"][opening["size"]]["height"]
+        width = float(db["width"][opening["size"]])
+        height = float(db["height"][opening["size"]])
         up = opening["up"]
         along = opening["along"]
         segment_direction = self.direction_segment(id_segment)
@@ -818,50 +836,88 @@ class Wall(TraceClass):
         )
 
     def get_family(self, usage):
-        """Retrieve an family definition via the style"""
+        """Retrieve a family definition via the style, compiled once per style
+
+        As well as the 'list' of sizes, 'width', 'height', 'side' and 'end'
+        are arrays indexed by size, 'heights' has the available heights for
+        each width, tallest first, and 'widest' is size indices widest first.
+        """
+        style_object = self.__dict__.get("style_object")
+        if style_object is None:
+            families = self.__dict__.setdefault("families", {})
+        else:
+            families = style_object.opening_families.setdefault(self.style, {})
+        if usage not in families:
+            families[usage] = self.compile_family(usage)
+        return families[usage]
+
+    def compile_family(self, usage):
+        """Family definition from the style with arrays of dimensions"""
+        family = None
         if usage in self.style_openings:
-            family = self.style_openings[usage]
-            if family["family"] in self.style_families:
-                return {
-                    "list": self.style_families[family["family"]],
-                    "type": family["type"],
-                    "cill": family["cill"],
+            opening = self.style_openings[usage]
+            if opening["family"] in self.style_families:
+                family = {
+                    "list": self.style_families[opening["family"]],
+                    "type": opening["type"],
+                    "cill": opening["cill"],
                 }
-        return {
-            "list": [
-                {
-                    "typename": "error",
-                    "height": 1.0,
-                    "width": 1.0,
-                    "side": 0.1,
-                    "end": 0.0,
-                },
-                {
-                    "typename": "error",
-                    "height": 2.0,
-                    "width": 1.0,
-                    "side": 0.1,
-                    "end": 0.0,
-                },
-                {
-                    "typename": "error",
-                    "height": 2.0,
-                    "width": 2.0,
-                    "side": 0.1,
-                    "end": 0.0,
-                },
-                {
-                    "typename": "error",
-                    "height": 1.0,
-                    "width": 2.0,
-                    "side": 0.1,
-                    "end": 0.0,
-                },
-            ],
-            "type": "window",
-            "cill": 1.0,
-            "material": "Error",
-        }
+        if family is None:
+            family = {
+                "list": [
+                    {
+                        "typename": "error",
+                        "height": 1.0,
+                        "width": 1.0,
+                        "side": 0.1,
+                        "end": 0.0,
+                    },
+                    {
+                        "typename": "error",
+                        "height": 2.0,
+                        "width": 1.0,
+                        "side": 0.1,
+                        "end": 0.0,
+                    },
+                    {
+                        "typename": "error",
+                        "height": 2.0,
+                        "width": 2.0,
+                        "side": 0.1,
+                        "end": 0.0,
+                    },
+                    {
+                        "typename": "error",
+                        "height": 1.0,
+                        "width": 2.0,
+                        "side": 0.1,
+                        "end": 0.0,
+                    },
+                ],
+                "type": "window",
+                "cill": 1.0,
+                "material": "Error",
+            }
+
+        for dimension in ["width", "height", "side", "end"]:
+            family[dimension] = np.array(
+                [size[dimension] for size in family["list"]], dtype=float
+            )
+        family["heights"] = {}
+        for width in set(family["width"].tolist()):
+            heights = family["height"][family["width"] == width]
+            family["heights"][width] = np.sort(heights)[::-1]
+        family["widest"] = np.argsort(family["width"], kind="stable")[::-1].tolist()
+        return family
+
+    def opening_table(self, id_segment):
+        """Width, side and end space of every opening in a segment"""
+        table = np.zeros((3, len(self.openings[id_segment])))
+        for index, opening in enumerate(self.openings[id_segment]):
+            db = self.get_family(opening["family"])
+            size = opening["size"]
+            table[:, index] = db["width"][size], db["side"][size], db["end"][size]
+        return table
 
     def fix_heights(self, id_segment):
         """Top of openings need to be lower than ceiling soffit"""
@@ -872,38 +928,23 @@ class Wall(TraceClass):
 
         for opening in openings:
             db = self.get_family(opening["family"])
-            mylist = db["list"]
             opening["up"] = db["cill"]
-            width_original = mylist[opening["size"]]["width"]
-
-            # list heights of possible openings
-            heights = []
-            for index in range(len(mylist)):
-                if not mylist[index]["width"] == width_original:
-                    continue
-                heights.append(mylist[index]["height"])
 
             # find the tallest height that fits, or shortest that doesn't fit
-            heights.sort(reverse=True)
-            for height in heights:
-                best_height = height
-                if best_height + opening["up"] <= soffit:
-                    break
+            heights = db["heights"][float(db["width"][opening["size"]])]
+            fits = np.flatnonzero(heights + opening["up"] <= soffit)
+            best_height = heights[fits[0]] if len(fits) else heights[-1]
 
             # figure out which opening this is
-            for index in range(len(mylist)):
-                if mylist[index]["height"] == best_height:
-                    opening["size"] = index
+            opening["size"] = int(np.flatnonzero(db["height"] == best_height)[-1])
+            height = float(db["height"][opening["size"]])
 
             # lower if we can if the top don't fit
-            while (
-                opening["up"] + mylist[opening["size"]]["height"] >= soffit
-                and opening["up"] >= 0.15
-            ):
+            while opening["up"] + height >= soffit and opening["up"] >= 0.15:
                 opening["up"] -= 0.15
 
             # put it in wall segment if top fits
-            if opening["up"] + mylist[opening["size"]]["height"] <= soffit:
+            if opening["up"] + height <= soffit:
                 openings_new.append(opening)
 
         self.openings[id_segment] = openings_new
@@ -911,88 +952,66 @@ class Wall(TraceClass):
     def fix_overlaps(self, id_segment):
         """openings don't want to overlap with each other"""
         openings = self.openings[id_segment]
-
-        for id_opening in range(len(openings) - 1):
-            # this opening has a width and side space
-            opening = openings[id_opening]
-            db = self.get_family(opening["family"])
-            width = db["list"][opening["size"]]["width"]
-            side = db["list"][opening["size"]]["side"]
-
-            # how much side space does the next opening need
-            opening_next = openings[id_opening + 1]
-            db_next = self.get_family(opening_next["family"])
-            side_next = db_next["list"][opening_next["size"]]["side"]
-
-            # minimum allowable space between this opening and the next
-            border = side
-            if side_next > border:
-                border = side_next
-
-            # next opening needs to be at least this far along
-            along_ok = opening["along"] + width + border
-            if along_ok <= openings[id_opening + 1]["along"]:
-                continue
-            openings[id_opening + 1]["along"] = along_ok
+        if len(openings) < 2:
+            return
+        widths, sides, ends = self.opening_table(id_segment)
+        along = np.array([opening["along"] for opening in openings])
+
+        # minimum allowable space between each opening and the next
+        borders = np.maximum(sides[:-1], sides[1:])
+
+        # each opening needs to be at least this far along, pushed along by
+        # all the openings before it
+        spacing = np.concatenate([[0.0], np.cumsum(widths[:-1] + borders)])
+        pushed = np.maximum.accumulate(along - spacing)
+        for id_opening in np.flatnonzero(pushed > along - spacing).tolist():
+            openings[id_opening]["along"] = float(
+                spacing[id_opening] + pushed[id_opening]
+            )
 
     def fix_overrun(self, id_segment):
         """openings can't go past the end of the segment"""
         openings = self.openings[id_segment]
+        widths, sides, ends = self.opening_table(id_segment)
 
         # this is the furthest an opening can go
         length = self.length_segment(id_segment) - self.border(id_segment)[1]
 
-        db_last = self.get_family(openings[-1]["family"])
-        width_last = db_last["list"][openings[-1]["size"]]["width"]
-        end_last = db_last["list"][openings[-1]["size"]]["end"]
-
-        overrun = openings[-1]["along"] + width_last + end_last - length
+        overrun = openings[-1]["along"] + widths[-1] + ends[-1] - length
         if overrun <= 0.0:
             return
 
         # slide all the openings back by amount of overrun
-        for id_opening in range(len(openings)):
-            openings[id_opening]["along"] -= overrun
+        for opening in openings:
+            opening["along"] -= float(overrun)
 
     def fix_underrun(self, id_segment):
         """openings can't start before beginning of segment"""
         openings = self.openings[id_segment]
+        widths, sides, ends = self.opening_table(id_segment)
 
-        db_first = self.get_family(openings[0]["family"])
-        end_first = db_first["list"][openings[0]["size"]]["end"]
-
-        underrun = self.border(id_segment)[0] + end_first - openings[0]["along"]
+        underrun = self.border(id_segment)[0] + ends[0] - openings[0]["along"]
         if underrun <= 0.0:
             return
 
+        # minimum allowable space between each opening and the next
+        borders = np.maximum(sides[:-1], sides[1:])
+
         # fix underrun by sliding all but last opening forward by no more than amount of underrun
         # or until spaced by border
         for id_opening in reversed(range(len(openings) - 1)):
-            # this opening has a width and side space
             opening = openings[id_opening]
-            db = self.get_family(opening["family"])
-            width = db["list"][opening["size"]]["width"]
-            side = db["list"][opening["size"]]["side"]
-
-            # how much side space does the next opening need
-            opening_next = openings[id_opening + 1]
-            db_next = self.get_family(opening_next["family"])
-            side_next = db_next["list"][opening_next["size"]]["side"]
-
-            # minimum allowable space between this opening and the next
-            border = side
-            if side_next > border:
-                border = side_next
 
             # this opening needs to be at least this far along
-            along_ok = openings[id_opening + 1]["along"] - border - width
+            along_ok = (
+                openings[id_opening + 1]["along"]
+                - borders[id_opening]
+                - widths[id_opening]
+            )
             if opening["along"] >= along_ok:
                 continue
 
-            slide = along_ok - opening["along"]
-            if slide > underrun:
-                slide = underrun
-            opening["along"] += slide
+            opening["along"] += float(min(along_ok - opening["along"], underrun))
 
     def border(self, id_segment):
         """set border distances if inside corners"""
@@ -1034,38 +1053,14 @@ class Wall(TraceClass):
 
     def length_openings(self, id_segment):
         """minimum wall length the currently defined openings require"""
-        openings = self.openings[id_segment]
-        if len(openings) == 0:
+        if len(self.openings[id_segment]) == 0:
             return 0.0
+        widths, sides, ends = self.opening_table(id_segment)
 
-        db_first = self.get_family(openings[0]["family"])
-        end_first = db_first["list"][openings[0]["size"]]["end"]
-        db_last = self.get_family(openings[-1]["family"])
-        end_last = db_last["list"][openings[-1]["size"]]["end"]
-
-        # start with end spacing
-        length_openings = end_first + end_last
-        # add width of all the openings
-        for id_opening in range(len(openings)):
-            db = self.get_family(openings[id_opening]["family"])
-            width = db["list"][openings[id_opening]["size"]]["width"]
-            length_openings += width
-
-        # add wall between openings
-        for id_opening in range(len(openings) - 1):
-            if not len(openings) > 1:
-                continue
-            db = self.get_family(openings[id_opening]["family"])
-            side = db["list"][openings[id_opening]["size"]]["side"]
-
-            db_next = self.get_family(openings[id_opening + 1]["family"])
-            side_next = db_next["list"][openings[id_opening + 1]["size"]]["side"]
-
-            if side_next > side:
-                side = side_next
-            length_openings += side
-
-        return length_openings
+        # end spacing, width of all the openings and wall between openings
+        return float(
+            ends[0] + ends[-1] + widths.sum() + np.maximum(sides[:-1], sides[1:]).sum()
+        )
 
     def fix_segment(self, id_segment):
         openings = self.openings[id_segment]
@@ -1091,21 +1086,9 @@ class Wall(TraceClass):
 
             if db["type"] == "window" and not found_window:
                 # set any window to narrowest of this height
-                mylist = db["list"]
-                height_original = mylist[opening["size"]]["height"]
-
-                widths = {}
-                for index in range(len(mylist)):
-                    widths[index] = mylist[index]["width"]
-                widest_dict = {
-                    key: value
-                    for key, value in sorted(widths.items(), key=lambda item: item[1])
-                }
-                widest = list(widest_dict.keys())
-                widest.reverse()
-
-                for size in widest:
-                    if not mylist[size]["height"] == height_original:
+                height_original = db["height"][opening["size"]]
+                for size in db["widest"]:
+                    if not db["height"][size] == height_original:
                         continue
                     opening["size"] = size
                 new_openings.append(opening)
@@ -1118,27 +1101,15 @@ class Wall(TraceClass):
         for opening in openings:
             db = self.get_family(opening["family"])
             if db["type"] == "door":
-                mylist = db["list"]
-                height_original = mylist[opening["size"]]["height"]
-
-                widths = {}
-                for index in range(len(mylist)):
-                    widths[index] = mylist[index]["width"]
-                widest_dict = {
-                    key: value
-                    for key, value in sorted(widths.items(), key=lambda item: item[1])
-                }
-                widest = list(widest_dict.keys())
-                widest.reverse()
-
-                for size in widest:
-                    if not mylist[size]["height"] == height_original:
+                height_original = db["height"][opening["size"]]
+                for size in db["widest"]:
+                    if not db["height"][size] == height_original:
                         continue
                     opening["size"] = size
 
                     # this fits the widest door for the wall ignoring any window
-                    end = mylist[size]["end"]
-                    width = mylist[size]["width"]
+                    end = db["end"][size]
+                    width = db["width"][size]
                     if end + width + end < length:
                         break
 
@@ -1146,21 +1117,9 @@ class Wall(TraceClass):
         for opening in openings:
             db = self.get_family(opening["family"])
             if db["type"] == "window":
-                mylist = db["list"]
-                height_original = mylist[opening["size"]]["height"]
-
-                widths = {}
-                for index in range(len(mylist)):
-                    widths[index] = mylist[index]["width"]
-                widest_dict = {
-                    key: value
-                    for key, value in sorted(widths.items(), key=lambda item: item[1])
-                }
-                widest = list(widest_dict.keys())
-                widest.reverse()
-
-                for size in widest:
-                    if not mylist[size]["height"] == height_original:
+                height_original = db["height"][opening["size"]]
+                for size in db["widest"]:
+                    if not db["height"][size] == height_original:
                         continue
                     opening["size"] = size
 
@@ -1213,13 +1172,12 @@ class Wall(TraceClass):
         length = self.length_segment(id_segment)
         module = length / len(openings)
 
-        along = module / 2
-        for id_opening in range(len(openings)):
-            db = self.get_family(openings[id_opening]["family"])
-            width = db["list"][openings[id_opening]["size"]]["width"]
-            openings[id_opening]["along"] = along - (width / 2)
-            along += module
-        return
+        widths, sides, ends = self.opening_table(id_segment)
+        steps = np.full(len(openings), module)
+        steps[0] = module / 2
+        along = np.cumsum(steps) - widths / 2
+        for opening, value in zip(openings, along.tolist()):
+            opening["along"] = value
 
     def fix_gable(self, id_segment):
         """Shorten or delete openings that project above roofline"""
@@ -1246,21 +1204,16 @@ class Wall(TraceClass):
                 # try and find a shorter window
                 opening = openings[id_opening]
                 db = self.get_family(opening["family"])
-                mylist = db["list"]
-                width_original = mylist[opening["size"]]["width"]
-                height_original = mylist[opening["size"]]["height"]
-                # list heights of possible openings
-                heights = []
-                lookup = {}
-                for index in range(len(mylist)):
-                    if not mylist[index]["width"] == width_original:
-                        continue
-                    lookup[mylist[index]["height"]] = index
-                    if mylist[index]["height"] < height_original:
-                        heights.append(mylist[index]["height"])
-                if len(heights) > 0:
-                    heights.sort(reverse=True)
-                    self.openings[id_segment][id_opening]["size"] = lookup[heights[0]]
+                width = db["width"][opening["size"]]
+                height = db["height"][opening["size"]]
+                # possible openings of this width that are shorter
+                shorter = (db["width"] == width) & (db["height"] < height)
+                if shorter.any():
+                    best_height = db["height"][shorter].max()
+                    same = (db["width"] == width) & (db["height"] == best_height)
+                    self.openings[id_segment][id_opening]["size"] = int(
+                        np.flatnonzero(same)[-1]
+                    )
                     self.fix_gable(id_segment)
                     return
                 else:
@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import batch2ifc
+from molior.style import Style
+from topologist.helpers import clean_mesh, faces_from_dxf, faces_from_obj
+from benchmark.synthetic import box
+
+
+def write_obj(path, stylename="default"):
+    count = 0
+    with open(path, "w") as obj_file:
+        obj_file.write("usemtl " + stylename + "\n")
+        for face in box(0.0, 0.0, 0.0, 4.0, 3.0, 3.0):
+            for vertex in face:
+                obj_file.write("v {} {} {}\n".format(*vertex))
+            obj_file.write(
+                "f " + " ".join(str(count + i + 1) for i in range(len(face))) + "\n"
+            )
+            count += len(face)
+
+
+def test_obj(tmp_path):
+    write_obj(tmp_path / "box.obj", "courtyard")
+    faces = faces_from_obj(str(tmp_path / "box.obj"))
+    assert len(faces) == 6
+    assert faces[0].Get("stylename") == "courtyard"
+
+
+def test_clean_mesh():
+    vertices = [
+        [0.0, 0.0, 0.0],
+        [1.0, 0.0, 0.0],
+        [1.0, 1.0, 0.0],
+        [0.0, 1.0, 0.0],
+        [0.0, 0.0, 0.00001],
+        [2.0, 0.0, 0.0],
+    ]
+    faces = [
+        [0, 1, 2, 3],
+        # same as the first, vertex 4 is welded to vertex 0
+        [4, 1, 2, 3],
+        # reversed duplicate
+        [3, 2, 1, 0],
+        # zero area
+        [0, 1, 5],
+        # repeated corner
+        [0, 1, 1, 2],
+    ]
+    welded, faces, kept = clean_mesh(vertices, faces)
+    assert len(welded) == 5
+    assert faces == [[0, 1, 2, 3], [0, 1, 2]]
+    assert kept == [0, 4]
+    assert clean_mesh([], [])[1] == []
+
+
+def test_dxf(tmp_path):
+    ezdxf = pytest.importorskip("ezdxf")
+    for version in ["R2000", "R12"]:
+        doc = ezdxf.new(version)
+        for x in [0.0, 4.0]:
+            mesh = doc.modelspace().add_polyface()
+            mesh.append_faces(
+                [
+                    [[x, 0.0, 0.0], [x + 4.0, 0.0, 0.0], [x + 4.0, 3.0, 0.0]],
+                    [[x, 0.0, 0.0], [x + 1.0, 0.0, 0.0], [x + 2.0, 0.0, 0.0]],
+                    [[4.0, 0.0, 0.0], [4.0, 3.0, 0.0], [4.0, 3.0, 3.0]],
+                ]
+            )
+        doc.saveas(tmp_path / "test.dxf")
+        # degenerate faces are dropped, the shared face is only used once
+        assert len(faces_from_dxf(str(tmp_path / "test.dxf"))) == 3
+
+
+def test_convert(tmp_path):
+    write_obj(tmp_path / "box.obj")
+    (tmp_path / "empty.obj").write_text("v 0 0 0\nv 1 0 0\nv 2 0 0\nf 1 2 3\n")
+    (tmp_path / "manifest.txt").write_text("# a comment\nbox.obj\tout/other.ifc\n")
+
+    jobs = batch2ifc.collect_jobs([str(tmp_path)], str(tmp_path / "out"))
+    assert [os.path.basename(job["output"]) for job in jobs] == [
+        "box.ifc",
+        "empty.ifc",
+    ]
+    jobs += batch2ifc.collect_jobs([str(tmp_path / "manifest.txt")])
+    assert jobs[2]["output"] == str(tmp_path / "out" / "other.ifc")
+    assert jobs[2]["hash"] == jobs[0]["hash"]
+    preview = batch2ifc.collect_jobs(
+        [str(tmp_path / "box.obj")], profile={"structural": False}
+    )
+    assert preview[0]["hash"] != jobs[0]["hash"]
+
+    style = Style({"share_dir": os.path.join(os.path.dirname(__file__), "..", "share")})
+    assert not batch2ifc.up_to_date(jobs[0])
+    result = batch2ifc.convert(jobs[0], style)
+    assert result["status"] == "done"
+    assert result["entities"] > 0
+    assert os.path.exists(jobs[0]["output"])
+    assert batch2ifc.up_to_date(jobs[0])
+    assert not batch2ifc.up_to_date(jobs[2])
+
+    result = batch2ifc.convert(jobs[1], style)
+    assert result["status"] == "failed"
+    assert not os.path.exists(jobs[1]["output"])
+
+
+def test_pool(tmp_path):
+    write_obj(tmp_path / "one.obj")
+    write_obj(tmp_path / "two.obj")
+    share_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "share"))
+    jobs = batch2ifc.collect_jobs([str(tmp_path)])
+    summaries = batch2ifc.run(jobs, share_dir, processes=2, timeout=120)
+    assert sorted(summary["status"] for summary in summaries) == ["done", "done"]
+    assert os.path.exists(tmp_path / "one.ifc")
+    assert os.path.exists(tmp_path / "two.ifc")
+
+
+def test_collisions(tmp_path):
+    for folder in ["one", "two"]:
+        os.makedirs(tmp_path / folder)
+        write_obj(tmp_path / folder / "box.obj")
+    inputs = [str(tmp_path / "one"), str(tmp_path / "two")]
+    assert len(batch2ifc.collect_jobs(inputs)) == 2
+    # --output-dir would flatten both into the same file
+    with pytest.raises(ValueError):
+        batch2ifc.collect_jobs(inputs, str(tmp_path / "out"))
+
+
+def test_duplicate_inputs(tmp_path):
+    write_obj(tmp_path / "box.obj")
+    (tmp_path / "manifest.txt").write_text("box.obj\ta.ifc\nbox.obj\tb.ifc\n")
+    share_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "share"))
+    jobs = batch2ifc.collect_jobs([str(tmp_path / "manifest.txt")])
+    summaries = batch2ifc.run(jobs, share_dir, processes=2, timeout=120)
+    # each result is credited to the job that produced it
+    assert sorted(summary["status"] for summary in summaries) == ["done", "done"]
+    assert sorted(summary["id"] for summary in summaries) == [0, 1]
+    for summary in summaries:
+        assert summary["output"] == jobs[summary["id"]]["output"]
+
+
+def test_timeout(tmp_path):
+    write_obj(tmp_path / "one.obj")
+    write_obj(tmp_path / "two.obj")
+    write_obj(tmp_path / "three.obj")
+    share_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "share"))
+    jobs = batch2ifc.collect_jobs([str(tmp_path)])
+    # killed workers are replaced, and don't hold up the others
+    summaries = batch2ifc.run(jobs, share_dir, processes=2, timeout=0.01)
+    assert [summary["status"] for summary in summaries] == ["timeout"] * 3
+    assert not os.path.exists(tmp_path / "one.ifc")
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import json
+
+from topologic_core import CellComplex
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmark import run_case, compare
+from benchmark.synthetic import building, spec_name
+import topologist.cellcomplex
+
+assert topologist.cellcomplex
+
+
+def test_synthetic():
+    faces, widgets = building(storeys=2, rooms=3, bays=2)
+    assert len(faces) == 2 * 3 * 2 * 6
+    assert len(widgets) == 12
+    cellcomplex = CellComplex.ByFaces(faces, 0.0001)
+    cells = []
+    cellcomplex.Cells(None, cells)
+    assert len(cells) == 12
+
+    faces, widgets = building(
+        storeys=2, rooms=3, bays=1, roof="pitched", voids=1, outside=2
+    )
+    cellcomplex = CellComplex.ByFaces(faces, 0.0001)
+    cellcomplex.ApplyDictionary(faces)
+    cellcomplex.AllocateCells(widgets)
+    cells = []
+    cellcomplex.Cells(None, cells)
+    assert len(cells) == 7
+    usages = sorted(cell.Get("usage") for cell in cells)
+    assert usages.count("outside") == 2
+    # the roof space has no walls all round
+    assert usages.count("void") == 2
+    assert spec_name({"storeys": 2, "rooms": 3, "roof": "pitched", "voids": 1}) == (
+        "2x3x1-pitched-v1"
+    )
+
+
+def test_run_and_compare():
+    result = run_case({"storeys": 1, "rooms": 1, "bays": 1})
+    result = json.loads(json.dumps(result))
+    assert result["faces"] == 6
+    assert result["cells"] == 1
+    assert result["entities"] > 0
+    assert result["stages"]["Wall"]["calls"] > 0
+    for seconds in result["seconds"].values():
+        assert seconds >= 0.0
+    # a default build and one with a stashed CellComplex are both timed
+    assert "get_cellcomplex_from_ifc" in result["seconds"]
+    assert "get_cellcomplex_from_stash" in result["seconds"]
+
+    baseline = {"a": result}
+    assert compare({"a": result}, baseline) == []
+    slower = json.loads(json.dumps(result))
+    slower["seconds"]["execute"] += 10.0
+    slower["entities"] *= 2
+    assert [item[1] for item in compare({"a": slower}, baseline)] == [
+        "execute",
+        "entities",
+    ]
+    # unknown cases are ignored
+    assert compare({"b": slower}, baseline) == []
@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+
+import os
+import sys
+
+import pytest
+import numpy as np
+import ifcopenshell.api.geometry
+import ifcopenshell.api.root
+import ifcopenshell.util.placement
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from molior import Molior
+import molior.ifc
+from molior.ifc import (
+    begin_bulk_relationships,
+    assign_aggregate,
+    assign_container,
+    flush_bulk_relationships,
+)
+from benchmark.synthetic import building
+
+
+def build(bulk_relationships):
+    faces, widgets = building(
+        storeys=2, rooms=1, width=4.0, depth=3.0, usages=["Bedroom"]
+    )
+
+    molior_object = Molior.from_faces_and_widgets(
+        faces=faces,
+        widgets=widgets,
+        name="My Building",
+        bulk_relationships=bulk_relationships,
+    )
+    molior_object.execute()
+    return molior_object.file
+
+
+def parent(product):
+    for attribute in ["Decomposes", "ContainedInStructure"]:
+        for rel in getattr(product, attribute, []):
+            if rel.is_a("IfcRelAggregates"):
+                return rel.RelatingObject
+            return rel.RelatingStructure
+
+
+def summary(ifc):
+    """Every product with its parent, type and world location"""
+    results = []
+    for product in ifc.by_type("IfcProduct"):
+        if product.is_a("IfcStructuralItem") or product.is_a("IfcAnnotation"):
+            continue
+        up = parent(product)
+        types = [rel.RelatingType for rel in getattr(product, "IsTypedBy", [])]
+        location = None
+        if product.ObjectPlacement:
+            matrix = ifcopenshell.util.placement.get_local_placement(
+                product.ObjectPlacement
+            )
+            location = tuple(np.round(matrix, 4).flatten().tolist())
+        results.append(
+            (
+                product.is_a(),
+                str(product.Name),
+                up.is_a() if up else None,
+                str(up.Name) if up else None,
+                str(types[0].Name) if types else None,
+                location,
+            )
+        )
+    return sorted(results, key=str)
+
+
+def test_same_as_api():
+    bulk = build(True)
+    api = build(False)
+    assert summary(bulk) == summary(api)
+    for ifc_class in ["IfcWall", "IfcSlab", "IfcWindow", "IfcSpace", "IfcMember"]:
+        assert len(bulk.by_type(ifc_class)) == len(api.by_type(ifc_class))
+
+    # one relationship per parent
+    for rel_class, attribute in [
+        ["IfcRelAggregates", "RelatingObject"],
+        ["IfcRelContainedInSpatialStructure", "RelatingStructure"],
+        ["IfcRelDefinesByType", "RelatingType"],
+    ]:
+        parents = [getattr(rel, attribute) for rel in bulk.by_type(rel_class)]
+        assert len(parents) == len(set(parents))
+    assert len(bulk.by_type("IfcRelationship")) < len(api.by_type("IfcRelationship"))
+
+
+def test_placement():
+    ifc = molior.ifc.init(name="My Project")
+    site = molior.ifc.get_site_by_name(ifc, ifc.by_type("IfcProject")[0], "My Site")
+    building = molior.ifc.get_building_by_name(ifc, site, "My Building")
+    molior.ifc.create_storeys(ifc, building, {3.0: 0})
+    storey = ifc.by_type("IfcBuildingStorey")[0]
+
+    begin_bulk_relationships(ifc)
+    matrix = np.eye(4)
+    matrix[0:3, 3] = [1.0, 2.0, 4.0]
+    wall = ifcopenshell.api.root.create_entity(ifc, ifc_class="IfcWall")
+    ifcopenshell.api.geometry.edit_object_placement(ifc, product=wall, matrix=matrix)
+    gone = ifcopenshell.api.root.create_entity(ifc, ifc_class="IfcWall")
+    assign_container(ifc, [wall, gone], storey)
+    assembly = ifcopenshell.api.root.create_entity(ifc, ifc_class="IfcElementAssembly")
+    ifcopenshell.api.geometry.edit_object_placement(ifc, product=assembly)
+    assign_aggregate(ifc, [wall], assembly)
+    assign_container(ifc, [assembly], storey)
+    # nothing happens until the queue is flushed
+    assert not wall.ContainedInStructure
+    ifc.remove(gone)
+    flush_bulk_relationships(ifc)
+
+    # the last assignment wins
+    assert not wall.ContainedInStructure
+    assert wall.Decomposes[0].RelatingObject == assembly
+    assert assembly.ContainedInStructure[0].RelatingStructure == storey
+
+    # placements are relative to the new parents, but haven't moved
+    assert wall.ObjectPlacement.PlacementRelTo == assembly.ObjectPlacement
+    assert assembly.ObjectPlacement.PlacementRelTo == storey.ObjectPlacement
+    location = assembly.ObjectPlacement.RelativePlacement.Location
+    assert location.Coordinates == (0.0, 0.0, -3.0)
+    assert np.allclose(
+        ifcopenshell.util.placement.get_local_placement(wall.ObjectPlacement), matrix
+    )
+
+    # without a queue the api is used directly
+    other = ifcopenshell.api.root.create_entity(ifc, ifc_class="IfcWall")
+    assign_container(ifc, [other], storey)
+    assert other.ContainedInStructure[0].RelatingStructure == storey
+    assert len(ifc.by_type("IfcRelContainedInSpatialStructure")) == 1
+
+
+def test_failed_job():
+    faces, widgets = building(rooms=1, width=4.0, depth=3.0)
+    molior_object = Molior.from_faces_and_widgets(faces=faces, widgets=widgets)
+    molior_object.init_building()
+
+    def fail():
+        raise ValueError("bad job")
+
+    with pytest.raises(ValueError):
+        molior_object.run_jobs([[fail, {}, None]], {})
+    # nothing is left queued, later assignments happen immediately
+    ifc = molior_object.file
+    wall = ifcopenshell.api.root.create_entity(ifc, ifc_class="IfcWall")
+    assign_container(ifc, [wall], ifc.by_type("IfcBuildingStorey")[0])
+    assert wall.ContainedInStructure
@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import json
+
+import ifcopenshell
+import ifcopenshell.util.element
+from topologic_core import CellComplex
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from molior import Molior
+from molior.timings import Timings
+from benchmark.synthetic import building
+import topologist.cellcomplex
+
+assert topologist.cellcomplex
+
+
+def dictionaries(cellcomplex):
+    cells_ptr = []
+    cellcomplex.Cells(None, cells_ptr)
+    faces_ptr = []
+    cellcomplex.Faces(None, faces_ptr)
+    return [cell.DumpDictionary() for cell in cells_ptr], [
+        [face.DumpDictionary(), face.IsVertical()] for face in faces_ptr
+    ]
+
+
+def test_serialise():
+    faces, widgets = building(storeys=2, rooms=2, roof="pitched", outside=1)
+    cellcomplex = CellComplex.ByFaces(faces, 0.0001)
+    cellcomplex.ApplyDictionary(faces)
+    cellcomplex.AllocateCells(widgets)
+
+    data = json.loads(json.dumps(cellcomplex.Serialise()))
+    copy = CellComplex.BySerialised(data)
+    assert dictionaries(copy) == dictionaries(cellcomplex)
+    assert {"usage": "outside"} in dictionaries(copy)[0]
+
+    # geometry that doesn't match the dictionaries is rejected
+    data["faces"].pop()
+    assert CellComplex.BySerialised(data) is None
+
+
+def test_cache(tmp_path):
+    faces, widgets = building(rooms=2, roof="pitched")
+    results = []
+    for attempt in range(2):
+        timings = Timings()
+        molior_object = Molior.from_faces_and_widgets(
+            faces=faces, widgets=widgets, cache_dir=str(tmp_path), timings=timings
+        )
+        molior_object.execute()
+        results.append(molior_object)
+    assert "ByFaces" in results[0].timings.stages
+    assert "ByFaces" not in results[1].timings.stages
+    assert len(os.listdir(tmp_path)) == 1
+    for ifc_class in ["IfcWall", "IfcSlab", "IfcSpace", "IfcRoof", "IfcWindow"]:
+        assert len(results[0].file.by_type(ifc_class)) == len(
+            results[1].file.by_type(ifc_class)
+        )
+
+    # a different usage is a different building
+    widgets[0].Set("usage", "kitchen")
+    Molior.from_faces_and_widgets(faces=faces, widgets=widgets, cache_dir=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 2
+
+    # a broken cache file is ignored
+    for name in os.listdir(tmp_path):
+        (tmp_path / name).write_bytes(b"rubbish")
+    timings = Timings()
+    molior_object = Molior.from_faces_and_widgets(
+        faces=faces, widgets=widgets, cache_dir=str(tmp_path), timings=timings
+    )
+    assert "ByFaces" in timings.stages
+    assert molior_object.cellcomplex
+
+
+def usages(cellcomplex):
+    cells_ptr = []
+    cellcomplex.Cells(None, cells_ptr)
+    return sorted(str(cell.Get("usage")) for cell in cells_ptr)
+
+
+def test_stash_in_ifc(tmp_path):
+    faces, widgets = building(storeys=2, rooms=2, roof="pitched", outside=1)
+    molior_object = Molior.from_faces_and_widgets(
+        faces=faces, widgets=widgets, stash_cellcomplex=True
+    )
+    molior_object.execute()
+    molior_object.file.write(str(tmp_path / "stash.ifc"))
+
+    ifc = ifcopenshell.open(str(tmp_path / "stash.ifc"))
+    building_entity = ifc.by_type("IfcBuilding")[0]
+    assert ifcopenshell.util.element.get_pset(building_entity, "EPset_CellComplex")
+    stashed = Molior.get_cellcomplex_from_ifc(building_entity)
+    assert stashed.Get("name") == building_entity.Name
+    assert usages(stashed) == usages(molior_object.cellcomplex)
+
+    # the stash is ignored once the tessellation or usages are edited
+    for element in ifc.by_type("IfcAnnotation"):
+        if element.ObjectType == "USAGE" and element.Name == "outside":
+            element.Name = "kitchen"
+    rebuilt = Molior.get_cellcomplex_from_ifc(building_entity)
+    assert "outside" in usages(stashed)
+    assert "outside" not in usages(rebuilt)
+    assert "kitchen" in usages(rebuilt)
+
+    # not stashed by default
+    molior_object = Molior.from_faces_and_widgets(faces=faces, widgets=widgets)
+    molior_object.execute()
+    assert not ifcopenshell.util.element.get_pset(
+        molior_object.building, "EPset_CellComplex"
+    )
+    assert usages(Molior.get_cellcomplex_from_ifc(molior_object.building)) == (
+        usages(molior_object.cellcomplex)
+    )
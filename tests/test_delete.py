@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from molior import Molior
+from molior.ifc import (
+    delete_ifc_product,
+    get_structural_analysis_model_by_name,
+    purge_unused,
+)
+from benchmark.synthetic import building
+
+
+def build():
+    # a 4m x 3m box on a 4m x 3m box, outside walls facing north and south are blank
+    faces, widgets = building(
+        storeys=2,
+        rooms=1,
+        width=4.0,
+        depth=3.0,
+        sides="blank",
+        usages=["Living", "Bedroom"],
+    )
+    molior_object = Molior.from_faces_and_widgets(
+        faces=faces, widgets=widgets, name="My Building"
+    )
+    molior_object.execute()
+    return molior_object.file
+
+
+def summary(ifc):
+    return {
+        ifc_class: len(ifc.by_type(ifc_class))
+        for ifc_class in [
+            "IfcProduct",
+            "IfcRelationship",
+            "IfcRepresentation",
+            "IfcObjectPlacement",
+            "IfcPropertySet",
+            "IfcConnectionGeometry",
+            "IfcStyledItem",
+            "IfcTypeProduct",
+            "IfcMaterialDefinition",
+        ]
+    }
+
+
+@pytest.fixture
+def built():
+    return build(), build()
+
+
+def test_bulk_delete(built):
+    ifc_api, ifc_bulk = built
+    assert ifc_bulk.by_type("IfcWall")
+    assert ifc_bulk.by_type("IfcSpace")
+
+    for ifc, bulk in [[ifc_api, False], [ifc_bulk, True]]:
+        building = ifc.by_type("IfcBuilding")[0]
+        structural_model = get_structural_analysis_model_by_name(
+            ifc, building, building.Name
+        )
+        delete_ifc_product(ifc, building, bulk=bulk)
+        delete_ifc_product(ifc, structural_model, bulk=bulk)
+        purge_unused(ifc)
+
+    assert not ifc_bulk.by_type("IfcBuildingStorey")
+    assert not ifc_bulk.by_type("IfcElement")
+    assert not ifc_bulk.by_type("IfcSpace")
+    assert not ifc_bulk.by_type("IfcStructuralItem")
+    assert not ifc_bulk.by_type("IfcRelSpaceBoundary")
+    assert len(ifc_bulk.by_type("IfcProject")) == 1
+    assert len(ifc_bulk.by_type("IfcSite")) == 1
+
+    # nothing left dangling
+    for rel in ifc_bulk.by_type("IfcRelationship"):
+        for value in rel:
+            assert value != ()
+
+    assert summary(ifc_bulk) == summary(ifc_api)
+    assert len(list(ifc_bulk)) == len(list(ifc_api))
@@ -12,8 +12,8 @@ from molior import Molior
 import molior.ifc
 
 
-@pytest.fixture
-def closed_extrusion():
+@pytest.fixture(params=[False, True])
+def closed_extrusion(request):
     trace = ugraph.graph()
     normals = topologist.normals.Normals()
     vertex_0 = Vertex.ByCoordinates(1.0, 0.0, 3.15)
@@ -93,6 +93,7 @@ def closed_extrusion():
         normals=normals.normals,
         name="My House",
         elevations={3.15: 2},
+        analytic_mitres=request.param,
     )
     molior_object.init_building()
     extrusion = molior_object.build_trace(
@@ -195,5 +196,33 @@ def test_closed_extrusion_properties(closed_extrusion):
     assert closed_extrusion[0].__dict__["class"] == "Extrusion"
 
 
+def test_closed_extrusion_mitres(closed_extrusion):
+    ifc = closed_extrusion[0].file
+    representations = [
+        representation
+        for element in ifc.by_type("IfcElement")
+        if element.Representation
+        for representation in element.Representation.Representations
+        if representation.RepresentationIdentifier == "Body"
+    ]
+    assert len(representations) == 12
+    if closed_extrusion[0].analytic_mitres:
+        tessellations = [
+            representation
+            for representation in representations
+            if representation.RepresentationType == "Tessellation"
+        ]
+        for representation in tessellations:
+            (faceset,) = representation.Items
+            # both ends are mitred, corners are only moved along the axis
+            assert len(faceset.Faces) == len(faceset.Coordinates.CoordList) / 2 + 2
+        # the gutter is too wide for the acute corner, so it is clipped
+        assert len(tessellations) == 10
+        assert len(ifc.by_type("IfcBooleanClippingResult")) == 4
+    else:
+        for representation in representations:
+            assert representation.RepresentationType == "Clipping"
+
+
 if __name__ == "__main__":
     pytest.main()
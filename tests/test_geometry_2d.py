@@ -17,7 +17,14 @@ from molior.geometry import (
     map_to_2d,
     map_to_2d_simple,
     normal_by_perimeter,
+    matrix_align,
+    matrices_align,
+    transform_points,
+    offset_path,
+    rigid_inverse,
+    clip_prism,
 )
+from molior.baseclass import TraceClass
 import topologist
 
 assert topologist
@@ -128,5 +135,101 @@ def test_normal():
     assert face.Normal() == normal_by_perimeter(polygon3d)
 
 
+def test_batch():
+    starts = [[0.0, 0.0, 1.0], [2.0, 3.0, 0.0], [1.0, 1.0, 1.0]]
+    ends = [[1.0, 0.0, 1.0], [2.0, 5.0, 0.0], [1.0, 1.0, 1.0]]
+    matrices = matrices_align(starts, ends)
+    assert matrices.shape == (3, 4, 4)
+    for matrix, start, end in zip(matrices, starts, ends):
+        assert matrix.tolist() == matrix_align(start, end).tolist()
+
+    points = [[1.0, 2.0, 3.0], [0.0, 0.0, 0.0]]
+    assert transform_points(matrices[1], points).tolist() == [
+        transform(matrices[1], point) for point in points
+    ]
+    assert transform_points(matrices[1], [[1.0, 2.0]]).shape == (1, 2)
+
+    inverses = rigid_inverse(matrices)
+    for matrix, inverse in zip(matrices, inverses):
+        assert np.allclose(inverse, np.linalg.inv(matrix))
+
+
+def test_offset_path():
+    square = [[0.0, 0.0], [4.0, 0.0], [4.0, 4.0], [0.0, 4.0]]
+    # anticlockwise, so right-hand offsets are outside
+    assert offset_path(square, 1.0).tolist() == [
+        [-1.0, -1.0],
+        [5.0, -1.0],
+        [5.0, 5.0],
+        [-1.0, 5.0],
+    ]
+    assert offset_path(square, -1.0).tolist() == [
+        [1.0, 1.0],
+        [3.0, 1.0],
+        [3.0, 3.0],
+        [1.0, 3.0],
+    ]
+
+    # open path ends are square, straight through corners too
+    path = [[0.0, 0.0], [2.0, 0.0], [4.0, 0.0], [4.0, 4.0]]
+    assert offset_path(path, 1.0, closed=False).tolist() == [
+        [0.0, -1.0],
+        [2.0, -1.0],
+        [5.0, -1.0],
+        [5.0, 4.0],
+    ]
+
+
+def test_clip_prism():
+    square = [[0.0, 0.0], [0.0, 1.0], [1.0, 1.0], [1.0, 0.0]]
+    # a square profile extruded 10 along Z, mitred at 45 degrees at both ends
+    vertices, faces = clip_prism(
+        square,
+        10.0,
+        [[[0.0, 0.0, 1.0], [1.0, 0.0, -1.0]], [[0.0, 0.0, 9.0], [1.0, 0.0, 1.0]]],
+    )
+    assert vertices[:, 2].tolist() == [2.0, 2.0, 1.0, 1.0, 8.0, 8.0, 9.0, 9.0]
+    assert len(faces) == 6
+    assert faces[0] == [3, 2, 1, 0]
+    assert faces[2] == [0, 1, 5, 4]
+
+    # the profile is reversed so faces point outwards
+    assert vertices[:4, 0:2].tolist() == square[::-1]
+
+    # an unclipped end is square
+    vertices, faces = clip_prism(square, 10.0, [[[0.0, 0.0, 9.0], [1.0, 0.0, 1.0]]])
+    assert vertices[:, 2].tolist()[0:4] == [0.0, 0.0, 0.0, 0.0]
+
+    # planes parallel to the extrusion or beyond the end need a boolean
+    assert clip_prism(square, 10.0, [[[0.5, 0.0, 0.0], [1.0, 0.0, 0.0]]]) is None
+    assert clip_prism(square, 10.0, [[[0.0, 0.0, 10.5], [1.0, 0.0, 1.0]]]) is None
+
+
+def test_trace_corners():
+    trace = TraceClass(
+        {
+            "path": [[0.0, 0.0], [4.0, 0.0], [4.0, 3.0]],
+            "closed": False,
+            "normals": {},
+            "normal_set": "bottom",
+        }
+    )
+    assert trace.corner_coor(-1) == [4.0, 3.0]
+    assert trace.length_segment(1) == 3.0
+    assert trace.direction_segment(1) == [0.0, 1.0]
+    assert trace.normal_segment(1) == [1.0, -0.0]
+    assert trace.corner_offset(1, -0.5) == [3.5, 0.5]
+    assert trace.corner_offset(4, -0.5) == [3.5, 0.5]
+    assert trace.corner_offset(2, -0.5) == [3.5, 3.0]
+    forward, reverse = trace.segment_matrices()
+    assert transform_points(reverse[1], [[4.0, 3.0]]).tolist() == [[3.0, 0.0]]
+    assert np.allclose(forward[1] @ reverse[1], np.identity(4))
+
+    # cached arrays follow a new path
+    trace.path = [[0.0, 0.0], [0.0, 4.0], [-3.0, 4.0]]
+    assert trace.corner_offset(1, -0.5) == [-0.5, 3.5]
+    assert trace.length_segment(0) == 4.0
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import ifcopenshell.api.geometry
+import ifcopenshell.api.root
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import molior.ifc
+from molior.ifc import (
+    create_cartesian_point,
+    create_direction,
+    create_axis2_placement_3d,
+    create_extruded_area_solid,
+    purge_unused,
+)
+
+
+def test_interning():
+    ifc = molior.ifc.init(name="My Project")
+    point = create_cartesian_point(ifc, [1.0, 2.0, 3.0])
+    assert create_cartesian_point(ifc, (1.0, 2.0, 3.0)) == point
+    assert create_cartesian_point(ifc, [1.0, 2.0, 3.0000000001]) == point
+    assert create_cartesian_point(ifc, [1.0, 2.0]) != point
+    assert create_direction(ifc, [0.0, 0.0, 1.0]) == create_direction(
+        ifc, [-0.0, 0.0, 1.0]
+    )
+
+    origin = create_axis2_placement_3d(ifc)
+    assert origin.Location.Coordinates == (0.0, 0.0, 0.0)
+    assert origin.Axis is None
+    assert create_axis2_placement_3d(ifc, [0.0, 0.0, 0.0]) == origin
+    assert create_axis2_placement_3d(ifc, [0.0, 0.0, 0.0], [0.0, 0.0, 1.0]) != origin
+
+    # a pooled entity removed from the file is created again
+    ifc.remove(point)
+    point = create_cartesian_point(ifc, [1.0, 2.0, 3.0])
+    assert point.Coordinates == (1.0, 2.0, 3.0)
+
+
+def test_shared_by_solids():
+    ifc = molior.ifc.init(name="My Project")
+    profile = [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]]
+    solid_a = create_extruded_area_solid(ifc, [*profile], 3.0)
+    solid_b = create_extruded_area_solid(ifc, [*profile], 2.0)
+    assert solid_a.Position == solid_b.Position
+    assert solid_a.ExtrudedDirection == solid_b.ExtrudedDirection
+    assert (
+        solid_a.SweptArea.OuterCurve.Points[0] == solid_b.SweptArea.OuterCurve.Points[0]
+    )
+
+    # purging an unused solid leaves the used one intact
+    body_context = molior.ifc.get_context_by_name(ifc, context_identifier="Body")
+    wall = ifcopenshell.api.root.create_entity(ifc, ifc_class="IfcWall")
+    ifcopenshell.api.geometry.assign_representation(
+        ifc,
+        product=wall,
+        representation=ifc.createIfcShapeRepresentation(
+            body_context, body_context.ContextIdentifier, "SweptSolid", [solid_b]
+        ),
+    )
+    ifc.remove(solid_a)
+    purge_unused(ifc)
+    assert solid_b.Position.Location.Coordinates == (0.0, 0.0, 0.0)
+    assert len(solid_b.SweptArea.OuterCurve.Points) == 5
+    assert len(ifc.by_type("IfcExtrudedAreaSolid")) == 1
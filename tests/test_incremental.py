@@ -0,0 +1,186 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import ifcopenshell
+import ifcopenshell.util.element
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from molior import Molior, PREVIEW
+from molior.ifc import merge_fragment, purge_unused
+from benchmark.synthetic import building
+
+
+def build(file=None, upper="Bedroom", incremental=False, profile={}, tag=True):
+    # a 4m x 3m box on a 4m x 3m box, outside walls facing north and south are blank
+    faces, widgets = building(
+        storeys=2,
+        rooms=1,
+        width=4.0,
+        depth=3.0,
+        sides="blank",
+        usages=["Living", upper],
+    )
+    molior_object = Molior.from_faces_and_widgets(
+        file=file,
+        faces=faces,
+        widgets=widgets,
+        name="My Building",
+        incremental=incremental,
+        tag_fingerprints=tag,
+        **profile,
+    )
+    molior_object.execute()
+    return molior_object.file
+
+
+def guids(ifc, ifc_class):
+    return {entity.GlobalId for entity in ifc.by_type(ifc_class)}
+
+
+def storey_guids(ifc, name):
+    return {
+        element.GlobalId
+        for element in ifc.by_type("IfcElement")
+        if element.ContainedInStructure
+        and element.ContainedInStructure[0].RelatingStructure.is_a("IfcBuildingStorey")
+        and element.ContainedInStructure[0].RelatingStructure.Name == name
+    }
+
+
+def relations(ifc):
+    return {
+        element.GlobalId: [
+            getattr(ifcopenshell.util.element.get_container(element), "GlobalId", None),
+            getattr(ifcopenshell.util.element.get_type(element), "GlobalId", None),
+            getattr(ifcopenshell.util.element.get_aggregate(element), "GlobalId", None),
+        ]
+        for element in ifc.by_type("IfcElement")
+    }
+
+
+def test_unchanged():
+    ifc = build()
+    classes = [
+        "IfcBuildingElement",
+        "IfcSpace",
+        "IfcOpeningElement",
+        "IfcStructuralMember",
+    ]
+    before = {ifc_class: guids(ifc, ifc_class) for ifc_class in classes}
+    counts = {
+        ifc_class: len(ifc.by_type(ifc_class))
+        for ifc_class in ["IfcProduct", "IfcRelationship", "IfcRelSpaceBoundary"]
+    }
+    assert len(ifc.by_type("IfcBuildingStorey")) == 3
+
+    build(file=ifc, incremental=True)
+    assert len(ifc.by_type("IfcBuildingStorey")) == 3
+    assert len(ifc.by_type("IfcBuilding")) == 1
+    assert before == {ifc_class: guids(ifc, ifc_class) for ifc_class in classes}
+    assert counts == {ifc_class: len(ifc.by_type(ifc_class)) for ifc_class in counts}
+
+
+def test_untagged():
+    ifc = build(tag=False)
+    assert not [
+        pset
+        for pset in ifc.by_type("IfcPropertySet")
+        if pset.Name == "EPset_Fingerprint"
+    ]
+
+    # nothing can be reused, so an incremental build replaces everything
+    walls = guids(ifc, "IfcWall")
+    build(file=ifc, incremental=True)
+    assert not guids(ifc, "IfcWall") & walls
+    assert len(ifc.by_type("IfcWall")) == len(walls)
+
+
+def test_changed_usage():
+    ifc = build()
+    ground = storey_guids(ifc, "0")
+    spaces = guids(ifc, "IfcSpace")
+    assert ground
+
+    build(file=ifc, upper="Kitchen", incremental=True)
+    # ground floor walls are untouched, the upper floor space is replaced
+    assert storey_guids(ifc, "0") == ground
+    assert len(ifc.by_type("IfcSpace")) == len(spaces)
+    assert len(guids(ifc, "IfcSpace") & spaces) == len(spaces) - 1
+
+    # a fresh build produces the same amount of stuff
+    fresh = build(upper="Kitchen")
+    for ifc_class in [
+        "IfcBuildingElement",
+        "IfcSpace",
+        "IfcOpeningElement",
+        "IfcRelSpaceBoundary",
+        "IfcStructuralMember",
+        "IfcStructuralConnection",
+        "IfcAnnotation",
+    ]:
+        assert len(ifc.by_type(ifc_class)) == len(fresh.by_type(ifc_class))
+    for space in ifc.by_type("IfcSpace"):
+        assert len(space.BoundedBy) == len(
+            [other for other in fresh.by_type("IfcSpace") if other.Name == space.Name][
+                0
+            ].BoundedBy
+        )
+
+
+def test_changed_usage_merged():
+    # the Blender add-on regenerates in a copy and merges it back
+    ifc = build()
+    skeleton_max_id = ifc.get_max_id()
+    copy = ifcopenshell.file.from_string(ifc.to_string())
+    build(file=copy, upper="Kitchen", incremental=True)
+    purge_unused(copy)
+    merge_fragment(ifc, copy, skeleton_max_id)
+
+    for ifc_class in [
+        "IfcBuildingElement",
+        "IfcSpace",
+        "IfcOpeningElement",
+        "IfcRelSpaceBoundary",
+        "IfcStructuralItem",
+        "IfcAnnotation",
+    ]:
+        assert guids(ifc, ifc_class) == guids(copy, ifc_class)
+    for ifc_class in ["IfcProduct", "IfcPropertySet"]:
+        assert len(ifc.by_type(ifc_class)) == len(copy.by_type(ifc_class))
+    # relationships may be merged, but relate the same things
+    assert relations(ifc) == relations(copy)
+    assert sorted(space.Name for space in ifc.by_type("IfcSpace")) == sorted(
+        space.Name for space in copy.by_type("IfcSpace")
+    )
+
+    # and can be regenerated again
+    build(file=ifc, upper="Bedroom", incremental=True)
+    assert len(ifc.by_type("IfcSpace")) == len(copy.by_type("IfcSpace"))
+
+
+def test_preview():
+    ifc = build(profile=PREVIEW)
+    assert ifc.by_type("IfcWall")
+    assert len(ifc.by_type("IfcSpace")) == 2
+    for ifc_class in [
+        "IfcStructuralItem",
+        "IfcRelSpaceBoundary",
+        "IfcAnnotation",
+    ]:
+        assert not ifc.by_type(ifc_class)
+    assert not ifc.by_type("IfcBuilding")[0].Representation
+
+    # a full build replaces products built with a different profile
+    walls = guids(ifc, "IfcWall")
+    build(file=ifc, incremental=True)
+    assert not guids(ifc, "IfcWall") & walls
+    fresh = build()
+    for ifc_class in [
+        "IfcBuildingElement",
+        "IfcSpace",
+        "IfcRelSpaceBoundary",
+        "IfcStructuralItem",
+        "IfcAnnotation",
+    ]:
+        assert len(ifc.by_type(ifc_class)) == len(fresh.by_type(ifc_class))
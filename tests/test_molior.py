@@ -97,6 +97,38 @@ def test_wall_closed_path():
     assert wall4.__dict__["guid"] == "my building"
 
 
+def test_wall_opening_family():
+    wall5 = Wall(
+        {
+            "closed": False,
+            "path": [[0.0, 0.0], [5.0, 0.0]],
+            "height": 3.0,
+            "ceiling": 0.2,
+            "style_openings": {},
+            "style_families": {},
+        }
+    )
+    wall5.init_openings()
+
+    # no such family in the style, so an error family is used
+    db = wall5.get_family("kitchen outside window")
+    assert db is wall5.get_family("kitchen outside window")
+    assert db["width"].tolist() == [1.0, 1.0, 2.0, 2.0]
+    assert db["heights"][1.0].tolist() == [2.0, 1.0]
+    assert db["widest"] == [3, 2, 1, 0]
+
+    wall5.populate_exterior_openings(0, "kitchen", 0)
+    wall5.fix_heights(0)
+    assert wall5.openings[0][0]["size"] == 3
+    assert wall5.openings[0][0]["up"] == 1.0
+    assert wall5.length_openings(0) == 2.0
+
+    wall5.fix_segment(0)
+    assert len(wall5.openings[0]) == 2
+    assert [opening["size"] for opening in wall5.openings[0]] == [3, 3]
+    assert [opening["along"] for opening in wall5.openings[0]] == [0.25, 2.75]
+
+
 def test_molior_defaults():
     molior = Molior()
     assert molior.share_dir == "share"
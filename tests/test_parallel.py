@@ -0,0 +1,167 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import ifcopenshell
+import ifcopenshell.util.element
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from molior import Molior
+from molior.ifc import merge_fragment
+from molior.timings import Timings
+from benchmark.synthetic import building
+
+
+def build(processes, partition_by="storey"):
+    faces, widgets = building(
+        storeys=2, rooms=2, bays=1, roof="pitched", styles=["default", "fancy"]
+    )
+    molior_object = Molior.from_faces_and_widgets(
+        faces=faces,
+        widgets=widgets,
+        name="My Building",
+        processes=processes,
+        partition_by=partition_by,
+        timings=Timings(),
+    )
+    molior_object.execute()
+    return molior_object
+
+
+def counts(ifc, ifc_class="IfcProduct"):
+    result = {}
+    for entity in ifc.by_type(ifc_class):
+        result[entity.is_a()] = result.get(entity.is_a(), 0) + 1
+    return result
+
+
+def materials(ifc):
+    """Every object with the class of its material"""
+    result = []
+    for entity in ifc.by_type("IfcObjectDefinition"):
+        material = ifcopenshell.util.element.get_material(entity)
+        result.append(
+            (entity.is_a(), str(entity.Name), str(material and material.is_a()))
+        )
+    return sorted(result)
+
+
+def relating(ifc, ifc_class, name):
+    """How many relationships of a class share a relating entity, at most"""
+    result = {}
+    for relationship in ifc.by_type(ifc_class):
+        key = getattr(relationship, name).id()
+        result[key] = result.get(key, 0) + 1
+    return max(result.values())
+
+
+def test_parallel():
+    serial = build(1).file
+    for partition_by in ["storey", "style"]:
+        molior_object = build(2, partition_by)
+        ifc = molior_object.file
+        assert counts(ifc) == counts(serial)
+        relationships = counts(ifc, "IfcRelationship")
+        expected = counts(serial, "IfcRelationship")
+        # identical material layer set usages are only shared within a fragment
+        del relationships["IfcRelAssociatesMaterial"]
+        del expected["IfcRelAssociatesMaterial"]
+        assert relationships == expected
+        assert materials(ifc) == materials(serial)
+        assert len(ifc.by_type("IfcBuildingStorey")) == len(
+            serial.by_type("IfcBuildingStorey")
+        )
+        assert len(ifc.by_type("IfcTypeObject")) == len(serial.by_type("IfcTypeObject"))
+        # fragments are merged into existing relationships
+        assert relating(ifc, "IfcRelDefinesByType", "RelatingType") == 1
+        assert relating(ifc, "IfcRelAggregates", "RelatingObject") == 1
+        assert (
+            relating(ifc, "IfcRelContainedInSpatialStructure", "RelatingStructure") == 1
+        )
+        guids = [entity.GlobalId for entity in ifc.by_type("IfcRoot")]
+        assert len(guids) == len(set(guids))
+        for space in ifc.by_type("IfcSpace"):
+            assert space.BoundedBy
+        stages = molior_object.timings.report()["stages"]
+        assert stages["merge_fragment"]["calls"] > 1
+        assert "Wall" in stages
+
+
+def test_fingerprints_round_trip(tmp_path):
+    faces, widgets = building(storeys=2, rooms=2, bays=1, roof="pitched")
+    molior_object = Molior.from_faces_and_widgets(faces=faces, widgets=widgets)
+    path = str(tmp_path / "cellcomplex.json.gz")
+    Molior.write_cellcomplex(path, molior_object.cellcomplex)
+    copy = Molior.from_cellcomplex(cellcomplex=Molior.read_cellcomplex(path))
+    # worker processes select their jobs by fingerprint
+    assert sorted(job[2] for job in copy.jobs()) == sorted(
+        job[2] for job in molior_object.jobs()
+    )
+    assert [job[2] for job in molior_object.jobs(fingerprints=False)] == [None] * len(
+        molior_object.jobs()
+    )
+
+
+def test_merge_new_building():
+    faces, widgets = building(storeys=1, rooms=2)
+    ifc = Molior.from_faces_and_widgets(faces=faces, widgets=widgets, name="One")
+    ifc.execute()
+    ifc = ifc.file
+    skeleton_max_id = ifc.get_max_id()
+    fragment = ifcopenshell.file.from_string(ifc.to_string())
+    Molior.from_faces_and_widgets(
+        file=fragment, faces=faces, widgets=widgets, name="Two"
+    ).execute()
+    merge_fragment(ifc, fragment, skeleton_max_id)
+
+    # the new Site joins the existing aggregation of the Project
+    project = ifc.by_type("IfcProject")[0]
+    assert len(project.IsDecomposedBy) == 1
+    assert [site.Name for site in project.IsDecomposedBy[0].RelatedObjects] == [
+        "One",
+        "Two",
+    ]
+    assert counts(ifc) == counts(fragment)
+    assert counts(ifc, "IfcRelationship") == counts(fragment, "IfcRelationship")
+    assert materials(ifc) == materials(fragment)
+
+
+def test_merge_edited_entities():
+    faces, widgets = building(storeys=1, rooms=2)
+    ifc = Molior.from_faces_and_widgets(faces=faces, widgets=widgets, name="One")
+    ifc.execute()
+    ifc = ifc.file
+    skeleton_max_id = ifc.get_max_id()
+    base = ifcopenshell.file.from_string(ifc.to_string())
+    element_type = ifc.by_type("IfcTypeObject")[0]
+    maps = len(element_type.RepresentationMaps or [])
+    wall = ifc.by_type("IfcWall")[0]
+
+    fragments = []
+    for name in ["Clearance", "Reference"]:
+        fragment = ifcopenshell.file.from_string(base.to_string())
+        context = fragment.by_type("IfcGeometricRepresentationContext")[0]
+        representation_map = fragment.createIfcRepresentationMap(
+            fragment.createIfcAxis2Placement3D(
+                fragment.createIfcCartesianPoint([0.0, 0.0, 0.0])
+            ),
+            fragment.createIfcShapeRepresentation(context, name, "Curve3D", []),
+        )
+        fragment_type = fragment.by_id(element_type.id())
+        fragment_type.RepresentationMaps = list(
+            fragment_type.RepresentationMaps or []
+        ) + [representation_map]
+        fragments.append(fragment)
+    fragments[0].by_type("IfcSite")[0].Name = "Renamed"
+    fragments[0].remove(fragments[0].by_id(wall.id()))
+
+    for fragment in fragments:
+        merge_fragment(ifc, fragment, skeleton_max_id, base)
+
+    # edits by both fragments are kept, the second fragment didn't rename
+    assert [
+        item.MappedRepresentation.RepresentationIdentifier
+        for item in element_type.RepresentationMaps[maps:]
+    ] == ["Clearance", "Reference"]
+    assert ifc.by_type("IfcSite")[0].Name == "Renamed"
+    assert wall.id() not in [item.id() for item in ifc.by_type("IfcWall")]
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import json
+import struct
+import pytest
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from molior import Molior
+from molior.preview import meshes, triangulate, write_preview
+from benchmark.synthetic import building
+
+
+def volume(vertices, faces):
+    triangles = np.array(
+        [triangle for face in faces for triangle in triangulate(vertices, face)]
+    )
+    a, b, c = [vertices[triangles[:, index]] for index in range(3)]
+    return np.einsum("ij,ij->i", a, np.cross(b, c)).sum() / 6
+
+
+def test_triangulate():
+    vertices = np.array(
+        [
+            [0.0, 0.0, 1.0],
+            [2.0, 0.0, 1.0],
+            [2.0, 2.0, 1.0],
+            [1.0, 1.0, 1.0],
+            [0.0, 2.0, 1.0],
+        ]
+    )
+    triangles = triangulate(vertices, [0, 1, 2, 3, 4])
+    assert len(triangles) == 3
+    # nothing outside the reflex corner is filled and the winding is kept
+    area = 0.0
+    for triangle in triangles:
+        a, b, c = vertices[triangle]
+        assert np.cross(b - a, c - a)[2] > 0.0
+        area += np.cross(b - a, c - a)[2] / 2
+    assert abs(area - 3.0) < 0.000001
+
+
+def test_preview(tmp_path):
+    faces, widgets = building(storeys=2, rooms=2, bays=1, roof="pitched")
+    molior_object = Molior.from_faces_and_widgets(
+        faces=faces, widgets=widgets, name="My Building"
+    )
+    result = meshes(molior_object)
+    # nothing was built as IFC
+    assert molior_object.file is None
+
+    assert "Wall/default/exterior" in result
+    assert "Wall/default/interior" in result
+    assert "Shell/default/pitched-roof" in result
+    for group, (vertices, faces) in result.items():
+        assert vertices.shape[1] == 3
+        assert volume(vertices, faces) > 0.0
+
+    # two rooms side by side, each 4m x 5m, the interior wall is 0.16m thick
+    vertices, faces = result["Wall/default/interior"]
+    assert abs(volume(vertices, faces) - 5.0 * 0.16 * 6.0) < 0.001
+
+    write_preview(result, str(tmp_path / "preview.obj"))
+    with open(tmp_path / "preview.obj") as obj_file:
+        lines = obj_file.read().splitlines()
+    assert len([line for line in lines if line.startswith("usemtl ")]) == len(result)
+
+    write_preview(result, str(tmp_path / "preview.glb"))
+    with open(tmp_path / "preview.glb", "rb") as glb_file:
+        data = glb_file.read()
+    magic, version, length = struct.unpack("<III", data[0:12])
+    assert magic == 0x46546C67
+    assert version == 2
+    assert length == len(data)
+    json_length = struct.unpack("<I", data[12:16])[0]
+    gltf = json.loads(data[20 : 20 + json_length])
+    assert len(gltf["meshes"][0]["primitives"]) == len(result)
+    assert gltf["buffers"][0]["byteLength"] == length - 28 - json_length
+
+
+def test_empty(tmp_path):
+    # a glTF mesh needs at least one primitive
+    with pytest.raises(ValueError):
+        write_preview({}, str(tmp_path / "empty.glb"))
+    assert not os.path.exists(tmp_path / "empty.glb")
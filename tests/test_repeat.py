@@ -195,5 +195,61 @@ def test_closed_repeat_properties(closed_repeat):
     assert closed_repeat[3].__dict__["class"] == "Repeat"
 
 
+def test_repeat_instancing():
+    trace = ugraph.graph()
+    normals = topologist.normals.Normals()
+    vertex_0 = Vertex.ByCoordinates(0.0, 0.0, 3.0)
+    vertex_1 = Vertex.ByCoordinates(12.0, 0.0, 3.0)
+    trace.add_edge(
+        {
+            vertex_0.CoorAsString(): [
+                vertex_1.CoorAsString(),
+                {
+                    "start_vertex": vertex_0,
+                    "end_vertex": vertex_1,
+                    "face": None,
+                    "back_cell": None,
+                    "front_cell": None,
+                },
+            ]
+        }
+    )
+    paths = trace.find_paths()
+
+    ifc = molior.ifc.init(name="Our Project")
+
+    molior_object = Molior(
+        file=ifc,
+        circulation=None,
+        normals=normals.normals,
+        name="My House",
+        elevations={3.0: 1},
+    )
+    molior_object.init_building()
+    # balustrade with small balusters and a bar in each bay
+    molior_object.build_trace(
+        stylename="halifax",
+        condition="none",
+        elevation=3.0,
+        height=1.0,
+        chain=paths[0],
+    )
+
+    railings = ifc.by_type("IfcRailing")
+    assert len(railings) > 100
+    # every baluster is an instance of a map from the Type, and every bar
+    # between balusters is an instance of the first bar
+    bays = [railing for railing in railings if railing.Name != "handrail"]
+    unique = [
+        railing
+        for railing in bays
+        if railing.Representation.Representations[0].RepresentationType
+        != "MappedRepresentation"
+    ]
+    # first short bar and the full length bottom bar
+    assert len(unique) == 2
+    assert len(ifc.by_type("IfcRepresentationMap")) == 3
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+
+import os
+import sys
+
+import ifcopenshell.geom
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from molior import Molior
+from molior.ifc import delete_ifc_product, purge_unused
+from benchmark.synthetic import building
+
+
+def build(storeys):
+    faces, widgets = building(
+        storeys=storeys, rooms=1, width=4.0, depth=3.0, usages=["Bedroom"]
+    )
+
+    molior_object = Molior.from_faces_and_widgets(
+        faces=faces, widgets=widgets, name="My Building"
+    )
+    molior_object.execute()
+    return molior_object.file
+
+
+def body_type(wall):
+    return wall.Representation.Representations[0].RepresentationType
+
+
+def world_vertices(ifc, element):
+    settings = ifcopenshell.geom.settings()
+    settings.set("use-world-coords", True)
+    verts = ifcopenshell.geom.create_shape(settings, element).geometry.verts
+    return sorted(
+        {tuple(round(x, 4) for x in verts[i : i + 3]) for i in range(0, len(verts), 3)}
+    )
+
+
+def storey_name(wall):
+    aggregate = wall.Decomposes[0].RelatingObject
+    return aggregate.ContainedInStructure[0].RelatingStructure.Name
+
+
+def test_repeated_storeys():
+    ifc = build(3)
+    walls = [wall for wall in ifc.by_type("IfcWall") if wall.Name == "exterior"]
+    assert len(walls) == 12
+    maps = ifc.by_type("IfcRepresentationMap")
+    # only the long and short walls on the first storey have their own geometry,
+    # the opposite walls are identical
+    assert sorted(
+        storey_name(wall) for wall in walls if body_type(wall) == "SweptSolid"
+    ) == ["0", "0"]
+    for wall in walls:
+        if body_type(wall) == "SweptSolid":
+            continue
+        item = wall.Representation.Representations[0].Items[0]
+        assert item.is_a("IfcMappedItem")
+        assert item.MappingSource in maps
+
+    # mapped geometry is the same as the original, one storey up
+    geometry = {}
+    for wall in walls:
+        geometry.setdefault(storey_name(wall), []).append(world_vertices(ifc, wall))
+    for name in ["1", "2"]:
+        assert sorted(geometry[name]) == sorted(
+            [
+                [(x, y, round(z + float(name) * 3.0, 4)) for x, y, z in vertices]
+                for vertices in geometry["0"]
+            ]
+        )
+
+
+def test_delete_original():
+    ifc = build(2)
+    walls = [wall for wall in ifc.by_type("IfcWall") if wall.Representation]
+    mapped = [wall for wall in walls if body_type(wall) == "MappedRepresentation"]
+    assert mapped
+    for wall in walls:
+        if wall not in mapped:
+            delete_ifc_product(ifc, wall)
+    purge_unused(ifc)
+
+    # shared geometry survives for the remaining walls
+    for wall in mapped:
+        assert world_vertices(ifc, wall)
+
+
+def test_openings():
+    ifc = build(2)
+    openings = ifc.by_type("IfcOpeningElement")
+    assert len(openings) > 1
+    # the first opening of each type has geometry, the rest map it
+    first = {}
+    for opening in openings:
+        key = opening.HasFillings[0].RelatedBuildingElement.IsTypedBy[0].RelatingType
+        representation = opening.Representation.Representations[0]
+        if key not in first:
+            first[key] = representation
+            assert representation.RepresentationType != "MappedRepresentation"
+            continue
+        assert representation.RepresentationType == "MappedRepresentation"
+        source = representation.Items[0].MappingSource.MappedRepresentation
+        assert source.Items == first[key].Items
+
+    # walls are still cut by mapped openings
+    for opening in openings:
+        wall = opening.VoidsElements[0].RelatingBuildingElement
+        assert len(world_vertices(ifc, wall)) > 8
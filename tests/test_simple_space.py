@@ -3,6 +3,7 @@
 import os
 import sys
 import pytest
+import numpy as np
 from topologic_core import Vertex, Face, Cell
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -72,3 +73,30 @@ def ifc_project():
 def test_write(ifc_project):
     """Test writing the IFC file."""
     ifc_project.write("_test.ifc")
+
+
+def test_tessellation(ifc_project):
+    """Inclined ceilings are clipped when building, not with a boolean."""
+    assert len(ifc_project.by_type("IfcBooleanResult")) == 0
+    (space,) = ifc_project.by_type("IfcSpace")
+    (representation,) = [
+        item
+        for item in space.Representation.Representations
+        if item.RepresentationIdentifier == "Body"
+    ]
+    assert representation.RepresentationType == "Tessellation"
+    (faceset,) = representation.Items
+    faces = [face.CoordIndex for face in faceset.Faces]
+
+    # closed, every edge is traversed once in each direction
+    edges = [edge for face in faces for edge in zip(face, face[1:] + face[:1])]
+    assert sorted(edges) == sorted((b, a) for a, b in edges)
+
+    # outward facing, so the volume is positive
+    vertices = np.array(faceset.Coordinates.CoordList)
+    volume = 0.0
+    for face in faces:
+        coor = vertices[[index - 1 for index in face]]
+        volume += np.dot(coor[0], np.cross(coor[1:-1], coor[2:]).sum(axis=0)) / 6
+    assert volume > 0.0
+    assert max(vertices[:, 2]) < 9.0 - 3.15
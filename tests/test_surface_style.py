@@ -0,0 +1,43 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import ifcopenshell.api.style
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import molior.ifc
+from molior.ifc import get_surface_style
+
+api = ifcopenshell.api
+
+
+def test_surface_style_pool():
+    ifc = molior.ifc.init(name="My Project")
+
+    # a style created some other way
+    existing = api.style.add_style(ifc, name="Void Space")
+    api.style.add_surface_style(
+        ifc,
+        style=existing,
+        ifc_class="IfcSurfaceStyleShading",
+        attributes={
+            "SurfaceColour": {"Name": None, "Red": 0.5, "Green": 0.5, "Blue": 0.5},
+            "Transparency": 0.5,
+        },
+    )
+
+    style = get_surface_style(ifc, "Void Space", [0.5, 0.5, 0.5], 0.5)
+    assert style == existing
+    assert get_surface_style(ifc, "Void Space", [0.5, 0.5, 0.5], 0.9) != existing
+    assert get_surface_style(ifc, "Other Space", [0.5, 0.5, 0.5], 0.5) != existing
+
+    crinkly = get_surface_style(ifc, "Crinkliness 0.3", [0.7, 0.3, 0.0], 0.5)
+    assert crinkly.Styles[0].SurfaceColour.Red == 0.7
+    assert crinkly.Styles[0].Transparency == 0.5
+    assert get_surface_style(ifc, "Crinkliness 0.3", [0.7, 0.3, 0.0], 0.5) == crinkly
+    assert len(ifc.by_type("IfcSurfaceStyle")) == 4
+
+    # styles deleted from the file are created again
+    ifc.remove(crinkly)
+    assert get_surface_style(ifc, "Crinkliness 0.3", [0.7, 0.3, 0.0], 0.5)
+    assert len(ifc.by_type("IfcSurfaceStyle")) == 4
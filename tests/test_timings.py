@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from molior import Molior
+from molior.timings import Timings, Progress, Cancelled
+from benchmark.synthetic import building
+
+
+def test_report():
+    faces_ptr = building(rooms=1, width=4.0, depth=3.0)[0]
+
+    molior_object = Molior.from_faces_and_widgets(
+        faces=faces_ptr, name="My Building", timings=Timings()
+    )
+    molior_object.execute()
+    report = json.loads(json.dumps(molior_object.timings.report()))
+
+    stages = report["stages"]
+    for name in [
+        "ByFaces",
+        "IndexTopology",
+        "Circulation",
+        "ShortestPathTable",
+        "GetTraces",
+        "GetHulls",
+        "Wall",
+        "Floor",
+        "Space",
+        "connect_structure",
+        "connect_spaces",
+        "connect_assemblies",
+        "stash_topology",
+    ]:
+        assert stages[name]["calls"] > 0
+        assert stages[name]["seconds"] >= 0.0
+    assert stages["IndexTopology"]["entities"] == 0
+    assert stages["Wall"]["entities"] > 0
+
+    # everything was built with the default style
+    assert list(report["styles"]) == ["default"]
+    assert report["styles"]["default"]["entities"] == sum(
+        stages[name]["entities"]
+        for name in [
+            "Extrusion",
+            "Floor",
+            "Space",
+            "Wall",
+            "Repeat",
+            "Shell",
+            "Grillage",
+        ]
+        if name in stages
+    )
+
+    # timings are off by default
+    molior_object = Molior.from_faces_and_widgets(faces=faces_ptr)
+    assert molior_object.timings is None
+
+
+def test_progress():
+    faces_ptr = building(rooms=1, width=4.0, depth=3.0)[0]
+
+    progress = Progress()
+    assert progress.fraction() == 0.0
+    molior_object = Molior.from_faces_and_widgets(faces=faces_ptr, timings=progress)
+    molior_object.execute()
+    assert progress.total > 0
+    assert progress.fraction() == 1.0
+    assert progress.current is None
+
+    # a cancelled build stops at the next stage
+    progress = Progress()
+    progress.cancel()
+    with pytest.raises(Cancelled):
+        Molior.from_faces_and_widgets(faces=faces_ptr, timings=progress)
+    assert progress.stages == {}
@@ -1,7 +1,7 @@
 """Overloads domain-specific methods onto topologic_core.CellComplex"""
 
 import topologic_core
-from topologic_core import Graph, CellUtility
+from topologic_core import Graph, CellUtility, Topology
 from .helpers import el
 from . import traces
 from . import hulls
@@ -374,9 +374,79 @@ def FootPrint(self):
     return ugraph.find_paths()
 
 
+def Serialise(self, keys=None):
+    """A json-able copy of this CellComplex, BREP geometry with Cell and Face dictionaries
+
+    Optionally restrict the dictionaries to a list of keys.
+    """
+
+    def dump(topology):
+        dictionary = topology.DumpDictionary()
+        if keys is None:
+            return dictionary
+        return {key: dictionary[key] for key in keys if key in dictionary}
+
+    data = {"brep": self.String(3), "cells": [], "faces": []}
+    cells_ptr = []
+    self.Cells(None, cells_ptr)
+    for cell in cells_ptr:
+        data["cells"].append([_rounded(cell.Centroid().Coordinates()), dump(cell)])
+    faces_ptr = []
+    self.Faces(None, faces_ptr)
+    for face in faces_ptr:
+        data["faces"].append(
+            [
+                _rounded(list(face.Centroid().Coordinates()) + list(face.Normal())),
+                dump(face),
+            ]
+        )
+    return data
+
+
+def BySerialised(data):
+    """Recreate a CellComplex from Serialise() data, None if it doesn't match"""
+    cellcomplex = Topology.ByString(data["brep"])
+    if cellcomplex is None or type(cellcomplex).__name__ != "CellComplex":
+        return None
+    cells_ptr = []
+    cellcomplex.Cells(None, cells_ptr)
+    faces_ptr = []
+    cellcomplex.Faces(None, faces_ptr)
+    if len(cells_ptr) != len(data["cells"]) or len(faces_ptr) != len(data["faces"]):
+        return None
+
+    for cell, (centroid, dictionary) in zip(cells_ptr, data["cells"]):
+        if _rounded(cell.Centroid().Coordinates()) != centroid:
+            return None
+        for key, value in dictionary.items():
+            cell.Set(key, value)
+    for face, (centroid, dictionary) in zip(faces_ptr, data["faces"]):
+        coordinates = _rounded(
+            list(face.Centroid().Coordinates()) + list(face.Normal())
+        )
+        if coordinates[0:3] != centroid[0:3]:
+            return None
+        for key, value in dictionary.items():
+            face.Set(key, value)
+        if coordinates[3:6] != centroid[3:6]:
+            # internal faces may be flipped in the BREP, so 'badnormal' is wrong
+            dictionary = face.GetDictionary()
+            if dictionary.ContainsKey("badnormal"):
+                dictionary.Remove("badnormal")
+                face.SetDictionary(dictionary)
+            face.BadNormal(cellcomplex)
+    return cellcomplex
+
+
+def _rounded(coordinates):
+    return [round(value, 4) + 0.0 for value in coordinates]
+
+
 setattr(topologic_core.CellComplex, "IndexTopology", IndexTopology)
 setattr(topologic_core.CellComplex, "AllocateCells", AllocateCells)
 setattr(topologic_core.CellComplex, "Adjacency", Adjacency)
 setattr(topologic_core.CellComplex, "GetTraces", GetTraces)
 setattr(topologic_core.CellComplex, "GetHulls", GetHulls)
 setattr(topologic_core.CellComplex, "FootPrint", FootPrint)
+setattr(topologic_core.CellComplex, "Serialise", Serialise)
+setattr(topologic_core.CellComplex, "BySerialised", BySerialised)
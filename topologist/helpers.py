@@ -1,4 +1,6 @@
 import math
+import numpy as np
+from topologic_core import Vertex, Face
 
 
 def el(elevation):
@@ -30,3 +32,237 @@ def string_to_coor(string):
         raise ValueError(
             f"Invalid coordinate string format: {string}. Expected format: 'x__y__z'"
         )
+
+
+def clean_mesh(vertices, faces, tolerance=0.0001, min_area=0.00001):
+    """
+    Weld vertices, drop degenerate and duplicate faces from an indexed mesh.
+
+    Vertices are snapped to a grid of the given tolerance and merged, faces
+    with repeated corners are simplified, faces smaller than min_area are
+    dropped, as are faces that use the same vertices as an earlier face
+    (whatever their winding).
+
+    Args:
+        vertices (list): Coordinates [[x, y, z], ...]
+        faces (list): Faces as lists of vertex indices
+
+    Returns:
+        tuple: (welded vertices as a (N, 3) numpy array, faces as lists of
+        indices into them, index of each surviving face in the input faces)
+    """
+    vertices = np.asarray(vertices, dtype=float).reshape(-1, 3)
+    if len(vertices) == 0 or len(faces) == 0:
+        return np.zeros((0, 3)), [], []
+    keys = np.round(vertices / tolerance).astype(np.int64)
+    unique, first, inverse = np.unique(
+        keys, axis=0, return_index=True, return_inverse=True
+    )
+    inverse = inverse.reshape(-1)
+    # keep welded vertices in the order they first appear
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    welded = vertices[first[order]]
+    remap = rank[inverse]
+
+    # faces of the same size are processed together
+    groups = {}
+    for index, face in enumerate(faces):
+        face = remap[np.asarray(face, dtype=np.int64)]
+        # drop corners that repeat the previous corner
+        face = face[face != np.roll(face, 1)]
+        if len(face) < 3:
+            continue
+        groups.setdefault(len(face), [[], []])
+        groups[len(face)][0].append(face)
+        groups[len(face)][1].append(index)
+
+    survivors = []
+    for size, (group, indices) in groups.items():
+        group = np.array(group)
+        indices = np.array(indices)
+        # Newell's method, twice the area vector of each polygon
+        coor = welded[group]
+        normals = np.cross(coor, np.roll(coor, -1, axis=1)).sum(axis=1)
+        areas = np.linalg.norm(normals, axis=1) / 2
+        keep = areas > min_area
+        group = group[keep]
+        indices = indices[keep]
+        # faces with the same set of vertices are duplicates
+        __, first = np.unique(np.sort(group, axis=1), axis=0, return_index=True)
+        for row in first:
+            survivors.append([indices[row], group[row].tolist()])
+
+    survivors.sort()
+    return (
+        welded,
+        [face for index, face in survivors],
+        [int(index) for index, face in survivors],
+    )
+
+
+def orient_mesh(vertices, faces):
+    """
+    Wind the faces of a closed indexed mesh consistently, facing outwards.
+
+    Faces are flipped to agree with their neighbours across shared edges,
+    then every connected part with a negative volume is turned inside-out.
+
+    Args:
+        vertices (list): Coordinates [[x, y, z], ...]
+        faces (list): Faces as lists of vertex indices
+
+    Returns:
+        list: Faces as lists of vertex indices
+    """
+    vertices = np.asarray(vertices, dtype=float).reshape(-1, 3)
+    faces = [list(face) for face in faces]
+    edges = {}
+    for index, face in enumerate(faces):
+        for a, b in zip(face, face[1:] + face[:1]):
+            edges.setdefault(frozenset([a, b]), []).append(index)
+
+    flipped = [None] * len(faces)
+    for seed in range(len(faces)):
+        if flipped[seed] is not None:
+            continue
+        flipped[seed] = False
+        part = [seed]
+        queue = [seed]
+        while queue:
+            index = queue.pop()
+            face = faces[index][::-1] if flipped[index] else faces[index]
+            directed = set(zip(face, face[1:] + face[:1]))
+            for a, b in directed:
+                for other in edges[frozenset([a, b])]:
+                    if flipped[other] is not None:
+                        continue
+                    # neighbours traverse a shared edge in opposite directions
+                    flipped[other] = (a, b) in zip(
+                        faces[other], faces[other][1:] + faces[other][:1]
+                    )
+                    part.append(other)
+                    queue.append(other)
+
+        # divergence theorem, six times the volume of this part
+        volume = 0.0
+        for index in part:
+            face = faces[index][::-1] if flipped[index] else faces[index]
+            coor = vertices[face]
+            volume += np.dot(coor[0], np.cross(coor[1:-1], coor[2:]).sum(axis=0))
+        if volume < 0.0:
+            for index in part:
+                flipped[index] = not flipped[index]
+
+    return [face[::-1] if flip else face for face, flip in zip(faces, flipped)]
+
+
+def faces_from_mesh(vertices, faces, stylenames=None):
+    """
+    Topologic Faces for the faces of an indexed mesh that survive clean_mesh().
+
+    Args:
+        vertices (list): Coordinates [[x, y, z], ...]
+        faces (list): Faces as lists of vertex indices
+        stylenames (list, optional): A stylename for each face
+
+    Returns:
+        list: Topologic Faces, with a 'stylename' if given
+    """
+    welded, faces, kept = clean_mesh(vertices, faces)
+    vertices_ptr = [Vertex.ByCoordinates(*coor) for coor in welded.tolist()]
+    faces_ptr = []
+    for face, index in zip(faces, kept):
+        face_ptr = Face.ByVertices([vertices_ptr[corner] for corner in face])
+        if not face_ptr:
+            continue
+        if stylenames:
+            face_ptr.Set("stylename", stylenames[index])
+        faces_ptr.append(face_ptr)
+    return faces_ptr
+
+
+def polyface_meshes(path):
+    """
+    Coordinates and faces of each polyface mesh in a DXF file.
+
+    The modelspace is streamed where possible, so large files don't need to
+    be loaded into memory. Requires ezdxf.
+
+    Args:
+        path (str): Path to a DXF file
+
+    Yields:
+        tuple: (coordinates of the vertices, faces as lists of vertex indices)
+    """
+    import ezdxf
+    from ezdxf.addons import iterdxf
+    from ezdxf.filemanagement import dxf_file_info
+
+    if dxf_file_info(path).version > "AC1009":
+        entities = iterdxf.modelspace(path, types=["POLYLINE"])
+    else:
+        # R12 files can't be streamed
+        entities = ezdxf.readfile(path).modelspace().query("POLYLINE")
+    for entity in entities:
+        if entity.get_mode() == "AcDbPolyFaceMesh":
+            vertices, faces = entity.indexed_faces()
+            yield (
+                [vertex.dxf.location for vertex in vertices],
+                [face.indices for face in faces],
+            )
+
+
+def faces_from_dxf(path):
+    """
+    Topologic Faces from the polyface meshes in a DXF file, welded and cleaned.
+
+    Args:
+        path (str): Path to a DXF file
+
+    Returns:
+        list: Topologic Faces
+    """
+    vertices = []
+    faces = []
+    for mesh_vertices, mesh_faces in polyface_meshes(path):
+        offset = len(vertices)
+        vertices.extend(mesh_vertices)
+        faces.extend([index + offset for index in face] for face in mesh_faces)
+    return faces_from_mesh(vertices, faces)
+
+
+def faces_from_obj(path):
+    """
+    Topologic Faces from a Wavefront OBJ file, welded and cleaned.
+
+    Args:
+        path (str): Path to an OBJ file
+
+    Returns:
+        list: Topologic Faces, materials are used as the 'stylename'
+    """
+    vertices = []
+    faces = []
+    stylenames = []
+    stylename = "default"
+    with open(path, "r") as obj_file:
+        for line in obj_file:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == "v":
+                vertices.append([float(value) for value in fields[1:4]])
+            elif fields[0] == "usemtl" and len(fields) > 1:
+                stylename = fields[1]
+            elif fields[0] == "f":
+                indices = [int(field.split("/")[0]) for field in fields[1:]]
+                faces.append(
+                    [
+                        index - 1 if index > 0 else len(vertices) + index
+                        for index in indices
+                    ]
+                )
+                stylenames.append(stylename)
+    return faces_from_mesh(vertices, faces, stylenames)